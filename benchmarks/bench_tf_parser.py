@@ -0,0 +1,109 @@
+"""Compare Terraform variable extraction with and without the fast path.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_tf_parser [path-to-terraform-repo ...]
+
+Without arguments a synthetic module set is generated: one variables.tf and
+several resource files per module, which is the usual layout.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+from src.services.registry.tf_parser import extract_tf_variables
+
+VARIABLE = """variable "{name}" {{
+  type        = {type}
+  description = "Setting {name} of the module"
+  default     = {default}
+}}
+"""
+
+RESOURCE = """resource "aws_instance" "node_{i}" {{
+  ami           = var.ami
+  instance_type = var.instance_type
+  subnet_id     = element(var.subnet_ids, {i})
+  tags = merge(var.tags, {{
+    Name = "${{var.name}}-{i}"
+  }})
+
+  lifecycle {{
+    ignore_changes = [ami]
+  }}
+}}
+"""
+
+OBJECT_VARIABLE = """variable "settings" {
+  type = object({
+    enabled = bool
+    size    = optional(number, 1)
+  })
+  default = null
+}
+"""
+
+
+def synthetic_corpus(modules: int = 50) -> List[bytes]:
+    values = [
+        ("string", '"eu-west-1"'),
+        ("number", "3"),
+        ("bool", "true"),
+        ("list(string)", '["a", "b"]'),
+        ("map(string)", '{ env = "dev" }'),
+    ]
+    files: List[bytes] = []
+    for _ in range(modules):
+        variables = [
+            VARIABLE.format(
+                name=f"var_{i}", type=values[i % 5][0], default=values[i % 5][1]
+            )
+            for i in range(20)
+        ]
+        variables.append(OBJECT_VARIABLE)
+        files.append("\n".join(variables).encode("utf-8"))
+        files.extend(
+            "\n".join(RESOURCE.format(i=i) for i in range(8)).encode("utf-8")
+            for _ in range(4)
+        )
+    return files
+
+
+def load_corpus(paths: List[str]) -> List[bytes]:
+    return [p.read_bytes() for root in paths for p in sorted(Path(root).rglob("*.tf"))]
+
+
+def timed(files: List[bytes], fast_path: bool, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for data in files:
+            extract_tf_variables(data, fast_path=fast_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Directories of .tf files.")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    files = load_corpus(args.paths) if args.paths else synthetic_corpus()
+    mismatches = sum(
+        extract_tf_variables(d) != extract_tf_variables(d, fast_path=False)
+        for d in files
+    )
+
+    full = timed(files, fast_path=False, rounds=args.rounds)
+    fast = timed(files, fast_path=True, rounds=args.rounds)
+    print(f"{len(files)} files, {sum(map(len, files)) / 1024:.0f} KiB")
+    print(f"hcl2 only:  {full:.3f}s")
+    print(f"fast path:  {fast:.3f}s ({full / fast:.1f}x)")
+    print(f"mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
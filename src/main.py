@@ -6,12 +6,33 @@ from rich import print
 from . import __version__
 from .client import send_message
 from .config import get_config_file, load_config, save_config
-from .services.registry.terraform_registry import ModuleRegistryService
+from .models.module_registry import registries_for
+from .services.registry.terraform_registry import (
+    DEFAULT_GIT_TIMEOUT,
+    DEFAULT_PARSE_CACHE_MAX_BYTES,
+    DEFAULT_PARSE_CHUNK_SIZE,
+    DEFAULT_PUBLISH_INTERVAL,
+    DEFAULT_SYNC_CONCURRENCY,
+    METADATA_SOURCES,
+    SYNC_ORDERS,
+    ModuleRegistryService,
+    SyncOptions,
+    build_catalogs,
+    org_services,
+)
 from .services.session.session import SessionService
-from .services.vector_store.faiss_store import FaissService
+from .services.vector_store.faiss_store import (
+    DEFAULT_EF_SEARCH,
+    DEFAULT_NPROBE,
+    DEFAULT_RERANK_FACTOR,
+    INDEX_ENCODINGS,
+    INDEX_TYPES,
+    FaissService,
+    IndexOptions,
+)
 
 
-def chat() -> None:
+def chat(index_options: IndexOptions = None) -> None:
     session_service = SessionService()
     registry_service = get_registry_service()
     if not registry_service.validate_catalog():
@@ -23,7 +44,7 @@ def chat() -> None:
     history = session_service.load_session()
 
     catalog = registry_service.pull_catalog()
-    vector_store = FaissService(catalog)
+    vector_store = FaissService(catalog, options=index_options)
     vector_store.create_index()
     print("[bold green]TerragenAI Chat started. Type 'exit' to quit.[/bold green]")
 
@@ -90,11 +111,69 @@ def get_registry_service():
     return registry_service
 
 
-def sync_registry_modules():
-    registry_service = get_registry_service()
+def sync_registry_modules(options: SyncOptions = None):
+    registry_service = ModuleRegistryService(options=options)
     registry_service.build_catalog()
 
 
+def plan_registry_modules(options: SyncOptions = None):
+    registry_service = ModuleRegistryService(options=options)
+    registry_service.plan_sync()
+
+
+def sync_orgs(orgs, options: SyncOptions = None, plan: bool = False):
+    services = org_services(registries_for(orgs), options)
+    if plan:
+        for service in services:
+            service.plan_sync()
+    else:
+        build_catalogs(services)
+
+
+def sync_options_from_args(args: argparse.Namespace) -> SyncOptions:
+    return SyncOptions(
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        checkout_free=args.checkout_free,
+        partial_clone=args.partial_clone,
+        include_paths=tuple(args.include_path or ()),
+        exclude_paths=tuple(args.exclude_path or ()),
+        metadata_sources=tuple(args.metadata_source or ("git",)),
+        parse_cache_max_bytes=args.parse_cache_mb * 1024 * 1024,
+        parse_processes=args.parse_processes,
+        parse_chunk_size=args.parse_chunk_size,
+        force=args.force,
+        resume=args.resume,
+        git_timeout=args.git_timeout or None,
+        order=args.order,
+        priority_modules=tuple(args.priority or ()),
+        publish_interval=args.publish_interval,
+        namespaces=tuple(args.namespace or ()),
+        providers=tuple(args.provider or ()),
+        include_modules=tuple(args.include_module or ()),
+        exclude_modules=tuple(args.exclude_module or ()),
+        max_versions=args.max_versions,
+    )
+
+
+def index_options_from_args(args: argparse.Namespace) -> IndexOptions:
+    return IndexOptions(
+        index_type=args.index_type,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search,
+        encoding=args.index_encoding,
+        rerank_factor=args.rerank_factor,
+        mmap=not args.no_index_mmap,
+    )
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="terragenai",
@@ -113,6 +192,176 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Sync the latest modules from your Terraform Cloud/Enterprise private registry.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_SYNC_CONCURRENCY,
+        help="Number of repos cloned and parsed in parallel during --sync.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-parse tags that are new or moved since the last --sync.",
+    )
+    parser.add_argument(
+        "--checkout-free",
+        action="store_true",
+        help="Read Terraform files from git objects instead of checking out each tag.",
+    )
+    parser.add_argument(
+        "--partial-clone",
+        action="store_true",
+        help="Keep blobless repo mirrors and only download the .tf files that are parsed.",
+    )
+    parser.add_argument(
+        "--include-path",
+        action="append",
+        metavar="GLOB",
+        help="Only parse .tf files under matching paths (repeatable).",
+    )
+    parser.add_argument(
+        "--exclude-path",
+        action="append",
+        metavar="GLOB",
+        help="Skip .tf files under matching paths, e.g. examples (repeatable).",
+    )
+    parser.add_argument(
+        "--metadata-source",
+        action="append",
+        choices=METADATA_SOURCES,
+        help=(
+            "Where to read module variables from, in order of preference "
+            "(repeatable, default: git). 'api' uses the registry API and "
+            "'archive' the registry-hosted module archive; both fall back to "
+            "later sources for versions they have no data for."
+        ),
+    )
+    parser.add_argument(
+        "--parse-cache-mb",
+        type=int,
+        default=DEFAULT_PARSE_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Size limit of the on-disk Terraform parse cache in MB (0 disables it).",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=None,
+        help="Worker processes parsing Terraform files (default: one per CPU, 0 parses serially).",
+    )
+    parser.add_argument(
+        "--parse-chunk-size",
+        type=int,
+        default=DEFAULT_PARSE_CHUNK_SIZE,
+        help="Most .tf files sent to a parse worker in one batch.",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="With --sync, only list the repos and tags that have changed since the last sync.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild the catalog during --sync even if the registry reports no changes.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted --sync, keeping the versions it already finished.",
+    )
+    parser.add_argument(
+        "--git-timeout",
+        type=float,
+        default=DEFAULT_GIT_TIMEOUT,
+        help="Seconds each git command may run during --sync before it is killed (0 for no limit).",
+    )
+    parser.add_argument(
+        "--order",
+        choices=SYNC_ORDERS,
+        default="listing",
+        help="Order --sync processes modules in; 'recent' starts with the most recently updated.",
+    )
+    parser.add_argument(
+        "--priority",
+        action="append",
+        metavar="PATTERN",
+        help="Sync modules matching this glob (name or namespace/name/provider) first. Repeatable.",
+    )
+    parser.add_argument(
+        "--publish-interval",
+        type=float,
+        default=DEFAULT_PUBLISH_INTERVAL,
+        help="Seconds between partial catalogs written during --sync (0 to only write the final one).",
+    )
+    parser.add_argument(
+        "--namespace",
+        action="append",
+        help="Only sync modules in this namespace (repeatable).",
+    )
+    parser.add_argument(
+        "--provider",
+        action="append",
+        help="Only sync modules for this provider, e.g. aws (repeatable).",
+    )
+    parser.add_argument(
+        "--include-module",
+        action="append",
+        metavar="PATTERN",
+        help="Only sync modules whose name or namespace/name/provider matches (repeatable).",
+    )
+    parser.add_argument(
+        "--exclude-module",
+        action="append",
+        metavar="PATTERN",
+        help="Skip modules whose name or namespace/name/provider matches (repeatable).",
+    )
+    parser.add_argument(
+        "--max-versions",
+        type=positive_int,
+        metavar="N",
+        help="Only sync the newest N versions of each module (semver order).",
+    )
+    parser.add_argument(
+        "--org",
+        action="append",
+        metavar="[DOMAIN/]ORG",
+        help="Sync this org instead of TF_ORG; repeat to sync several orgs concurrently.",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default="auto",
+        help="Vector index used by chat; 'auto' searches exactly on small catalogs and uses IVF on large ones.",
+    )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=DEFAULT_NPROBE,
+        help="IVF clusters searched per query (higher finds more, slower).",
+    )
+    parser.add_argument(
+        "--ef-search",
+        type=int,
+        default=DEFAULT_EF_SEARCH,
+        help="HNSW candidates kept per query (higher finds more, slower).",
+    )
+    parser.add_argument(
+        "--index-encoding",
+        choices=INDEX_ENCODINGS,
+        default="flat",
+        help="How the vector index stores embeddings; 'sq8' and 'pq' shrink it at some cost in accuracy.",
+    )
+    parser.add_argument(
+        "--rerank-factor",
+        type=int,
+        default=DEFAULT_RERANK_FACTOR,
+        help="Candidates per result re-ranked exactly when --index-encoding is sq8 or pq (0 disables).",
+    )
+    parser.add_argument(
+        "--no-index-mmap",
+        action="store_true",
+        help="Read the vector index into memory instead of memory-mapping it.",
+    )
     return parser
 
 
@@ -132,10 +381,15 @@ def run() -> None:
         return
 
     if args.sync_registry_modules:
-        sync_registry_modules()
+        if args.org:
+            sync_orgs(args.org, sync_options_from_args(args), plan=args.plan)
+        elif args.plan:
+            plan_registry_modules(sync_options_from_args(args))
+        else:
+            sync_registry_modules(sync_options_from_args(args))
         return
 
-    chat()
+    chat(index_options_from_args(args))
 
 
 if __name__ == "__main__":
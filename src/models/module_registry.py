@@ -1,18 +1,25 @@
+from typing import Iterable, List, Optional
+
 from ..config import load_config
 
 
 class ModuleRegistry:
 
-    def __init__(self):
+    def __init__(self, org: Optional[str] = None, domain: Optional[str] = None):
 
         config = load_config()
 
-        # Pulled directly from configuration
-        self.TF_ORG = config.get("TF_ORG", "").strip()
-        self.TF_REGISTRY_DOMAIN = config.get(
-            "TF_REGISTRY_DOMAIN", "app.terraform.io"
+        # Pulled directly from configuration, unless given explicitly
+        self.TF_ORG = (org or config.get("TF_ORG", "")).strip()
+        self.TF_REGISTRY_DOMAIN = (
+            domain or config.get("TF_REGISTRY_DOMAIN", "app.terraform.io")
+        ).strip()
+        # TF_API_TOKENS maps registry domains to tokens, for syncing orgs on
+        # more than one Terraform Enterprise instance.
+        tokens = config.get("TF_API_TOKENS") or {}
+        self.TF_API_TOKEN = (
+            tokens.get(self.TF_REGISTRY_DOMAIN) or config.get("TF_API_TOKEN", "")
         ).strip()
-        self.TF_API_TOKEN = config.get("TF_API_TOKEN", "").strip()
         self.GIT_CLONE_TOKEN = config.get("GIT_CLONE_TOKEN", "").strip()
 
         # Generated from configuration
@@ -21,6 +28,9 @@ class ModuleRegistry:
         self.TF_REGISTRY_MODULES_URL = (
             f"{self.TF_BASE_URL}/organizations/{self.TF_ORG}/registry-modules"
         )
+        self.TF_REGISTRY_API_URL = (
+            f"https://{self.TF_REGISTRY_DOMAIN}/api/registry/v1/modules"
+        )
         self.TF_HEADERS = {
             "Authorization": f"Bearer {self.TF_API_TOKEN}",
             "Content-Type": "application/vnd.api+json",
@@ -39,3 +49,15 @@ class ModuleRegistry:
             raise ValueError(
                 f"Missing required config: {', '.join(missing)}. Run `terragenai --configure`."
             )
+
+
+def registries_for(orgs: Iterable[str]) -> List[ModuleRegistry]:
+    """One registry per ``ORG`` or ``DOMAIN/ORG``.
+
+    A bare org lives on the configured TF_REGISTRY_DOMAIN.
+    """
+    registries = []
+    for spec in orgs:
+        domain, _, org = spec.strip().rpartition("/")
+        registries.append(ModuleRegistry(org=org, domain=domain or None))
+    return registries
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import os
 import sys
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Union
 
 APP_DIR_NAME = ".terragenai"
 
@@ -54,3 +57,20 @@ def get_state_dir() -> Path:
 def ensure_dir(path: Path) -> Path:
     path.mkdir(parents=True, exist_ok=True)
     return path
+
+
+@contextmanager
+def atomic_replace(path: Union[str, Path]) -> Iterator[str]:
+    """Yield a temporary path that replaces ``path`` once the block succeeds.
+
+    The temporary file sits next to ``path``, so readers only ever see the
+    old file or the complete new one. It is removed if the block raises.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=Path(path).parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_name
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
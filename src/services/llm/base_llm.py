@@ -1,12 +1,29 @@
 from abc import ABC, abstractmethod
+from typing import Tuple, Type
 
 
 class LLMService(ABC):
 
+    # Names the model behind create_embedding, so cached vectors of another
+    # model are never mixed in.
+    embedding_model: str = "default"
+    # Errors a failed embedding batch may be retried after, e.g. rate limits.
+    RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = ()
+
     @abstractmethod
     def create_embedding(self, text: str) -> list[float]:
         pass
 
+    def create_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Embeddings for ``texts``, in order; one request where the API allows."""
+        embeddings = []
+        for text in texts:
+            embedding = self.create_embedding(text)
+            if embedding is None:
+                return None
+            embeddings.append(embedding)
+        return embeddings
+
     @abstractmethod
     def generate(self, messages: list[dict]) -> str:
         pass
@@ -1,14 +1,24 @@
 import os
 
+import openai
 from openai import OpenAI
 from rich import print
 
 from ...config import load_config
 from .base_llm import LLMService
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 
 class OpenAIService(LLMService):
 
+    embedding_model = EMBEDDING_MODEL
+    RETRYABLE_ERRORS = (
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
     def __init__(self):
         config = load_config()
         OPENAI_API_KEY = config.get("OPENAI_API_KEY", "").strip()
@@ -23,11 +33,18 @@ class OpenAIService(LLMService):
             print("DRY_RUN==true, no LLM calls")
             return None
         return (
-            self.client.embeddings.create(model="text-embedding-3-small", input=text)
+            self.client.embeddings.create(model=EMBEDDING_MODEL, input=text)
             .data[0]
             .embedding
         )
 
+    def create_embeddings(self, texts: list[str]) -> list[list[float]]:
+        if self.dry_run:
+            print("DRY_RUN==true, no LLM calls")
+            return None
+        response = self.client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
     def generate(self, messages: list[dict]):
         if self.dry_run:
             print("DRY_RUN==true, no LLM calls")
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List
+
+# Key an entry stores instead of "files" when its file list is written as a
+# change against the entry before it in the same repo.
+FILES_DELTA = "files_delta"
+
+
+def _apply(base: List[str], delta: Dict[str, Any]) -> List[str]:
+    removed = set(delta.get("removed", []))
+    return sorted({path for path in base if path not in removed}.union(delta["added"]))
+
+
+def pack_file_lists(versions: Any) -> Any:
+    """Write each version's ``files`` as a delta against the previous version.
+
+    Consecutive tags of a repo usually share almost all files, so storing
+    only what was added and removed keeps the catalog from repeating the
+    same list per tag. A version keeps its full list when that is smaller,
+    or when the list is not in sorted order (a delta always decodes sorted).
+    Anything that is not a mapping of version entries is returned as is.
+    """
+    if not isinstance(versions, dict):
+        return versions
+    packed: Dict[str, Dict[str, Any]] = {}
+    base_tag = None
+    base: List[str] = []
+    for tag, entry in versions.items():
+        files = entry.get("files") if isinstance(entry, dict) else None
+        if not isinstance(files, list):
+            packed[tag] = entry
+            continue
+
+        if base_tag is not None:
+            base_set, files_set = set(base), set(files)
+            delta = {
+                "from": base_tag,
+                "added": sorted(files_set - base_set),
+                "removed": sorted(base_set - files_set),
+            }
+            changes = len(delta["added"]) + len(delta["removed"])
+            if changes < len(files) and _apply(base, delta) == files:
+                packed[tag] = {
+                    (FILES_DELTA if key == "files" else key): (
+                        delta if key == "files" else value
+                    )
+                    for key, value in entry.items()
+                }
+                base_tag, base = tag, files
+                continue
+
+        packed[tag] = entry
+        base_tag, base = tag, files
+    return packed
+
+
+def unpack_file_lists(versions: Any) -> Any:
+    """Inverse of ``pack_file_lists``: give every version its full ``files``.
+
+    Decoded versions share their path strings, so a repo's lists cost little
+    more in memory than the set of distinct paths.
+    """
+    if not isinstance(versions, dict):
+        return versions
+    interned: Dict[str, str] = {}
+    resolved: Dict[str, List[str]] = {}
+    unpacked: Dict[str, Dict[str, Any]] = {}
+    for tag, entry in versions.items():
+        if not isinstance(entry, dict):
+            unpacked[tag] = entry
+            continue
+        delta = entry.get(FILES_DELTA)
+        if isinstance(delta, dict):
+            files = _apply(resolved.get(delta.get("from"), []), delta)
+            entry = {
+                ("files" if key == FILES_DELTA else key): (
+                    files if key == FILES_DELTA else value
+                )
+                for key, value in entry.items()
+            }
+        files = entry.get("files")
+        if isinstance(files, list):
+            files = [interned.setdefault(path, path) for path in files]
+            entry = {**entry, "files": files}
+            resolved[tag] = files
+        unpacked[tag] = entry
+    return unpacked
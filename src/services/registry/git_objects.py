@@ -0,0 +1,113 @@
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .git_process import run_git
+
+SYMLINK_MODE = "120000"
+
+
+class MissingObjectsError(Exception):
+    """Objects asked for are not in the repository, e.g. unfetched blobs."""
+
+    def __init__(self, shas: List[str]):
+        super().__init__(f"{len(shas)} object(s) missing, e.g. {shas[0]}")
+        self.shas = shas
+
+
+@dataclass(frozen=True)
+class TreeEntry:
+    mode: str
+    type: str
+    sha: str
+    path: str
+
+
+def list_tree(
+    repo_dir: Path, rev: str, timeout: Optional[float] = None
+) -> List[TreeEntry]:
+    """List every blob reachable from ``rev``'s tree, without a checkout."""
+    result = run_git(
+        ["ls-tree", "-r", "-z", "--full-tree", rev],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        timeout=timeout,
+    )
+
+    entries: List[TreeEntry] = []
+    for record in result.stdout.split(b"\0"):
+        if not record:
+            continue
+        meta, path = record.split(b"\t", 1)
+        mode, obj_type, sha = meta.decode("ascii").split(" ")
+        if obj_type != "blob":
+            # Submodules show up as "commit" entries; a checkout would leave
+            # them empty, so they contribute no files either.
+            continue
+        entries.append(
+            TreeEntry(
+                mode=mode,
+                type=obj_type,
+                sha=sha,
+                path=path.decode("utf-8", errors="surrogateescape"),
+            )
+        )
+    return entries
+
+
+def missing_objects(
+    repo_dir: Path, rev: str, timeout: Optional[float] = None
+) -> Set[str]:
+    """Objects of ``rev``'s tree that a partial clone has not downloaded yet."""
+    result = run_git(
+        ["rev-list", "--objects", "--no-walk", "--missing=print", rev],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        text=True,
+        timeout=timeout,
+    )
+    return {line[1:] for line in result.stdout.splitlines() if line.startswith("?")}
+
+
+def read_blobs(
+    repo_dir: Path,
+    shas: Iterable[str],
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, bytes]:
+    """Read many blobs in one ``git cat-file --batch`` round trip.
+
+    Raises ``MissingObjectsError`` if any of them is not in the repository.
+    """
+    wanted = list(dict.fromkeys(shas))
+    if not wanted:
+        return {}
+
+    result = run_git(
+        ["cat-file", "--batch"],
+        cwd=repo_dir,
+        env=env,
+        input="".join(f"{sha}\n" for sha in wanted).encode("ascii"),
+        stdout=subprocess.PIPE,
+        timeout=timeout,
+    )
+
+    blobs: Dict[str, bytes] = {}
+    missing: List[str] = []
+    out = result.stdout
+    pos = 0
+    for sha in wanted:
+        header_end = out.index(b"\n", pos)
+        header = out[pos:header_end].decode("ascii").split(" ")
+        pos = header_end + 1
+        if len(header) != 3:
+            # "<sha> missing"
+            missing.append(sha)
+            continue
+        size = int(header[2])
+        blobs[sha] = out[pos : pos + size]
+        pos += size + 1
+    if missing:
+        raise MissingObjectsError(missing)
+    return blobs
@@ -0,0 +1,73 @@
+import os
+import signal
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# How long git gets to clean up (lock files, partial packs) after SIGTERM.
+TERMINATE_GRACE = 5.0
+
+
+def _terminate(proc: subprocess.Popen) -> None:
+    """Stop ``proc`` and every helper it started, e.g. ``git-remote-https``."""
+    if os.name == "nt":
+        proc.kill()
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=TERMINATE_GRACE)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def run_git(
+    args: List[str],
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    input: Optional[bytes] = None,
+    stdout: Any = None,
+    stderr: Any = None,
+    text: bool = False,
+    check: bool = True,
+    timeout: Optional[float] = None,
+) -> subprocess.CompletedProcess:
+    """``subprocess.run(["git", *args])`` that kills git's whole process group.
+
+    ``subprocess.run`` only kills git itself on a timeout or interrupt, which
+    leaves transport helpers holding the connection open. git runs in its own
+    process group here, so those are stopped too. Raises
+    ``subprocess.TimeoutExpired`` when ``timeout`` runs out.
+    """
+    if os.name == "nt":
+        group: Dict[str, Any] = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group = {"start_new_session": True}
+
+    with subprocess.Popen(
+        ["git", *args],
+        cwd=str(cwd) if cwd else None,
+        env=env,
+        stdin=subprocess.PIPE if input is not None else None,
+        stdout=stdout,
+        stderr=stderr,
+        text=text,
+        **group,
+    ) as proc:
+        try:
+            out, err = proc.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _terminate(proc)
+            proc.communicate()
+            raise
+        except BaseException:
+            _terminate(proc)
+            raise
+
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, out, err)
+    return subprocess.CompletedProcess(proc.args, proc.returncode, out, err)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ...paths import atomic_replace
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ResponseCache:
+    """Registry API responses and their validators, for conditional requests.
+
+    New responses are only staged while a sync runs and written by ``commit``
+    once the catalog built from them is on disk. A sync that fails half way
+    therefore never makes the next one believe nothing changed.
+    """
+
+    STATE_FILE = "state.json"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._staged: Dict[str, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.root / f"{digest}.json"
+
+    def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        with atomic_replace(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        data = self._read_json(self._path(url))
+        if data is None or data.get("url") != url:
+            return None
+        return CachedResponse(
+            body=data.get("body"),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+        )
+
+    def stage(self, url: str, response: CachedResponse) -> None:
+        with self._lock:
+            self._staged[url] = response
+
+    def commit(self, fingerprint: str) -> None:
+        """Persist staged responses and what the catalog was built with."""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        for url, response in staged.items():
+            self._write_json(self._path(url), {"url": url, **asdict(response)})
+        self._write_json(self.root / self.STATE_FILE, {"fingerprint": fingerprint})
+
+    def discard(self) -> None:
+        with self._lock:
+            self._staged = {}
+
+    def invalidate(self) -> None:
+        """Forget what the catalog was built with, until the next ``commit``.
+
+        No sync can then conclude that nothing changed, even when every
+        response is still current. Staged responses are kept.
+        """
+        (self.root / self.STATE_FILE).unlink(missing_ok=True)
+
+    def fingerprint(self) -> Optional[str]:
+        state = self._read_json(self.root / self.STATE_FILE)
+        return state.get("fingerprint") if state else None
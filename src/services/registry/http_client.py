@@ -0,0 +1,238 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from .http_cache import CachedResponse
+
+MAX_ATTEMPTS = 3
+REQUEST_TIMEOUT = 30
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Longest Retry-After we honour; a server asking for more gets retried sooner.
+RETRY_AFTER_MAX = 60.0
+# Terraform Cloud/Enterprise allow 30 API requests per second per token.
+DEFAULT_RATE_LIMIT = 30.0
+
+T = TypeVar("T")
+
+
+def sized_session(concurrency: int) -> requests.Session:
+    """A session whose connection pool fits ``concurrency`` request threads."""
+    session = requests.Session()
+    # One extra connection for the thread walking the registry listing.
+    adapter = HTTPAdapter(pool_maxsize=max(DEFAULT_POOLSIZE, concurrency + 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _header_float(headers: Mapping[str, Any], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if not isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _retry_after(headers: Mapping[str, Any]) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Request budget shared by every thread of a sync.
+
+    Holds up to one second's worth of requests. ``pause`` stops all callers
+    until the server says its limit has reset.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = rate
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = rate
+            self._tokens = min(self._tokens, rate)
+
+
+class RegistryHttpClient:
+    """GETs against the registry APIs, paced by the limits the server reports.
+
+    Every request takes a token from a bucket shared across threads. The
+    bucket's rate follows ``X-RateLimit-Limit``, and an exhausted
+    ``X-RateLimit-Remaining`` or a 429 pauses every thread until
+    ``X-RateLimit-Reset`` or ``Retry-After``. Network errors, 429s and 5xx
+    responses are retried with exponential backoff and full jitter; other
+    4xx responses are raised straight away.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        headers: Dict[str, str],
+        rate: float = DEFAULT_RATE_LIMIT,
+        max_attempts: int = MAX_ATTEMPTS,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session = session
+        self.headers = headers
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.bucket = TokenBucket(rate, clock=clock, sleep=lambda s: self.sleep(s))
+
+    def get_json(self, url: str) -> Any:
+        return self.get_conditional(url)[0].body
+
+    def get_response(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """GET ``url`` with the body read; ``headers`` replace the client's own.
+
+        Pass ``{}`` for hosts that must not see the registry token.
+        """
+
+        def read(resp: requests.Response) -> requests.Response:
+            resp.raise_for_status()
+            # Read the body inside the retry loop: a dropped download is retried.
+            resp.content
+            return resp
+
+        return self._get(url, self.headers if headers is None else headers, read)
+
+    def get_conditional(
+        self, url: str, cached: Optional[CachedResponse] = None
+    ) -> Tuple[CachedResponse, bool]:
+        """GET ``url``, revalidating ``cached`` if it has validators.
+
+        Returns the current response and whether it differs from ``cached``;
+        on a 304 that is ``cached`` itself.
+        """
+        headers = dict(self.headers)
+        if cached is not None and cached.has_validators:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        else:
+            cached = None
+
+        def read(resp: requests.Response) -> Tuple[CachedResponse, bool]:
+            if cached is not None and resp.status_code == 304:
+                return cached, False
+            resp.raise_for_status()
+            return (
+                CachedResponse(
+                    body=resp.json(),
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                ),
+                True,
+            )
+
+        return self._get(url, headers, read)
+
+    def _get(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        read: Callable[[requests.Response], T],
+    ) -> T:
+        last_error: Optional[requests.RequestException] = None
+        for attempt in range(self.max_attempts):
+            self.bucket.acquire()
+            try:
+                resp = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                self._observe_rate_limit(resp.headers)
+                return read(resp)
+            except requests.RequestException as exc:
+                if not self._is_retryable(exc):
+                    raise
+                last_error = exc
+
+            if attempt + 1 < self.max_attempts:
+                self._wait_before_retry(last_error, attempt)
+
+        if last_error:
+            raise last_error
+        raise RuntimeError("Request failed without an exception")
+
+    def _is_retryable(self, exc: requests.RequestException) -> bool:
+        if exc.response is None:
+            return True
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+
+    def _wait_before_retry(self, exc: requests.RequestException, attempt: int) -> None:
+        retry_after = None
+        if exc.response is not None:
+            retry_after = _retry_after(exc.response.headers)
+        if retry_after is not None:
+            # The server's limit applies to every thread, not just this one.
+            self.bucket.pause(min(retry_after, RETRY_AFTER_MAX))
+            return
+        self.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)))
+
+    def _observe_rate_limit(self, headers: Mapping[str, Any]) -> None:
+        limit = _header_float(headers, "X-RateLimit-Limit")
+        if limit and limit > 0 and limit != self.bucket.rate:
+            self.bucket.set_rate(limit)
+
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset")
+        if remaining is not None and remaining < 1 and reset:
+            self.bucket.pause(min(reset, RETRY_AFTER_MAX))
@@ -0,0 +1,120 @@
+import io
+import lzma
+import posixpath
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Archive formats a registry may point X-Terraform-Get at, as go-getter names
+# them. Everything but zip is a (possibly compressed) tarball.
+ARCHIVE_KINDS = ("tar.gz", "tgz", "tar.bz2", "tbz2", "tar.xz", "txz", "tar", "zip")
+ZIP_SYMLINK = 0o120000
+
+
+class ModuleArchiveError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ArchiveSource:
+    url: str
+    kind: str
+    # Directory inside the archive that holds the module ("" for the root).
+    subdir: str = ""
+
+
+def archive_source(
+    download_url: str, terraform_get: Optional[str]
+) -> Optional[ArchiveSource]:
+    """Where a module version's archive lives, from its X-Terraform-Get header.
+
+    Returns None unless the header names a plain HTTP(S) archive; "git::" and
+    other forced getters mean the registry only knows the VCS repo.
+    """
+    if not terraform_get:
+        return None
+    location = urljoin(download_url, terraform_get)
+    parts = urlsplit(location)
+    if parts.scheme not in ("http", "https"):
+        return None
+
+    # go-getter's "//sub/dir" suffix selects a directory inside the archive.
+    path, _, subdir = parts.path.partition("//")
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    kind = next((value for key, value in query if key == "archive"), None)
+    if kind is None:
+        kind = next((k for k in ARCHIVE_KINDS if path.endswith(f".{k}")), None)
+    if kind not in ARCHIVE_KINDS:
+        return None
+
+    query = [(key, value) for key, value in query if key != "archive"]
+    url = urlunsplit(parts._replace(path=path, query=urlencode(query)))
+    return ArchiveSource(url=url, kind=kind, subdir=subdir.strip("/"))
+
+
+def _relative(name: str, subdir: str) -> Optional[str]:
+    path = posixpath.normpath(name.lstrip("/"))
+    if path == "." or path.startswith("../"):
+        return None
+    if subdir:
+        if not path.startswith(f"{subdir}/"):
+            return None
+        path = path[len(subdir) + 1 :]
+    return path
+
+
+def _tar_members(data: bytes) -> Iterator[Tuple[str, Callable[[], bytes]]]:
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+        for member in archive:
+            # Symlinks and devices are skipped, as they are when reading git
+            # trees.
+            if not member.isfile():
+                continue
+
+            def read(member: tarfile.TarInfo = member) -> bytes:
+                f = archive.extractfile(member)
+                return f.read() if f else b""
+
+            yield member.name, read
+
+
+def _zip_members(data: bytes) -> Iterator[Tuple[str, Callable[[], bytes]]]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or (info.external_attr >> 16) & 0o170000 == ZIP_SYMLINK:
+                continue
+            yield info.filename, lambda info=info: archive.read(info)
+
+
+def read_archive(
+    data: bytes, source: ArchiveSource, wanted: Callable[[str], bool]
+) -> Tuple[List[str], List[Tuple[str, bytes]]]:
+    """List an archive's files and read the ``wanted`` ones, all in memory.
+
+    Paths are relative to ``source.subdir``. Raises ``ModuleArchiveError``
+    for archives that cannot be read.
+    """
+    members = _zip_members(data) if source.kind == "zip" else _tar_members(data)
+    files: List[str] = []
+    contents: List[Tuple[str, bytes]] = []
+    try:
+        for name, read in members:
+            path = _relative(name, source.subdir)
+            if path is None:
+                continue
+            files.append(path)
+            if wanted(path):
+                contents.append((path, read()))
+    except (
+        tarfile.TarError,
+        zipfile.BadZipFile,
+        zlib.error,
+        lzma.LZMAError,
+        EOFError,
+        OSError,
+    ) as exc:
+        raise ModuleArchiveError(str(exc)) from exc
+    return files, contents
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ...paths import atomic_replace
+
+# Bump when the shape of cached results changes.
+PARSE_CACHE_FORMAT = 1
+DEFAULT_PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA git would give ``data`` as a blob, so both parse paths share keys."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _parser_tag() -> str:
+    try:
+        hcl2_version = version("python-hcl2")
+    except PackageNotFoundError:
+        hcl2_version = "unknown"
+    return f"v{PARSE_CACHE_FORMAT}-hcl2-{hcl2_version}"
+
+
+class ParseCache:
+    """On-disk map from a .tf file's blob SHA to the variables parsed out of it.
+
+    Entries live under a directory named after the parser version, so upgrading
+    python-hcl2 never serves stale results. Once the cache grows past
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_PARSE_CACHE_MAX_BYTES):
+        self.root = Path(root) / _parser_tag()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Measured on the first put, so opening the cache to read stays cheap.
+        self._size: Optional[int] = None
+
+    def _path(self, blob_sha: str) -> Path:
+        return self.root / blob_sha[:2] / f"{blob_sha}.json"
+
+    def get(self, blob_sha: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(blob_sha)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                variables = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # Refresh the mtime so eviction is least-recently-used.
+            os.utime(path)
+        except OSError:
+            pass
+        return variables
+
+    def put(self, blob_sha: str, variables: List[Dict[str, Any]]) -> None:
+        path = self._path(blob_sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(variables).encode("utf-8")
+
+        with atomic_replace(path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            try:
+                previous = path.stat().st_size
+            except OSError:
+                previous = 0
+
+        with self._lock:
+            if self._size is None:
+                # The scan already counts the entry just written.
+                self._size = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+            else:
+                self._size += len(payload) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the bound so we are not evicting on every put.
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        for _mtime, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+        self._size = size
@@ -0,0 +1,401 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .git_process import run_git
+
+# Refs mirrored from each remote. The remote URL (which may embed a token) is
+# only ever passed through the environment, so credentials never end up in a
+# mirror's on-disk config.
+MIRROR_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+PARTIAL_CLONE_FILTER = "blob:none"
+
+LOCK_POLL_INTERVAL = 0.1
+LOCK_TIMEOUT = 15 * 60
+LOCK_STALE_AFTER = 60 * 60
+
+# GIT_CONFIG_COUNT, which git_env relies on, arrived in git 2.31.
+MIN_GIT_VERSION = (2, 31)
+
+
+class RepoCacheLockTimeout(RuntimeError):
+    pass
+
+
+class GitVersionError(RuntimeError):
+    pass
+
+
+def parse_git_version(output: str) -> Tuple[int, int]:
+    """``(major, minor)`` from ``git --version``, e.g. ``git version 2.39.5``."""
+    match = re.search(r"(\d+)\.(\d+)", output)
+    if not match:
+        raise GitVersionError(f"Could not read the git version from {output!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+@lru_cache(maxsize=None)
+def git_version() -> Tuple[int, int]:
+    try:
+        result = run_git(["--version"], stdout=subprocess.PIPE, text=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise GitVersionError(f"Could not run git: {exc}") from exc
+    return parse_git_version(result.stdout)
+
+
+class RepoCache:
+    """Persistent bare mirrors of module repos, one per repository-http-url.
+
+    The first sync of a repo fetches its full history into a bare mirror under
+    ``root``; later syncs only fetch new refs. Working copies are cheap local
+    clones of the mirror (objects are hard-linked, not downloaded).
+
+    With ``partial`` the mirrors are blobless: commits and trees are fetched up
+    front and file contents only on demand, via ``prefetch_blobs``. Blobless
+    mirrors live at their own paths, since a full fetch never backfills the
+    blobs a partial one skipped.
+
+    Needs git 2.31 or newer (``MIN_GIT_VERSION``); older versions raise
+    ``GitVersionError``.
+
+    Methods that talk to the remote take a ``timeout`` in seconds for each git
+    command they run; a command that exceeds it is killed and
+    ``subprocess.TimeoutExpired`` raised.
+    """
+
+    def __init__(
+        self, root: Path, clone_url: Callable[[str], str], partial: bool = False
+    ):
+        version = git_version()
+        if version < MIN_GIT_VERSION:
+            required = ".".join(map(str, MIN_GIT_VERSION))
+            found = ".".join(map(str, version))
+            raise GitVersionError(
+                f"Syncing needs git {required} or newer, found git {found}"
+            )
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._clone_url = clone_url
+        self.partial = partial
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._thread_locks_guard = threading.Lock()
+        self._remove_abandoned_staging()
+
+    # ------------------------------
+    # Paths
+    # ------------------------------
+    def mirror_path(self, repo_url: str) -> Path:
+        digest = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:16]
+        name = repo_url.rstrip("/").rsplit("/", 1)[-1]
+        if name.endswith(".git"):
+            name = name[: -len(".git")]
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", name) or "repo"
+        suffix = "-partial" if self.partial else ""
+        return self.root / f"{name}-{digest}{suffix}.git"
+
+    def _lock_path(self, repo_url: str) -> Path:
+        return self.mirror_path(repo_url).with_suffix(".lock")
+
+    # ------------------------------
+    # Locking
+    # ------------------------------
+    def _thread_lock(self, repo_url: str) -> threading.Lock:
+        with self._thread_locks_guard:
+            return self._thread_locks.setdefault(repo_url, threading.Lock())
+
+    def _lock_is_stale(self, lock_path: Path) -> bool:
+        try:
+            age = time.time() - lock_path.stat().st_mtime
+            owner = int(lock_path.read_text(encoding="utf-8").strip() or 0)
+        except (OSError, ValueError):
+            return True
+
+        if age > LOCK_STALE_AFTER:
+            return True
+        if owner == os.getpid():
+            # Left behind by this process (e.g. a previous run in the same
+            # interpreter); the thread lock already serializes us.
+            return True
+        if owner <= 0 or os.name == "nt":
+            return False
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    @contextmanager
+    def lock(self, repo_url: str, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+        """Hold an exclusive lock on one mirror, across threads and processes."""
+        lock_path = self._lock_path(repo_url)
+        deadline = time.monotonic() + timeout
+
+        with self._thread_lock(repo_url):
+            while True:
+                try:
+                    fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                except FileExistsError:
+                    if self._lock_is_stale(lock_path):
+                        print(
+                            f"WARNING: Removing stale repo cache lock {lock_path}",
+                            file=sys.stderr,
+                        )
+                        lock_path.unlink(missing_ok=True)
+                        continue
+                    if time.monotonic() > deadline:
+                        raise RepoCacheLockTimeout(
+                            f"Timed out waiting for repo cache lock {lock_path}"
+                        )
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    continue
+
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(str(os.getpid()))
+                break
+
+            try:
+                yield
+            finally:
+                lock_path.unlink(missing_ok=True)
+
+    # ------------------------------
+    # Mirror maintenance
+    # ------------------------------
+    def git_env(self, repo_url: str) -> Dict[str, str]:
+        """Environment that points a mirror's ``origin`` remote at ``repo_url``.
+
+        Any git command that may fetch (including lazy blob fetches in a
+        partial mirror) must run with it.
+        """
+        env = dict(os.environ)
+        index = int(env.get("GIT_CONFIG_COUNT", "0") or 0)
+        env["GIT_CONFIG_COUNT"] = str(index + 1)
+        env[f"GIT_CONFIG_KEY_{index}"] = "remote.origin.url"
+        env[f"GIT_CONFIG_VALUE_{index}"] = self._clone_url(repo_url)
+        return env
+
+    def _git(
+        self,
+        args,
+        cwd: Optional[Path] = None,
+        env: Optional[Dict[str, str]] = None,
+        stdin: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        run_git(
+            args,
+            cwd=cwd,
+            env=env,
+            input=stdin.encode("utf-8") if stdin is not None else None,
+            stdout=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+
+    def _fetch(
+        self, repo_url: str, mirror: Path, timeout: Optional[float] = None
+    ) -> None:
+        args = ["--git-dir", str(mirror), "fetch", "--quiet", "--prune", "--force"]
+        if self.partial:
+            self._configure_partial(mirror)
+            args.append(f"--filter={PARTIAL_CLONE_FILTER}")
+        self._git(
+            [*args, "origin", *MIRROR_REFSPECS],
+            env=self.git_env(repo_url),
+            timeout=timeout,
+        )
+
+    def _configure_partial(self, mirror: Path) -> None:
+        for key, value in (
+            ("core.repositoryformatversion", "1"),
+            ("remote.origin.promisor", "true"),
+            ("remote.origin.partialclonefilter", PARTIAL_CLONE_FILTER),
+            ("extensions.partialclone", "origin"),
+        ):
+            self._git(["--git-dir", str(mirror), "config", key, value])
+
+    def prefetch_blobs(
+        self,
+        repo_url: str,
+        mirror: Path,
+        shas: Iterable[str],
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Fetch missing blobs of a partial mirror in a single round trip."""
+        wanted: List[str] = list(dict.fromkeys(shas))
+        if not wanted:
+            return
+        self._git(
+            [
+                "-c",
+                "fetch.negotiationAlgorithm=noop",
+                "--git-dir",
+                str(mirror),
+                "fetch",
+                "--quiet",
+                "--no-tags",
+                "--no-write-fetch-head",
+                "--recurse-submodules=no",
+                f"--filter={PARTIAL_CLONE_FILTER}",
+                "--stdin",
+                "origin",
+            ],
+            env=self.git_env(repo_url),
+            stdin="".join(f"{sha}\n" for sha in wanted),
+            timeout=timeout,
+        )
+
+    def remote_tags(
+        self, repo_url: str, timeout: Optional[float] = None
+    ) -> Dict[str, str]:
+        """Map each tag on the remote to the commit it points at, without fetching."""
+        result = run_git(
+            ["ls-remote", "--tags", "origin"],
+            cwd=self.root,
+            env=self.git_env(repo_url),
+            stdout=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+        )
+        tags: Dict[str, str] = {}
+        for line in result.stdout.splitlines():
+            sha, _, ref = line.partition("\t")
+            if not ref.startswith("refs/tags/"):
+                continue
+            tag = ref[len("refs/tags/") :]
+            if tag.endswith("^{}"):
+                # Peeled annotated tag: the commit wins over the tag object.
+                tags[tag[: -len("^{}")]] = sha
+            else:
+                tags.setdefault(tag, sha)
+        return tags
+
+    def _is_valid_mirror(self, mirror: Path) -> bool:
+        if not (mirror / "HEAD").is_file() or not (mirror / "objects").is_dir():
+            return False
+        result = subprocess.run(
+            ["git", "--git-dir", str(mirror), "rev-parse", "--is-bare-repository"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        return result.returncode == 0 and result.stdout.strip() == "true"
+
+    def _is_partial(self, mirror: Path) -> bool:
+        result = subprocess.run(
+            ["git", "--git-dir", str(mirror), "config", "extensions.partialclone"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+    def _is_intact(self, mirror: Path) -> bool:
+        result = subprocess.run(
+            ["git", "--git-dir", str(mirror), "fsck", "--connectivity-only"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+    def _clear_git_lock_files(self, mirror: Path) -> None:
+        # git leaves *.lock files behind when killed mid-fetch; we hold the
+        # mirror lock, so nothing else can legitimately own them.
+        for lock_file in mirror.rglob("*.lock"):
+            lock_file.unlink(missing_ok=True)
+
+    def _remove_abandoned_staging(self) -> None:
+        # Staging dirs are normally removed by _create_mirror; only a killed
+        # process leaves one behind, so anything old enough is safe to drop.
+        for staging in self.root.glob(".*.incoming-*"):
+            try:
+                age = time.time() - staging.stat().st_mtime
+            except OSError:
+                continue
+            if age > LOCK_STALE_AFTER:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def _create_mirror(
+        self, repo_url: str, mirror: Path, timeout: Optional[float] = None
+    ) -> None:
+        # Build the mirror next to its final location and rename it into place,
+        # so an interrupted first fetch never leaves a half-populated mirror.
+        staging = Path(
+            tempfile.mkdtemp(dir=self.root, prefix=f".{mirror.name}.incoming-")
+        )
+        try:
+            self._git(["init", "--quiet", "--bare", str(staging)])
+            self._git(["--git-dir", str(staging), "config", "terragenai.url", repo_url])
+            self._fetch(repo_url, staging, timeout)
+            os.replace(staging, mirror)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def update(self, repo_url: str, timeout: Optional[float] = None) -> Path:
+        """Create or refresh the mirror for ``repo_url``. Caller holds the lock."""
+        mirror = self.mirror_path(repo_url)
+
+        if mirror.exists() and not self._is_valid_mirror(mirror):
+            print(
+                f"WARNING: Repo cache for {repo_url} is corrupt, re-cloning",
+                file=sys.stderr,
+            )
+            shutil.rmtree(mirror, ignore_errors=True)
+        elif mirror.exists() and not self.partial and self._is_partial(mirror):
+            # Left by a blobless sync from before partial mirrors had their
+            # own path; checkouts from it would come out empty.
+            print(
+                f"WARNING: Repo cache for {repo_url} is blobless, re-cloning",
+                file=sys.stderr,
+            )
+            shutil.rmtree(mirror, ignore_errors=True)
+
+        if not mirror.exists():
+            self._create_mirror(repo_url, mirror, timeout)
+            return mirror
+
+        try:
+            self._fetch(repo_url, mirror, timeout)
+        except subprocess.CalledProcessError:
+            self._clear_git_lock_files(mirror)
+            try:
+                self._fetch(repo_url, mirror, timeout)
+            except subprocess.CalledProcessError:
+                if self._is_intact(mirror):
+                    # The mirror is fine, the remote is not; keep the cache.
+                    raise
+                print(
+                    f"WARNING: Repo cache for {repo_url} is corrupt, re-cloning",
+                    file=sys.stderr,
+                )
+                shutil.rmtree(mirror, ignore_errors=True)
+                self._create_mirror(repo_url, mirror, timeout)
+        return mirror
+
+    def checkout(
+        self, repo_url: str, clone_dir: Path, timeout: Optional[float] = None
+    ) -> None:
+        """Refresh the mirror and make a local working clone of it at ``clone_dir``."""
+        with self.lock(repo_url):
+            mirror = self.update(repo_url, timeout)
+            self._git(
+                [
+                    "clone",
+                    "--quiet",
+                    "--local",
+                    "--no-checkout",
+                    str(mirror),
+                    str(clone_dir),
+                ],
+                timeout=timeout,
+            )
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple
+
+# Bump when the record layout changes; older journals are then not resumed.
+JOURNAL_FORMAT = 2
+
+
+class SyncJournal:
+    """Append-only log of the catalog entries a sync has finished.
+
+    Every line is one JSON record. The first line records the settings the
+    sync ran with, so a resumed sync never mixes in entries built with other
+    options. Entries are looked up by byte offset, which lets the catalog be
+    written from the journal one repo at a time. Records are keyed by module
+    as well as repo, since several registry modules may share one repo.
+    """
+
+    def __init__(self, path: Path, fingerprint: str, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # (repo url, module) -> tag -> offset of its latest record
+        self._offsets: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+        self.resumed = resume and self._replay(fingerprint)
+        if not self.resumed:
+            self._offsets = {}
+            header = {"journal": JOURNAL_FORMAT, "fingerprint": fingerprint}
+            with open(self.path, "wb") as f:
+                f.write((json.dumps(header) + "\n").encode("utf-8"))
+        self._writer = open(self.path, "ab")
+        self._reader = open(self.path, "rb")
+
+    def _replay(self, fingerprint: str) -> bool:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+
+        with f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return False
+            if not isinstance(header, dict) or header != {
+                "journal": JOURNAL_FORMAT,
+                "fingerprint": fingerprint,
+            }:
+                return False
+
+            good_end = f.tell()
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # EOF, or a record torn by the crash we are resuming from.
+                    break
+                try:
+                    record = json.loads(line)
+                    key = (record["repo"], record["module"])
+                    tag = record["tag"]
+                except (ValueError, KeyError, TypeError):
+                    break
+                self._offsets.setdefault(key, {})[tag] = offset
+                good_end = f.tell()
+
+        os.truncate(self.path, good_end)
+        return True
+
+    def append(
+        self, repo_url: str, module: str, tag: str, entry: Dict[str, Any]
+    ) -> None:
+        record = {"repo": repo_url, "module": module, "tag": tag, "entry": entry}
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._writer.tell()
+            self._writer.write(line)
+            self._writer.flush()
+            self._offsets.setdefault((repo_url, module), {})[tag] = offset
+
+    def tags(self, repo_url: str, module: str) -> Set[str]:
+        with self._lock:
+            return set(self._offsets.get((repo_url, module), {}))
+
+    def read(self, repo_url: str, module: str, tag: str) -> Dict[str, Any]:
+        with self._lock:
+            self._reader.seek(self._offsets[(repo_url, module)][tag])
+            line = self._reader.readline()
+        return json.loads(line)["entry"]
+
+    def close(self) -> None:
+        self._writer.close()
+        self._reader.close()
+
+    def remove(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
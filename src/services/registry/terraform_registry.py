@@ -1,27 +1,79 @@
+import fnmatch
+import hashlib
+import itertools
 import json
+import multiprocessing
 import os
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
-from dataclasses import asdict, dataclass
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import hcl2
 import requests
 
 from ...models.module_registry import ModuleRegistry
-from ...paths import get_config_dir
+from ...paths import atomic_replace, get_config_dir
+from .catalog_files import pack_file_lists, unpack_file_lists
+from .git_objects import (
+    SYMLINK_MODE,
+    MissingObjectsError,
+    list_tree,
+    missing_objects,
+    read_blobs,
+)
+from .git_process import run_git
+from .http_cache import ResponseCache
+from .http_client import RegistryHttpClient, sized_session
+from .module_archive import ModuleArchiveError, archive_source, read_archive
+from .parse_cache import (
+    DEFAULT_PARSE_CACHE_MAX_BYTES,
+    ParseCache,
+    git_blob_sha,
+)
+from .repo_cache import RepoCache, RepoCacheLockTimeout
+from .sync_journal import SyncJournal
+from .tf_parser import TerraformVariableMetadata, parse_blob_batch
 
+DEFAULT_SYNC_CONCURRENCY = 4
+DEFAULT_PARSE_CHUNK_SIZE = 64
+METADATA_SOURCES = ("api", "archive", "git")
+SYNC_ORDERS = ("listing", "recent")
+DEFAULT_PUBLISH_INTERVAL = 60.0
+DEFAULT_GIT_TIMEOUT = 10 * 60
+# A repo whose fetch ran out of time is retried once with this much longer a
+# timeout, which then applies to all its git commands for the rest of the run.
+LARGE_REPO_TIMEOUT_FACTOR = 4
 
-@dataclass(frozen=True)
-class TerraformVariableMetadata:
-    name: str
-    type: Any
-    description: Any
-    default: Any
-    required: bool
+T = TypeVar("T")
+
+_SEMVER_RE = re.compile(
+    r"^v?(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
 
 
 @dataclass(frozen=True)
@@ -34,6 +86,122 @@ class CatalogEntry:
     files: List[str]
     vcs_available: bool
     vcs_link: str
+    commit_sha: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SyncOptions:
+    # Size of each worker pool (clone and checkout/parse) used by build_catalog.
+    concurrency: int = DEFAULT_SYNC_CONCURRENCY
+    # Reuse entries from the existing catalog for tags whose commit is unchanged.
+    incremental: bool = False
+    # Read .tf blobs straight from the git object database instead of checking
+    # out each tag; tags of one repo can then be parsed in parallel.
+    checkout_free: bool = False
+    # Keep blobless mirrors and only download the .tf files that get parsed.
+    # Implies checkout_free, since a partial mirror has no files to check out.
+    partial_clone: bool = False
+    # Glob rules deciding which .tf files are parsed. A rule matches a file's
+    # repo-relative path, or any directory on that path by name, so
+    # "examples" skips every examples/ directory. Empty include means all.
+    include_paths: Tuple[str, ...] = ()
+    exclude_paths: Tuple[str, ...] = ()
+    # Where variable metadata comes from, in order of preference. "api" asks
+    # the registry's module-version endpoint; "archive" downloads the version's
+    # registry-hosted archive and parses its .tf files in memory; "git" clones
+    # and parses HCL and only handles the versions earlier sources had no data
+    # for.
+    metadata_sources: Tuple[str, ...] = ("git",)
+    # Size bound of the on-disk parse cache shared by all orgs; 0 disables it.
+    parse_cache_max_bytes: int = DEFAULT_PARSE_CACHE_MAX_BYTES
+    # Worker processes parsing HCL, which is CPU-bound and gains nothing from
+    # threads. None uses one per CPU; 0 parses serially in the sync threads.
+    parse_processes: Optional[int] = None
+    # Most .tf files of one tag sent to a parse worker in a single batch.
+    parse_chunk_size: int = DEFAULT_PARSE_CHUNK_SIZE
+    # Rebuild the catalog even if the registry listing is unchanged.
+    force: bool = False
+    # Continue an interrupted sync from its journal instead of starting over.
+    resume: bool = False
+    # Seconds each git command may run before it is killed; None waits forever.
+    git_timeout: Optional[float] = DEFAULT_GIT_TIMEOUT
+    # Order modules are synced in: "listing" starts on each one as soon as its
+    # listing page arrives; "recent" waits for the full listing and starts
+    # with the most recently updated modules.
+    order: str = "listing"
+    # Glob patterns matched against "namespace/name/provider" or the module
+    # name. Matching modules are synced first, in pattern order.
+    priority_modules: Tuple[str, ...] = ()
+    # Seconds between partial catalogs written while a sync runs, so chat can
+    # start on the modules finished so far; 0 only writes the final catalog.
+    publish_interval: float = DEFAULT_PUBLISH_INTERVAL
+    # Which modules are synced at all. Namespaces and providers must match
+    # exactly; module rules are globs like priority_modules. Empty means all.
+    namespaces: Tuple[str, ...] = ()
+    providers: Tuple[str, ...] = ()
+    include_modules: Tuple[str, ...] = ()
+    exclude_modules: Tuple[str, ...] = ()
+    # Only sync the newest N versions of each module, in semver order.
+    max_versions: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ModuleJob:
+    name: str
+    namespace: str
+    provider: str
+    repo_url: str
+    versions: List[Dict[str, Any]]
+    # Entries from the previous catalog for this repo, keyed by tag.
+    previous: Dict[str, Dict[str, Any]]
+    # False for modules published without a VCS connection; ``repo_url`` is
+    # then their registry source and only registry metadata sources apply.
+    vcs_available: bool = True
+
+
+@dataclass(frozen=True)
+class RepoPlan:
+    job: ModuleJob
+    # Tags whose commit is new or moved since the previous catalog; only these
+    # are fetched and parsed.
+    changed_tags: List[str]
+    # False when the remote could not be listed, so every tag is re-synced.
+    checked: bool = True
+
+
+def _clone_url_with_token(repo_url: str, token: str) -> str:
+    if token:
+        repo_url = repo_url.replace("https://", f"https://{token}@")
+        repo_url = repo_url.replace("http://", f"http://{token}@")
+    return repo_url
+
+
+class _CloneLease:
+    """Shared ownership of one temporary clone across its parse tasks.
+
+    The clone directory is removed, and its pipeline slot freed, once every
+    task holding the lease has released it.
+    """
+
+    def __init__(
+        self,
+        repo_tmp_dir: Optional[Path],
+        slots: threading.BoundedSemaphore,
+        holders: int,
+    ):
+        self.repo_tmp_dir = repo_tmp_dir
+        self._slots = slots
+        self._holders = holders
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            self._holders -= 1
+            if self._holders > 0:
+                return
+        if self.repo_tmp_dir:
+            shutil.rmtree(self.repo_tmp_dir, ignore_errors=True)
+        self._slots.release()
 
 
 class ModuleRegistryService:
@@ -42,116 +210,645 @@ class ModuleRegistryService:
         registry: Optional[ModuleRegistry] = None,
         config_dir: Optional[Path] = None,
         session: Optional[requests.Session] = None,
+        options: Optional[SyncOptions] = None,
+        http: Optional[RegistryHttpClient] = None,
+        repo_cache: Optional[RepoCache] = None,
+        parse_cache: Optional[ParseCache] = None,
     ):
+        """``http``, ``repo_cache`` and ``parse_cache`` may be shared between
+        the services of several orgs; see ``org_services``."""
         self.registry = registry or ModuleRegistry()
-        self.session = session or requests.Session()
+        self.options = options or SyncOptions()
+        self.session = session or sized_session(max(1, self.options.concurrency))
+        self.http = http or RegistryHttpClient(self.session, self.registry.TF_HEADERS)
 
         config_root = Path(config_dir) if config_dir else Path(get_config_dir())
         base_dir = config_root / self.registry.TF_ORG
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        self.repo_dir = str(base_dir / "registry-repos")
+        self.repo_dir = str(
+            repo_cache.root if repo_cache else base_dir / "registry-repos"
+        )
         self.catalog_dir = str(base_dir / "catalog")
         self.catalog_path = str(Path(self.catalog_dir) / "modules.json")
+        self.journal_path = Path(self.catalog_dir) / "modules.journal"
+        # The sync settings the catalog's entries were built with.
+        self.catalog_meta_path = Path(self.catalog_dir) / "modules.meta.json"
 
         Path(self.repo_dir).mkdir(parents=True, exist_ok=True)
+        self.repo_cache = repo_cache or RepoCache(
+            Path(self.repo_dir), self._clone_url, partial=self.options.partial_clone
+        )
+        # Keyed by file content alone, so one cache serves every org.
+        self.parse_cache: Optional[ParseCache] = parse_cache
+        if parse_cache is None and self.options.parse_cache_max_bytes > 0:
+            self.parse_cache = ParseCache(
+                config_root / "parse-cache", self.options.parse_cache_max_bytes
+            )
+        # Only set while build_catalog runs; parsing is serial otherwise.
+        self._parse_executor: Optional[ProcessPoolExecutor] = None
+        self.listing_cache = ResponseCache(base_dir / "http-cache")
+        # Set when a sync skipped something it should retry next time.
+        self._sync_incomplete = threading.Event()
+        # Only open while build_catalog runs.
+        self._journal: Optional[SyncJournal] = None
+        # When build_catalog next writes a partial catalog (time.monotonic).
+        self._next_publish = 0.0
+        # Repos that needed the longer git timeout, and what timed out anyway.
+        self._large_repos: Set[str] = set()
+        self._timed_out: List[str] = []
+        self._timeouts_lock = threading.Lock()
 
     # ------------------------------
     # Module Registry helpers
     # ------------------------------
     def _http_get(self, url: str) -> Dict[str, Any]:
-        last_error: Optional[requests.RequestException] = None
-        for _ in range(3):
+        return self.http.get_json(url)
+
+    def _fetch_registry_variables(
+        self, job: ModuleJob, version: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Root module inputs for one version, or None if the registry has none."""
+        number = version.get("version")
+        if not number:
+            return None
+
+        url = (
+            f"{self.registry.TF_REGISTRY_API_URL}/"
+            f"{job.namespace}/{job.name}/{job.provider}/{number}"
+        )
+        try:
+            data = self._http_get(url)
+        except requests.RequestException:
+            return None
+
+        inputs = (data.get("root") or {}).get("inputs")
+        if inputs is None:
+            return None
+        return [asdict(self._registry_input_to_variable(i)) for i in inputs]
+
+    def _fetch_archive_entry(
+        self, job: ModuleJob, version: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Catalog entry from the version's registry archive, or None if none.
+
+        The registry's download endpoint names the archive in X-Terraform-Get.
+        Only .tf files are read, straight from the downloaded bytes.
+        """
+        number = version.get("version")
+        tag = self._normalize_tag(number)
+        if not tag:
+            return None
+
+        download_url = (
+            f"{self.registry.TF_REGISTRY_API_URL}/"
+            f"{job.namespace}/{job.name}/{job.provider}/{number}/download"
+        )
+        try:
+            resp = self.http.get_response(download_url)
+            source = archive_source(resp.url, resp.headers.get("X-Terraform-Get"))
+            if source is None:
+                return None
+            # Signed archive URLs on other hosts must not see the API token.
+            same_host = urlsplit(source.url).netloc == urlsplit(download_url).netloc
+            data = self.http.get_response(
+                source.url, headers=None if same_host else {}
+            ).content
+        except requests.RequestException:
+            return None
+
+        try:
+            files, sources = read_archive(data, source, self._is_tf_path_selected)
+        except ModuleArchiveError as exc:
+            print(
+                f"WARNING: Unreadable archive for {job.name} {number}: {exc}",
+                file=sys.stderr,
+            )
+            return None
+
+        return self._build_catalog_entry(
+            module_name=job.name,
+            namespace=job.namespace,
+            provider=job.provider,
+            repo_url=job.repo_url,
+            tag=tag,
+            variables=self._parse_tf_sources(sources),
+            files=files,
+            vcs_available=job.vcs_available,
+        )
+
+    def _fetch_remote_entry(
+        self, job: ModuleJob, version: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Entry from the first non-git metadata source that has the version."""
+        tag = self._normalize_tag(version.get("version"))
+        if not tag:
+            return None
+        for source in self.options.metadata_sources:
+            if source == "api":
+                variables = self._fetch_registry_variables(job, version)
+                if variables is not None:
+                    return self._build_catalog_entry(
+                        module_name=job.name,
+                        namespace=job.namespace,
+                        provider=job.provider,
+                        repo_url=job.repo_url,
+                        tag=tag,
+                        variables=variables,
+                        files=[],
+                        vcs_available=job.vcs_available,
+                    )
+            elif source == "archive":
+                entry = self._fetch_archive_entry(job, version)
+                if entry is not None:
+                    return entry
+        return None
+
+    def _registry_input_to_variable(
+        self, registry_input: Dict[str, Any]
+    ) -> TerraformVariableMetadata:
+        # Shape values the way hcl2 does, so entries look the same whichever
+        # source produced them: types as "${...}" and defaults as decoded values.
+        var_type = registry_input.get("type")
+        default = registry_input.get("default")
+        required = registry_input.get("required", default in (None, ""))
+        if required:
+            default = None
+        elif isinstance(default, str):
             try:
-                resp = self.session.get(
-                    url, headers=self.registry.TF_HEADERS, timeout=30
-                )
-                resp.raise_for_status()
-                return resp.json()
-            except requests.RequestException as exc:
-                last_error = exc
-        if last_error:
-            raise last_error
-        raise RuntimeError("Request failed without an exception")
+                default = json.loads(default)
+            except ValueError:
+                pass
+
+        return TerraformVariableMetadata(
+            name=registry_input.get("name"),
+            type=f"${{{var_type}}}" if var_type else None,
+            description=registry_input.get("description"),
+            default=default,
+            required=bool(required),
+        )
 
     def _list_registry_modules(self) -> List[Dict[str, Any]]:
+        workers = max(1, self.options.concurrency)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="terragenai-http"
+        ) as pool:
+            return list(self._iter_registry_modules(pool))
+
+    def _get_listing_page(self, url: str) -> Tuple[Dict[str, Any], bool]:
+        """One listing page, and whether it changed since the last full sync."""
+        cached = None if self.options.force else self.listing_cache.get(url)
+        response, modified = self.http.get_conditional(url, cached)
+        if modified and response.has_validators:
+            self.listing_cache.stage(url, response)
+        return response.body, modified
+
+    def _iter_listing_pages(
+        self, pool: ThreadPoolExecutor
+    ) -> Iterator[Tuple[Dict[str, Any], bool]]:
+        """Yield ``(page, modified)`` for the org's listing pages, in order.
+
+        The first page reports ``meta.pagination.total-pages``; every later page
+        is then requested at once on ``pool`` (whose size bounds the fan-out)
+        while earlier pages are consumed. Without pagination metadata the
+        ``links.next`` chain is followed one page at a time.
+        """
+        url = self._listing_url()
+        data, modified = self._get_listing_page(url)
+        pagination = (data.get("meta") or {}).get("pagination") or {}
+        total_pages = pagination.get("total-pages")
+
+        if not isinstance(total_pages, int):
+            while True:
+                yield data, modified
+                url = (data.get("links") or {}).get("next")
+                if not url:
+                    return
+                data, modified = self._get_listing_page(url)
+
+        template = (data.get("links") or {}).get("next") or url
+        first_page = pagination.get("current-page") or 1
+        futures = [
+            pool.submit(
+                self._get_listing_page,
+                self._page_url(template, number, pagination.get("page-size")),
+            )
+            for number in range(first_page + 1, total_pages + 1)
+        ]
+        try:
+            yield data, modified
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _iter_registry_modules(
+        self,
+        pool: ThreadPoolExecutor,
+        pages: Optional[Iterable[Tuple[Dict[str, Any], bool]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the org's registry modules in listing order as pages arrive."""
+        seen: Set[str] = set()
+        for data, _ in pages if pages is not None else self._iter_listing_pages(pool):
+            for mod in data.get("data", []):
+                # A module published mid-listing shifts later pages by one, so
+                # the same module can show up on two of them.
+                module_id = mod.get("id")
+                if module_id is not None:
+                    if module_id in seen:
+                        continue
+                    seen.add(module_id)
+                yield mod
+
+    def _prioritized(
+        self, modules: Iterable[Dict[str, Any]]
+    ) -> Iterable[Dict[str, Any]]:
+        """Put modules in sync order; listing order keeps them streaming."""
+        patterns = self.options.priority_modules
+        recent = self.options.order == "recent"
+        if not recent and not patterns:
+            return modules
+
+        def rank(mod: Dict[str, Any]) -> Tuple[int, float]:
+            attrs = mod.get("attributes", {})
+            priority = next(
+                (
+                    i
+                    for i, pattern in enumerate(patterns)
+                    if self._module_matches(attrs, pattern)
+                ),
+                len(patterns),
+            )
+            if not recent:
+                return priority, 0.0
+            return priority, -self._updated_at(attrs.get("updated-at"))
+
+        # sorted() is stable, so ties keep their listing order.
+        return sorted(modules, key=rank)
+
+    def _module_matches(self, attrs: Dict[str, Any], pattern: str) -> bool:
+        name = str(attrs.get("name"))
+        full_name = f"{attrs.get('namespace')}/{name}/{attrs.get('provider')}"
+        return fnmatch.fnmatchcase(full_name, pattern) or fnmatch.fnmatchcase(
+            name, pattern
+        )
+
+    def _is_module_selected(self, attrs: Dict[str, Any]) -> bool:
+        options = self.options
+        if options.namespaces and attrs.get("namespace") not in options.namespaces:
+            return False
+        if options.providers and attrs.get("provider") not in options.providers:
+            return False
+        if options.include_modules and not any(
+            self._module_matches(attrs, rule) for rule in options.include_modules
+        ):
+            return False
+        return not any(
+            self._module_matches(attrs, rule) for rule in options.exclude_modules
+        )
+
+    def _version_key(self, version: Any) -> Tuple[Any, ...]:
+        """Semver precedence; anything that is not semver sorts oldest."""
+        match = _SEMVER_RE.match(str(version or ""))
+        if not match:
+            return (0,)
+        major, minor, patch, pre = match.groups()
+        if pre is None:
+            # A release outranks all of its pre-releases.
+            pre_key: Tuple[Any, ...] = (1,)
+        else:
+            pre_key = (
+                0,
+                tuple(
+                    (0, int(part), "") if part.isdigit() else (1, 0, part)
+                    for part in pre.split(".")
+                ),
+            )
+        return (1, int(major), int(minor), int(patch), pre_key)
+
+    def _latest_versions(self, versions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The newest ``max_versions`` of ``versions``, kept in listing order."""
+        limit = self.options.max_versions
+        if limit is None or len(versions) <= limit:
+            return versions
+        newest = sorted(
+            range(len(versions)),
+            key=lambda i: self._version_key(versions[i].get("version")),
+            reverse=True,
+        )
+        keep = set(newest[:limit])
+        return [version for i, version in enumerate(versions) if i in keep]
+
+    def _listing_url(self) -> str:
         url = self.registry.TF_REGISTRY_MODULES_URL
-        modules: List[Dict[str, Any]] = []
+        if len(self.options.providers) != 1:
+            return url
+        # The API filters on a single provider; anything else is filtered
+        # client-side in _module_job.
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        query.append(("filter[provider]", self.options.providers[0]))
+        return urlunsplit(parts._replace(query=urlencode(query)))
 
-        while url:
-            data = self._http_get(url)
-            modules.extend(data.get("data", []))
-            url = data.get("links", {}).get("next")
+    def _updated_at(self, value: Any) -> float:
+        try:
+            when = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return float("-inf")
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return when.timestamp()
 
-        return modules
+    def _page_url(self, template: str, number: int, size: Optional[int]) -> str:
+        parts = urlsplit(template)
+        query = [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key not in ("page[number]", "page[size]")
+        ]
+        query.append(("page[number]", str(number)))
+        if size:
+            query.append(("page[size]", str(size)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
 
     # ------------------------------
     # Git helpers
     # ------------------------------
     def _clone_url(self, repo_url: str) -> str:
-        if self.registry.GIT_CLONE_TOKEN:
-            repo_url = repo_url.replace(
-                "https://", f"https://{self.registry.GIT_CLONE_TOKEN}@"
-            )
-            repo_url = repo_url.replace(
-                "http://", f"http://{self.registry.GIT_CLONE_TOKEN}@"
-            )
-        return repo_url
+        return _clone_url_with_token(repo_url, self.registry.GIT_CLONE_TOKEN)
+
+    def _git_timeout(self, repo_url: Optional[str] = None) -> Optional[float]:
+        timeout = self.options.git_timeout
+        with self._timeouts_lock:
+            if timeout and repo_url in self._large_repos:
+                return timeout * LARGE_REPO_TIMEOUT_FACTOR
+        return timeout
+
+    def _with_git_timeout(
+        self, repo_url: str, operation: Callable[[Optional[float]], T]
+    ) -> T:
+        """Run ``operation(timeout)``, retrying once with a longer timeout.
+
+        Only the first timeout of a repo is retried; from then on it counts
+        as large and gets the longer timeout straight away.
+        """
+        timeout = self._git_timeout(repo_url)
+        try:
+            return operation(timeout)
+        except subprocess.TimeoutExpired:
+            with self._timeouts_lock:
+                if timeout != self.options.git_timeout:
+                    raise
+                self._large_repos.add(repo_url)
+        timeout = self._git_timeout(repo_url)
+        print(
+            f"WARNING: git timed out for {repo_url}, retrying with a {timeout:.0f}s "
+            "timeout",
+            file=sys.stderr,
+        )
+        return operation(timeout)
+
+    def _record_timeout(self, job: ModuleJob, exc: subprocess.TimeoutExpired) -> None:
+        print(f"ERROR: {exc} ({job.repo_url})", file=sys.stderr)
+        self._sync_incomplete.set()
+        with self._timeouts_lock:
+            self._timed_out.append(f"{job.namespace}/{job.name}/{job.provider}")
 
     def _git_clone_repo(self, repo_url: str, clone_dir: Path):
-        subprocess.run(
-            ["git", "clone", "--quiet", self._clone_url(repo_url), str(clone_dir)],
-            check=True,
+        # Only new refs are fetched into the persistent mirror; the working
+        # clone itself is a local, hard-linked copy of it.
+        def clone(timeout: Optional[float]) -> None:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            self.repo_cache.checkout(repo_url, clone_dir, timeout)
+
+        self._with_git_timeout(repo_url, clone)
+
+    def _git_fetch_mirror(self, repo_url: str) -> Path:
+        def fetch(timeout: Optional[float]) -> Path:
+            with self.repo_cache.lock(repo_url):
+                return self.repo_cache.update(repo_url, timeout)
+
+        return self._with_git_timeout(repo_url, fetch)
+
+    def _git_checkout_tag(
+        self, repo_dir: Path, tag: str, repo_url: Optional[str] = None
+    ):
+        run_git(
+            ["checkout", "--quiet", tag],
+            cwd=repo_dir,
+            timeout=self._git_timeout(repo_url),
         )
 
-    def _git_checkout_tag(self, repo_dir: Path, tag: str):
-        subprocess.run(
-            ["git", "checkout", "--quiet", tag], cwd=str(repo_dir), check=True
+    def _git_resolve_tag(
+        self, repo_dir: Path, tag: str, repo_url: Optional[str] = None
+    ) -> str:
+        result = run_git(
+            ["rev-parse", "--verify", "--quiet", f"{tag}^{{commit}}"],
+            cwd=repo_dir,
+            stdout=subprocess.PIPE,
+            text=True,
+            timeout=self._git_timeout(repo_url),
         )
+        return result.stdout.strip()
 
     # ------------------------------
     # Terraform parsing
     # ------------------------------
     def _parse_tf_variables(self, repo_dir: Path) -> List[Dict[str, Any]]:
-        variables: List[TerraformVariableMetadata] = []
+        return self._parse_tf_sources(self._read_tf_files(repo_dir))
+
+    def _matches_path_rule(self, rel_path: str, rule: str) -> bool:
+        rule = rule.strip("/")
+        if fnmatch.fnmatchcase(rel_path, rule) or fnmatch.fnmatchcase(
+            rel_path, f"{rule}/*"
+        ):
+            return True
+        return any(fnmatch.fnmatchcase(part, rule) for part in rel_path.split("/")[:-1])
+
+    def _is_tf_path_selected(self, rel_path: str) -> bool:
+        if not rel_path.endswith(".tf"):
+            return False
+        include = self.options.include_paths
+        if include and not any(self._matches_path_rule(rel_path, r) for r in include):
+            return False
+        return not any(
+            self._matches_path_rule(rel_path, r) for r in self.options.exclude_paths
+        )
+
+    def _read_tf_files(self, repo_dir: Path) -> Iterator[Tuple[str, bytes]]:
+        """Selected .tf files in repo-relative path order.
 
-        for root, _, files in os.walk(repo_dir):
+        That is the order ``git ls-tree`` lists them in, so when two files
+        declare the same variable both parse paths keep the same one.
+        """
+        selected: List[Tuple[str, str]] = []
+        for root, dirnames, files in os.walk(repo_dir):
+            rel_root = Path(root).relative_to(repo_dir).as_posix()
+            # Prune excluded directories instead of walking into them.
+            dirnames[:] = [
+                d
+                for d in dirnames
+                if not any(
+                    self._matches_path_rule(
+                        f"{d}/" if rel_root == "." else f"{rel_root}/{d}/", r
+                    )
+                    for r in self.options.exclude_paths
+                )
+            ]
             for file in files:
-                if not file.endswith(".tf"):
-                    continue
-
-                path = os.path.join(root, file)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        parsed = hcl2.load(f)
-                except Exception:
-                    continue
-
-                for block in parsed.get("variable", []):
-                    for name, attrs in block.items():
-                        variables.append(
-                            TerraformVariableMetadata(
-                                name=name,
-                                type=attrs.get("type"),
-                                description=attrs.get("description"),
-                                default=attrs.get("default"),
-                                required="default" not in attrs,
-                            )
-                        )
+                rel_path = file if rel_root == "." else f"{rel_root}/{file}"
+                if self._is_tf_path_selected(rel_path):
+                    selected.append((rel_path, os.path.join(root, file)))
+
+        for _, path in sorted(selected):
+            try:
+                with open(path, "rb") as f:
+                    yield path, f.read()
+            except OSError:
+                continue
 
+    def _parse_tf_sources(
+        self, sources: Iterable[Tuple[str, bytes]]
+    ) -> List[Dict[str, Any]]:
+        files = [(git_blob_sha(data), data) for _, data in sources]
+        per_file = self._cached_variables(sha for sha, _ in files)
+        per_file.update(
+            self._parse_blobs({sha: data for sha, data in files if sha not in per_file})
+        )
+        return self._merge_variables(per_file[sha] for sha, _ in files)
+
+    def _cached_variables(
+        self, blob_shas: Iterable[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        if self.parse_cache is None:
+            return found
+        for blob_sha in blob_shas:
+            cached = self.parse_cache.get(blob_sha)
+            if cached is not None:
+                found[blob_sha] = cached
+        return found
+
+    def _parse_blobs(self, blobs: Dict[str, bytes]) -> Dict[str, List[Dict[str, Any]]]:
+        """Parse blobs keyed by SHA, in worker processes when a pool is running.
+
+        The blobs of one tag are sent in chunks of ``parse_chunk_size`` so IPC
+        overhead stays per batch rather than per file.
+        """
+        items = list(blobs.items())
+        executor = self._parse_executor
+        parsed: Dict[str, List[Dict[str, Any]]] = {}
+
+        if executor is None or not items:
+            parsed = parse_blob_batch(items)
+        else:
+            size = max(1, self.options.parse_chunk_size)
+            futures = [
+                executor.submit(parse_blob_batch, items[i : i + size])
+                for i in range(0, len(items), size)
+            ]
+            try:
+                for future in futures:
+                    parsed.update(future.result())
+            except BrokenProcessPool:
+                print(
+                    "WARNING: Parse worker pool died, parsing serially",
+                    file=sys.stderr,
+                )
+                self._parse_executor = None
+                parsed = parse_blob_batch(items)
+
+        if self.parse_cache is not None:
+            for blob_sha, variables in parsed.items():
+                self.parse_cache.put(blob_sha, variables)
+        return parsed
+
+    @contextmanager
+    def _parse_worker_pool(self) -> Iterator[None]:
+        processes = self.options.parse_processes
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes < 1:
+            yield
+            return
+
+        try:
+            # Spawn rather than fork: the sync is already multi-threaded.
+            executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        except (OSError, NotImplementedError) as exc:
+            print(
+                f"WARNING: Parse worker processes unavailable ({exc}), "
+                "parsing serially",
+                file=sys.stderr,
+            )
+            yield
+            return
+
+        self._parse_executor = executor
+        try:
+            yield
+        finally:
+            self._parse_executor = None
+            executor.shutdown(cancel_futures=True)
+
+    def _merge_variables(
+        self, per_file: Iterable[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
         # Deduplicate by name
-        unique = {v.name: v for v in variables}
-        return [asdict(variable) for variable in unique.values()]
-
-    def _list_repo_files(self, repo_dir: Path) -> List[str]:
-        files: List[str] = []
-        for root, dirnames, filenames in os.walk(repo_dir):
-            if ".git" in dirnames:
-                dirnames.remove(".git")
-            for filename in filenames:
-                rel = os.path.relpath(os.path.join(root, filename), repo_dir)
-                files.append(rel)
-        return files
+        unique: Dict[str, Dict[str, Any]] = {}
+        for variables in per_file:
+            for variable in variables:
+                unique[variable["name"]] = variable
+        return list(unique.values())
+
+    def _parse_tag_objects(
+        self, repo_dir: Path, rev: str, repo_url: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Parse variables and list files at ``rev`` without touching the worktree.
+
+        Blobs already in the parse cache are never read. For a partial mirror
+        the remaining blobs that are not local yet are downloaded from
+        ``repo_url`` in one batch before reading.
+        """
+        timeout = self._git_timeout(repo_url)
+        tree = list_tree(repo_dir, rev, timeout=timeout)
+        tf_entries = [
+            entry
+            for entry in tree
+            if self._is_tf_path_selected(entry.path) and entry.mode != SYMLINK_MODE
+        ]
+
+        per_file = self._cached_variables(entry.sha for entry in tf_entries)
+        needed = [entry.sha for entry in tf_entries if entry.sha not in per_file]
+
+        env = None
+        if self.options.partial_clone and repo_url and needed:
+            missing = missing_objects(repo_dir, rev, timeout=timeout)
+            self.repo_cache.prefetch_blobs(
+                repo_url,
+                repo_dir,
+                (sha for sha in needed if sha in missing),
+                timeout=timeout,
+            )
+            env = self.repo_cache.git_env(repo_url)
+        blobs = read_blobs(repo_dir, needed, env=env, timeout=timeout)
+        per_file.update(self._parse_blobs(blobs))
+
+        variables = self._merge_variables(
+            per_file[entry.sha] for entry in tf_entries if entry.sha in per_file
+        )
+        return variables, [entry.path for entry in tree]
+
+    def _list_repo_files(
+        self, repo_dir: Path, rev: str = "HEAD", repo_url: Optional[str] = None
+    ) -> List[str]:
+        """Files in ``rev``'s tree, read from git rather than the worktree."""
+        timeout = self._git_timeout(repo_url)
+        return [entry.path for entry in list_tree(repo_dir, rev, timeout=timeout)]
 
     def _normalize_tag(self, version: Any) -> Optional[str]:
         if not version:
@@ -171,124 +868,762 @@ class ModuleRegistryService:
         tag: str,
         variables: List[Dict[str, Any]],
         files: List[str],
+        commit_sha: Optional[str] = None,
+        vcs_available: bool = True,
     ) -> Dict[str, Any]:
+        if vcs_available:
+            vcs_link = f"{repo_url}/tree/{tag}"
+        else:
+            # The module's page in the registry UI stands in for a VCS link.
+            vcs_link = (
+                f"https://{self.registry.TF_REGISTRY_DOMAIN}/app/"
+                f"{self.registry.TF_ORG}/registry/modules/private/"
+                f"{namespace}/{module_name}/{provider}/{tag.removeprefix('v')}"
+            )
         return asdict(
             CatalogEntry(
                 module_name=module_name,
                 namespace=namespace,
                 provider=provider,
-                source=f"{self.registry.TF_REGISTRY_DOMAIN}/{namespace}/{module_name}/{provider}",
+                source=self._registry_source(namespace, module_name, provider),
                 variables=variables,
                 files=files,
-                vcs_available=True,
-                vcs_link=f"{repo_url}/tree/{tag}",
+                vcs_available=vcs_available,
+                vcs_link=vcs_link,
+                commit_sha=commit_sha,
             )
         )
 
-    def _write_catalog(self, catalog: Dict[str, Any]) -> None:
+    def _registry_source(self, namespace: str, name: str, provider: str) -> str:
+        return f"{self.registry.TF_REGISTRY_DOMAIN}/{namespace}/{name}/{provider}"
+
+    def _load_previous_catalog(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if not self.validate_catalog():
+            return {}
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except (OSError, ValueError) as exc:
+            print(
+                f"WARNING: Ignoring unreadable catalog {self.catalog_path}: {exc}",
+                file=sys.stderr,
+            )
+            return {}
+        if not isinstance(catalog, dict):
+            print(
+                f"WARNING: Ignoring catalog {self.catalog_path}: not a JSON object",
+                file=sys.stderr,
+            )
+            return {}
+        return {
+            repo_url: unpack_file_lists(versions)
+            for repo_url, versions in catalog.items()
+        }
+
+    def _catalog_fingerprint(self) -> Optional[str]:
+        """``_sync_fingerprint`` of the settings the catalog was built with."""
+        try:
+            with open(self.catalog_meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta.get("fingerprint") if isinstance(meta, dict) else None
+
+    def _reusable_catalog(
+        self, catalog: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """``catalog`` if its entries were built with the current settings."""
+        if catalog and self._catalog_fingerprint() != self._sync_fingerprint():
+            print("Sync settings changed since the last sync; reindexing every version")
+            return {}
+        return catalog
+
+    def _write_catalog(
+        self, catalog: Dict[str, Any], fingerprint: Optional[str] = None
+    ) -> None:
+        self._write_catalog_stream(catalog.items(), fingerprint)
+
+    def _write_catalog_stream(
+        self,
+        repos: Iterable[Tuple[str, Dict[str, Any]]],
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        """Write the catalog one repo at a time, then swap it into place.
+
+        The output is identical to ``json.dump(catalog, f, indent=2)``, except
+        that file lists are packed as deltas between a repo's versions.
+        ``fingerprint`` records the settings every entry was built with; a
+        catalog written without one is never reused by an incremental sync.
+        """
         catalog_dir_path = Path(self.catalog_dir)
         catalog_dir_path.mkdir(parents=True, exist_ok=True)
+        # Drop the old record first, so it never describes the new entries.
+        self.catalog_meta_path.unlink(missing_ok=True)
 
-        tmp_path: Optional[Path] = None
-        try:
-            with tempfile.NamedTemporaryFile(
-                "w", dir=catalog_dir_path, delete=False, encoding="utf-8"
-            ) as tmp:
-                json.dump(catalog, tmp, indent=2)
-                tmp_path = Path(tmp.name)
-            os.replace(tmp_path, self.catalog_path)
-        finally:
-            if tmp_path and tmp_path.exists():
-                tmp_path.unlink(missing_ok=True)
+        with atomic_replace(self.catalog_path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as tmp:
+                tmp.write("{")
+                separator = "\n  "
+                for repo_url, entries in repos:
+                    body = json.dumps(pack_file_lists(entries), indent=2).replace(
+                        "\n", "\n  "
+                    )
+                    tmp.write(f"{separator}{json.dumps(repo_url)}: {body}")
+                    separator = ",\n  "
+                tmp.write("}" if separator == "\n  " else "\n}")
+        if fingerprint is not None:
+            with atomic_replace(self.catalog_meta_path) as tmp_path:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"fingerprint": fingerprint}, f)
 
     # ------------------------------
-    # Main catalog builder
+    # Sync pipeline stages
     # ------------------------------
-    def build_catalog(self):
-        catalog: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    def _module_job(
+        self, mod: Dict[str, Any], previous_catalog: Dict[str, Dict[str, Any]]
+    ) -> Optional[ModuleJob]:
+        attrs = mod.get("attributes", {})
+        name = attrs.get("name")
+        namespace = attrs.get("namespace")
+        provider = attrs.get("provider")
+        vcs = attrs.get("vcs-repo")
+        versions = attrs.get("version-statuses", [])
 
-        print(f"Fetching Terraform modules for org: {self.registry.TF_ORG}")
-        modules = self._list_registry_modules()
-        print(f"Found {len(modules)} module(s)")
+        if not name or not namespace or not provider:
+            print(
+                f"WARNING: Skipping module with incomplete metadata: {attrs}",
+                file=sys.stderr,
+            )
+            return None
 
-        for mod in modules:
-            attrs = mod.get("attributes", {})
-            name = attrs.get("name")
-            namespace = attrs.get("namespace")
-            provider = attrs.get("provider")
-            vcs = attrs.get("vcs-repo")
-            versions = attrs.get("version-statuses", [])
+        if not self._is_module_selected(attrs):
+            return None
 
-            if not name or not namespace or not provider:
-                print(
-                    f"WARNING: Skipping module with incomplete metadata: {attrs}",
-                    file=sys.stderr,
-                )
+        repo_url = (vcs or {}).get("repository-http-url")
+        vcs_available = bool(repo_url)
+        if not vcs_available:
+            if all(s == "git" for s in self.options.metadata_sources):
+                reason = "missing repository-http-url" if vcs else "no VCS repo"
+                print(f"WARNING: Skipping {name}: {reason}", file=sys.stderr)
+                return None
+            # Published through the API: only the registry has its metadata,
+            # so the catalog keys it by registry source.
+            repo_url = self._registry_source(namespace, name, provider)
+
+        return ModuleJob(
+            name=name,
+            namespace=namespace,
+            provider=provider,
+            repo_url=repo_url,
+            versions=self._latest_versions(versions),
+            previous=previous_catalog.get(repo_url, {}),
+            vcs_available=vcs_available,
+        )
+
+    def _collect_registry_results(
+        self,
+        job: ModuleJob,
+        registry_results: List[Tuple[Dict[str, Any], Future]],
+    ) -> Tuple[Dict[str, Dict[str, Any]], ModuleJob]:
+        """Gather entries from the registry sources; return what is still missing."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        remaining: List[Dict[str, Any]] = []
+
+        for version, future in registry_results:
+            tag = self._normalize_tag(version.get("version"))
+            entry = future.result()
+            if not tag or entry is None:
+                remaining.append(version)
                 continue
 
-            if not vcs:
-                print(f"WARNING: Skipping {name}: no VCS repo", file=sys.stderr)
+            entries[tag] = entry
+            print(f"  Fetched {tag}")
+
+        return entries, replace(job, versions=remaining)
+
+    def _clone_stage(
+        self,
+        job: ModuleJob,
+        parse_pool: ThreadPoolExecutor,
+        slots: threading.BoundedSemaphore,
+        registry_results: Optional[List[Tuple[Dict[str, Any], Future]]] = None,
+    ) -> List[Future]:
+        """Clone the module repo and hand it over to the parse pool.
+
+        ``slots`` bounds how many clones may sit on disk waiting to be parsed.
+        Checkouts mutate the worktree, so they get one task per repo; when
+        reading git objects every tag becomes its own task. Versions already
+        answered by the registry API or archives (``registry_results``) are not
+        cloned. Entries go straight to the journal; the returned futures only
+        tell when parsing is done.
+        """
+        print(f"Processing {job.namespace}/{job.name}/{job.provider}")
+
+        results: List[Future] = []
+        if registry_results is not None:
+            entries, job = self._collect_registry_results(job, registry_results)
+            self._record_entries(job, entries)
+
+            if "git" not in self.options.metadata_sources or not job.vcs_available:
+                for version in job.versions:
+                    print(
+                        f"WARNING: No registry metadata for {job.name} "
+                        f"{version.get('version')}, skipping",
+                        file=sys.stderr,
+                    )
+                return results
+            if not job.versions:
+                return results
+
+        if job.previous:
+            # Leave the repo alone when ls-remote shows its tags have not moved.
+            reused, job, _ = self._plan_job(job)
+            self._record_entries(job, reused)
+            if not job.versions:
+                return results
+
+        slots.acquire()
+
+        if self.options.partial_clone:
+            # Parse straight from the blobless mirror; there is no clone to
+            # clean up afterwards.
+            repo_tmp_dir = None
+        else:
+            repo_tmp_dir = Path(tempfile.mkdtemp(dir=self.repo_dir, prefix="checkout-"))
+
+        try:
+            if repo_tmp_dir is None:
+                clone_dir = self._git_fetch_mirror(job.repo_url)
+            else:
+                clone_dir = repo_tmp_dir / "repo"
+                self._git_clone_repo(job.repo_url, clone_dir)
+        except (
+            subprocess.CalledProcessError,
+            subprocess.TimeoutExpired,
+            RepoCacheLockTimeout,
+        ) as exc:
+            if isinstance(exc, subprocess.TimeoutExpired):
+                self._record_timeout(job, exc)
+            else:
+                print(f"ERROR: Failed to clone {job.repo_url}: {exc}", file=sys.stderr)
+                self._sync_incomplete.set()
+            if repo_tmp_dir:
+                shutil.rmtree(repo_tmp_dir, ignore_errors=True)
+            slots.release()
+            return results
+        except BaseException:
+            if repo_tmp_dir:
+                shutil.rmtree(repo_tmp_dir, ignore_errors=True)
+            slots.release()
+            raise
+
+        if not self._reads_git_objects:
+            lease = _CloneLease(repo_tmp_dir, slots, holders=1)
+            tasks = [(self._parse_stage, job, clone_dir, lease)]
+        else:
+            lease = _CloneLease(repo_tmp_dir, slots, holders=len(job.versions) or 1)
+            tasks = [
+                (self._parse_version_task, job, clone_dir, version, lease)
+                for version in job.versions
+            ]
+            if not tasks:
+                lease.release()
+
+        for i, (fn, *args) in enumerate(tasks):
+            try:
+                results.append(parse_pool.submit(fn, *args))
+            except BaseException:
+                for _ in tasks[i:]:
+                    lease.release()
+                raise
+        return results
+
+    def _plan_job(
+        self, job: ModuleJob, verbose: bool = True
+    ) -> Tuple[Dict[str, Dict[str, Any]], ModuleJob, bool]:
+        """Compare the remote's tags with the previous catalog for one repo.
+
+        Returns the previous entries that are still current, the job reduced to
+        the versions that need syncing, and whether the remote could be listed.
+        Modules without a VCS repo have no remote and sync every version.
+        """
+        if not job.vcs_available:
+            return {}, job, True
+        try:
+            remote = self.repo_cache.remote_tags(
+                job.repo_url, timeout=self._git_timeout(job.repo_url)
+            )
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as exc:
+            print(
+                f"WARNING: Could not list tags of {job.repo_url}, "
+                f"syncing every version: {exc}",
+                file=sys.stderr,
+            )
+            return {}, job, False
+
+        reused: Dict[str, Dict[str, Any]] = {}
+        remaining: List[Dict[str, Any]] = []
+        for version in job.versions:
+            tag = self._normalize_tag(version.get("version"))
+            previous = job.previous.get(tag) if tag else None
+            commit_sha = (previous or {}).get("commit_sha")
+            if not commit_sha or remote.get(tag) != commit_sha:
+                remaining.append(version)
                 continue
+            reused[tag] = self._build_catalog_entry(
+                module_name=job.name,
+                namespace=job.namespace,
+                provider=job.provider,
+                repo_url=job.repo_url,
+                tag=tag,
+                variables=previous.get("variables", []),
+                files=previous.get("files", []),
+                commit_sha=commit_sha,
+            )
+            if verbose:
+                print(f"  Reused {tag}")
+        return reused, replace(job, versions=remaining), True
+
+    @property
+    def _reads_git_objects(self) -> bool:
+        return self.options.checkout_free or self.options.partial_clone
+
+    def _parse_stage(self, job: ModuleJob, clone_dir: Path, lease: _CloneLease) -> None:
+        """Check out and parse every version of one clone, in listing order."""
+        try:
+            for version in job.versions:
+                indexed = self._index_version(job, clone_dir, version)
+                if indexed:
+                    self._record_entries(job, dict([indexed]))
+        finally:
+            lease.release()
+
+    def _parse_version_task(
+        self,
+        job: ModuleJob,
+        clone_dir: Path,
+        version: Dict[str, Any],
+        lease: _CloneLease,
+    ) -> None:
+        try:
+            indexed = self._index_version(job, clone_dir, version)
+        finally:
+            lease.release()
+        if indexed:
+            self._record_entries(job, dict([indexed]))
+
+    def _index_version(
+        self, job: ModuleJob, clone_dir: Path, version: Dict[str, Any]
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        tag = self._normalize_tag(version.get("version"))
+        if not tag:
+            print(
+                f"WARNING: Skipping invalid version for {job.name}: {version}",
+                file=sys.stderr,
+            )
+            return None
+
+        try:
+            commit_sha = self._git_resolve_tag(clone_dir, tag, repo_url=job.repo_url)
+        except subprocess.CalledProcessError:
+            commit_sha = None
+        except subprocess.TimeoutExpired as exc:
+            self._record_timeout(job, exc)
+            return None
 
-            repo_url = vcs.get("repository-http-url")
-            if not repo_url:
+        previous = job.previous.get(tag)
+        if commit_sha and previous and previous.get("commit_sha") == commit_sha:
+            # Tags are immutable in practice; only re-parse when moved.
+            variables = previous.get("variables", [])
+            files = previous.get("files", [])
+            status = "Reused"
+        else:
+            try:
+                if self._reads_git_objects:
+                    variables, files = self._parse_tag_objects(
+                        clone_dir, commit_sha or tag, repo_url=job.repo_url
+                    )
+                else:
+                    self._git_checkout_tag(clone_dir, tag, repo_url=job.repo_url)
+                    variables = self._parse_tf_variables(clone_dir)
+                    files = self._list_repo_files(clone_dir, repo_url=job.repo_url)
+            except subprocess.CalledProcessError:
                 print(
-                    f"WARNING: Skipping {name}: missing repository-http-url",
+                    f"WARNING: Tag {tag} not found for {job.repo_url}, skipping",
                     file=sys.stderr,
                 )
-                continue
+                return None
+            except subprocess.TimeoutExpired as exc:
+                self._record_timeout(job, exc)
+                return None
+            except MissingObjectsError as exc:
+                # Never catalog a version with files silently left unparsed.
+                print(
+                    f"ERROR: Could not read {tag} of {job.repo_url}: {exc}",
+                    file=sys.stderr,
+                )
+                self._sync_incomplete.set()
+                return None
+            status = "Indexed"
 
-            print(f"Processing {namespace}/{name}/{provider}")
-            catalog.setdefault(repo_url, {})
+        entry = self._build_catalog_entry(
+            module_name=job.name,
+            namespace=job.namespace,
+            provider=job.provider,
+            repo_url=job.repo_url,
+            tag=tag,
+            variables=variables,
+            files=files,
+            commit_sha=commit_sha,
+        )
+        print(f"  {status} {tag}")
+        return tag, entry
 
-            repo_tmp_dir = Path(tempfile.mkdtemp(dir=self.repo_dir))
-            clone_dir = repo_tmp_dir / "repo"
+    def _record_entries(
+        self, job: ModuleJob, entries: Dict[str, Dict[str, Any]]
+    ) -> None:
+        if self._journal is not None:
+            for tag, entry in entries.items():
+                self._journal.append(job.repo_url, self._module_key(job), tag, entry)
 
-            try:
-                self._git_clone_repo(repo_url, clone_dir)
-            except subprocess.CalledProcessError as exc:
-                print(f"ERROR: Failed to clone {repo_url}: {exc}", file=sys.stderr)
-                shutil.rmtree(repo_tmp_dir, ignore_errors=True)
+    def _partial_catalog(
+        self,
+        jobs: List[ModuleJob],
+        journal: SyncJournal,
+        fallback: Dict[str, Dict[str, Any]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """The catalog as far as it is synced, in sync order.
+
+        Repos with nothing finished yet keep their entries from ``fallback``
+        (the catalog the sync started from), so chat never loses modules;
+        fallback modules the sync filters out are dropped.
+        """
+        order: Dict[str, Dict[str, str]] = {}
+        for job in jobs:
+            self._claim_synced_tags(order, job, journal)
+
+        for repo_url, tags in order.items():
+            entries = {
+                tag: journal.read(repo_url, module, tag) for tag, module in tags.items()
+            }
+            entries = entries or fallback.get(repo_url, {})
+            if entries:
+                yield repo_url, entries
+        for repo_url, entries in fallback.items():
+            if repo_url in order or not entries:
                 continue
+            entry = next(iter(entries.values()))
+            attrs = {
+                "name": entry.get("module_name"),
+                "namespace": entry.get("namespace"),
+                "provider": entry.get("provider"),
+            }
+            if self._is_module_selected(attrs):
+                yield repo_url, entries
 
+    def _result_publishing(self, future: Future, publish: Callable[[], None]) -> Any:
+        """``future.result()``, calling ``publish`` every ``publish_interval``."""
+        interval = self.options.publish_interval
+        while interval > 0:
             try:
-                for version in versions:
-                    tag = self._normalize_tag(version.get("version"))
-                    if not tag:
-                        print(
-                            f"WARNING: Skipping invalid version for {name}: {version}",
-                            file=sys.stderr,
+                return future.result(
+                    timeout=max(0.0, self._next_publish - time.monotonic())
+                )
+            except FutureTimeoutError:
+                publish()
+                self._next_publish = time.monotonic() + interval
+        return future.result()
+
+    def _version_tags(self, job: ModuleJob) -> List[str]:
+        tags = (self._normalize_tag(v.get("version")) for v in job.versions)
+        return [tag for tag in tags if tag]
+
+    def _module_key(self, job: ModuleJob) -> str:
+        # Several registry modules may publish from one repo.
+        return self._registry_source(job.namespace, job.name, job.provider)
+
+    def _claim_synced_tags(
+        self, order: Dict[str, Dict[str, str]], job: ModuleJob, journal: SyncJournal
+    ) -> None:
+        """Point ``order`` at the module each of ``job``'s synced tags comes from.
+
+        ``order`` maps repo -> tag -> module. Jobs are claimed in sync order, so
+        when modules share a repo the later one wins a tag, keeping its first
+        position.
+        """
+        module = self._module_key(job)
+        done = journal.tags(job.repo_url, module)
+        tags = order.setdefault(job.repo_url, {})
+        for tag in self._version_tags(job):
+            if tag in done:
+                tags[tag] = module
+
+    def _without_journaled(self, job: ModuleJob, journal: SyncJournal) -> ModuleJob:
+        done = journal.tags(job.repo_url, self._module_key(job))
+        if not done:
+            return job
+        print(f"Resuming {job.name}: {len(done)} version(s) already synced")
+        return replace(
+            job,
+            versions=[
+                v
+                for v in job.versions
+                if self._normalize_tag(v.get("version")) not in done
+            ],
+        )
+
+    def _sync_fingerprint(self) -> str:
+        # Everything besides the registry listing that shapes the catalog.
+        settings = {
+            "fields": [f.name for f in fields(CatalogEntry)],
+            "include_paths": list(self.options.include_paths),
+            "exclude_paths": list(self.options.exclude_paths),
+            "metadata_sources": list(self.options.metadata_sources),
+            "namespaces": list(self.options.namespaces),
+            "providers": list(self.options.providers),
+            "include_modules": list(self.options.include_modules),
+            "exclude_modules": list(self.options.exclude_modules),
+            "max_versions": self.options.max_versions,
+        }
+        return hashlib.sha256(
+            json.dumps(settings, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _catalog_is_current(self) -> bool:
+        return (
+            not self.options.force
+            and self.validate_catalog()
+            and self.listing_cache.fingerprint() == self._sync_fingerprint()
+        )
+
+    # ------------------------------
+    # Main catalog builder
+    # ------------------------------
+    def build_catalog(self):
+        """Sync the registry as a staged pipeline: list -> clone -> parse -> assemble.
+
+        Registry API calls, clones and checkouts run on separate bounded pools
+        and HCL parsing on worker processes, but the catalog is always assembled
+        in sync order (see ``SyncOptions.order``) and version order so the
+        output is deterministic. Every ``publish_interval`` seconds the versions
+        finished so far are published as a partial catalog.
+        """
+        workers = max(1, self.options.concurrency)
+        use_registry = any(s != "git" for s in self.options.metadata_sources)
+
+        print(f"Fetching Terraform modules for org: {self.registry.TF_ORG}")
+        self.listing_cache.discard()
+        self._sync_incomplete.clear()
+        with self._timeouts_lock:
+            self._timed_out = []
+        publishing = self.options.publish_interval > 0
+        # Partial catalogs fall back to this for repos not synced yet.
+        published_catalog = (
+            self._load_previous_catalog()
+            if self.options.incremental or publishing
+            else {}
+        )
+        previous_catalog = (
+            self._reusable_catalog(published_catalog)
+            if self.options.incremental
+            else {}
+        )
+        fingerprint = self._sync_fingerprint()
+        # Partial catalogs mix in old entries; they keep the record only if
+        # those were built with the same settings.
+        published_fingerprint = (
+            fingerprint
+            if not published_catalog or self._catalog_fingerprint() == fingerprint
+            else None
+        )
+        slots = threading.BoundedSemaphore(workers * 2)
+        # Finished entries go to the journal as they complete; only the order
+        # they belong in (repo -> tag -> module) is kept in memory.
+        order: Dict[str, Dict[str, str]] = {}
+        journal = SyncJournal(
+            self.journal_path, fingerprint, resume=self.options.resume
+        )
+        if journal.resumed:
+            print(f"Resuming interrupted sync from {self.journal_path}")
+        self._journal = journal
+
+        try:
+            with (
+                self._parse_worker_pool(),
+                ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="terragenai-http"
+                ) as http_pool,
+                ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="terragenai-parse"
+                ) as parse_pool,
+            ):
+                with ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="terragenai-clone"
+                ) as clone_pool:
+                    pages = self._iter_listing_pages(http_pool)
+                    seen_pages: List[Tuple[Dict[str, Any], bool]] = []
+                    for page in pages:
+                        seen_pages.append(page)
+                        if page[1]:
+                            break
+                    else:
+                        if not journal.resumed and self._catalog_is_current():
+                            print(
+                                "Registry unchanged since the last sync, nothing to do."
+                            )
+                            journal.remove()
+                            return
+
+                    # The catalog is about to change; until this sync commits,
+                    # an unchanged listing must not mean an unchanged catalog.
+                    self.listing_cache.invalidate()
+                    jobs: List[ModuleJob] = []
+
+                    def publish() -> None:
+                        self._write_catalog_stream(
+                            self._partial_catalog(jobs, journal, published_catalog),
+                            published_fingerprint,
                         )
-                        continue
+                        print(f"Published partial catalog to {self.catalog_path}")
 
-                    try:
-                        self._git_checkout_tag(clone_dir, tag)
-                    except subprocess.CalledProcessError:
-                        print(
-                            f"WARNING: Tag {tag} not found for {repo_url}, skipping",
-                            file=sys.stderr,
+                    # Unless reordered, modules enter the pipeline as their
+                    # listing page arrives.
+                    pending: Deque[Tuple[ModuleJob, Future]] = deque()
+                    found = 0
+                    for mod in self._prioritized(
+                        self._iter_registry_modules(
+                            http_pool, itertools.chain(seen_pages, pages)
                         )
-                        continue
+                    ):
+                        found += 1
+                        job = self._module_job(mod, previous_catalog)
+                        if not job:
+                            continue
+                        jobs.append(job)
+                        todo = self._without_journaled(job, journal)
+                        registry_results = None
+                        if use_registry:
+                            registry_results = [
+                                (
+                                    version,
+                                    http_pool.submit(
+                                        self._fetch_remote_entry, todo, version
+                                    ),
+                                )
+                                for version in todo.versions
+                            ]
+                        pending.append(
+                            (
+                                job,
+                                clone_pool.submit(
+                                    self._clone_stage,
+                                    todo,
+                                    parse_pool,
+                                    slots,
+                                    registry_results,
+                                ),
+                            )
+                        )
+                    print(f"Found {found} module(s)")
 
-                    variables = self._parse_tf_variables(clone_dir)
-                    files = self._list_repo_files(clone_dir)
-                    catalog[repo_url][tag] = self._build_catalog_entry(
-                        module_name=name,
-                        namespace=namespace,
-                        provider=provider,
-                        repo_url=repo_url,
-                        tag=tag,
-                        variables=variables,
-                        files=files,
+                    self._next_publish = (
+                        time.monotonic() + self.options.publish_interval
                     )
-                    print(f"  Indexed {tag}")
-            finally:
-                shutil.rmtree(repo_tmp_dir, ignore_errors=True)
+                    while pending:
+                        job, clone_future = pending.popleft()
+                        parse_futures = self._result_publishing(clone_future, publish)
+                        for parse_future in parse_futures:
+                            self._result_publishing(parse_future, publish)
+                        self._claim_synced_tags(order, job, journal)
+
+            self._write_catalog_stream(
+                (
+                    (
+                        repo_url,
+                        {
+                            tag: journal.read(repo_url, module, tag)
+                            for tag, module in tags.items()
+                        },
+                    )
+                    for repo_url, tags in order.items()
+                ),
+                fingerprint,
+            )
+            journal.remove()
+        finally:
+            self._journal = None
+            journal.close()
 
-        self._write_catalog(catalog)
+        if self._sync_incomplete.is_set():
+            # Leave the cache invalidated so the next sync retries what failed.
+            self.listing_cache.discard()
+        else:
+            self.listing_cache.commit(fingerprint)
 
-        print(f"\nDone. {len(catalog)} repo(s) indexed.")
+        print(f"\nDone. {len(order)} repo(s) indexed.")
         print(f"Catalog written to {self.catalog_path}")
+        self._report_timeouts()
+
+    def _report_timeouts(self) -> None:
+        with self._timeouts_lock:
+            modules = list(dict.fromkeys(self._timed_out))
+        if not modules:
+            return
+        print(
+            f"WARNING: git timed out for {len(modules)} module(s); they were left "
+            "out or are incomplete and will be retried by the next sync:",
+            file=sys.stderr,
+        )
+        for module in modules:
+            print(f"  {module}", file=sys.stderr)
+
+    # ------------------------------
+    # Sync plan
+    # ------------------------------
+    def plan_sync(self) -> List[RepoPlan]:
+        """Report which repos and tags a sync would fetch, without cloning.
+
+        Compares every repo's remote tags (``git ls-remote``) with the commits
+        recorded in the current catalog.
+        """
+        workers = max(1, self.options.concurrency)
+        previous_catalog = self._reusable_catalog(self._load_previous_catalog())
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="terragenai-plan"
+        ) as pool:
+            jobs = [
+                job
+                for job in (
+                    self._module_job(mod, previous_catalog)
+                    for mod in self._iter_registry_modules(pool)
+                )
+                if job
+            ]
+            planned = list(
+                pool.map(lambda job: self._plan_job(job, verbose=False), jobs)
+            )
+
+        plans = [
+            RepoPlan(
+                job=job,
+                changed_tags=[
+                    self._normalize_tag(v.get("version")) for v in remaining.versions
+                ],
+                checked=checked,
+            )
+            for job, (_, remaining, checked) in zip(jobs, planned)
+        ]
+
+        changed = [plan for plan in plans if plan.changed_tags]
+        for plan in changed:
+            note = "" if plan.checked else " (tags could not be listed)"
+            print(
+                f"{plan.job.namespace}/{plan.job.name}/{plan.job.provider}{note}: "
+                f"{', '.join(str(tag) for tag in plan.changed_tags)}"
+            )
+        print(f"{len(changed)} of {len(plans)} repo(s) would be synced.")
+        return plans
 
     # ------------------------------
     # Validate Catalog Exists
@@ -310,6 +1645,9 @@ class ModuleRegistryService:
         inventory: list[dict] = []
 
         for repo_url, versions in raw_catalog.items():
+            if not versions:
+                # A repo none of whose tags could be synced.
+                continue
             latest_version = sorted(versions.keys())[-1]
             module = versions[latest_version]
 
@@ -328,3 +1666,99 @@ class ModuleRegistryService:
             )
 
         return inventory
+
+
+# ------------------------------
+# Several orgs in one sync
+# ------------------------------
+def org_services(
+    registries: List[ModuleRegistry],
+    options: Optional[SyncOptions] = None,
+    config_dir: Optional[Path] = None,
+) -> List[ModuleRegistryService]:
+    """One service per org, sharing what can be shared between them.
+
+    All orgs use one HTTP session, one rate-limited client per registry
+    domain and token, one parse cache, and one set of repo mirrors under
+    ``config_dir / "registry-repos"``, so a repo published in several orgs is
+    only fetched once. Catalogs stay per org under ``config_dir / TF_ORG``.
+    """
+    orgs = [registry.TF_ORG for registry in registries]
+    duplicates = sorted({org for org in orgs if orgs.count(org) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Orgs share a catalog directory when named alike: {', '.join(duplicates)}"
+        )
+
+    options = options or SyncOptions()
+    if len(registries) == 1:
+        return [ModuleRegistryService(registries[0], config_dir, options=options)]
+    if options.parse_processes is None:
+        # Each org's sync has its own parse workers; split the CPUs between them.
+        options = replace(
+            options, parse_processes=max(1, (os.cpu_count() or 1) // len(registries))
+        )
+
+    config_root = Path(config_dir) if config_dir else Path(get_config_dir())
+    session = sized_session(max(1, options.concurrency) * len(registries))
+    # Rate limits apply per token, so orgs behind one token share a bucket.
+    clients: Dict[Tuple[str, str], RegistryHttpClient] = {}
+    clone_token = registries[0].GIT_CLONE_TOKEN
+    repo_cache = RepoCache(
+        config_root / "registry-repos",
+        lambda repo_url: _clone_url_with_token(repo_url, clone_token),
+        partial=options.partial_clone,
+    )
+    parse_cache = None
+    if options.parse_cache_max_bytes > 0:
+        parse_cache = ParseCache(
+            config_root / "parse-cache", options.parse_cache_max_bytes
+        )
+
+    services = []
+    for registry in registries:
+        key = (registry.TF_REGISTRY_DOMAIN, registry.TF_API_TOKEN)
+        if key not in clients:
+            clients[key] = RegistryHttpClient(session, registry.TF_HEADERS)
+        services.append(
+            ModuleRegistryService(
+                registry,
+                config_root,
+                session=session,
+                options=options,
+                http=clients[key],
+                repo_cache=repo_cache,
+                parse_cache=parse_cache,
+            )
+        )
+    return services
+
+
+def build_catalogs(services: List[ModuleRegistryService]) -> None:
+    """Run ``build_catalog`` for every org at once.
+
+    An org whose sync fails does not stop the others; the first failure is
+    raised once all of them have finished.
+    """
+    if len(services) == 1:
+        services[0].build_catalog()
+        return
+
+    with ThreadPoolExecutor(
+        max_workers=len(services), thread_name_prefix="terragenai-org"
+    ) as pool:
+        futures = [
+            (service, pool.submit(service.build_catalog)) for service in services
+        ]
+        errors = []
+        for service, future in futures:
+            try:
+                future.result()
+            except Exception as exc:
+                print(
+                    f"ERROR: Sync failed for org {service.registry.TF_ORG}: {exc}",
+                    file=sys.stderr,
+                )
+                errors.append(exc)
+    if errors:
+        raise errors[0]
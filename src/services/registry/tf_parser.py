@@ -0,0 +1,294 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import hcl2
+
+# A variable block has to start a line; files without one never need parsing.
+_VARIABLE_BLOCK_RE = re.compile(r"^[ \t]*variable\b", re.MULTILINE)
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>[ \t]+)
+    | (?P<comment>\#[^\n]*|//[^\n]*|/\*[^\n]*?\*/)
+    | (?P<nl>\n)
+    | (?P<string>"(?:[^"\\\n]|\\.)*")
+    | (?P<number>\d+(?:\.\d+)?(?![\w.]))
+    | (?P<ident>[A-Za-z_][\w-]*)
+    | (?P<punct>[{}\[\]()=,:])
+    | (?P<op>[.+\-*/%<>!?&|]+)
+    """,
+    re.VERBOSE,
+)
+
+# The only variable attributes the catalog keeps.
+_VARIABLE_ATTRIBUTES = ("type", "description", "default")
+_KEYWORDS = {"true": True, "false": False, "null": None}
+
+_Token = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class TerraformVariableMetadata:
+    name: str
+    type: Any
+    description: Any
+    default: Any
+    required: bool
+
+
+class _NotSimple(Exception):
+    """The file uses syntax the fast path leaves to hcl2."""
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens: List[_Token] = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise _NotSimple(f"unexpected character at offset {pos}")
+        kind = match.lastgroup
+        value = match.group()
+        pos = match.end()
+        if kind in ("space", "comment"):
+            continue
+        if kind == "string" and ("${" in value or "%{" in value):
+            raise _NotSimple("template string")
+        if kind == "op" and "<<" in value:
+            raise _NotSimple("heredoc")
+        tokens.append((kind, value))
+    return tokens
+
+
+class _VariableScanner:
+    """Reads ``variable`` blocks out of a token stream.
+
+    Attributes the catalog keeps must be plain literals, type names or type
+    constructor calls; values are shaped exactly as python-hcl2 shapes them.
+    Other blocks and attributes are only checked for balanced brackets and
+    skipped. Anything else raises ``_NotSimple``.
+    """
+
+    def __init__(self, tokens: List[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+        self.variables: List[Dict[str, Dict[str, Any]]] = []
+
+    def scan(self) -> List[Dict[str, Dict[str, Any]]]:
+        self._body(top_level=True, keep=False)
+        return self.variables
+
+    def _peek(self) -> _Token:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return ("eof", "")
+
+    def _next(self) -> _Token:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _skip_newlines(self) -> None:
+        while self._peek()[0] == "nl":
+            self.pos += 1
+
+    def _expect(self, value: str) -> None:
+        if self._next() != ("punct", value):
+            raise _NotSimple(f"expected {value!r}")
+
+    def _body(self, top_level: bool, keep: bool) -> Dict[str, Any]:
+        attrs: Dict[str, Any] = {}
+        seen = set()
+        while True:
+            self._skip_newlines()
+            kind, name = self._next()
+            if kind == "eof" and top_level:
+                return attrs
+            if (kind, name) == ("punct", "}") and not top_level:
+                return attrs
+            if kind != "ident":
+                raise _NotSimple(f"unexpected {name!r}")
+
+            if self._peek() == ("punct", "="):
+                self.pos += 1
+                if name in seen:
+                    # hcl2 rejects the whole file.
+                    raise _NotSimple(f"duplicate attribute {name!r}")
+                seen.add(name)
+                if keep and name in _VARIABLE_ATTRIBUTES:
+                    attrs[name] = self._value()
+                else:
+                    self._skip_expression()
+            else:
+                self._block(name, top_level)
+
+            kind, value = self._peek()
+            if kind not in ("nl", "eof") and (kind, value) != ("punct", "}"):
+                raise _NotSimple(f"unexpected {value!r}")
+
+    def _block(self, block_type: str, top_level: bool) -> None:
+        labels: List[str] = []
+        while self._peek()[0] in ("string", "ident"):
+            kind, value = self._next()
+            labels.append(value[1:-1] if kind == "string" else value)
+        self._expect("{")
+
+        if top_level and block_type == "variable":
+            if len(labels) != 1:
+                raise _NotSimple("variable block needs exactly one label")
+            attrs = self._body(top_level=False, keep=True)
+            self.variables.append({labels[0]: attrs})
+        else:
+            self._body(top_level=False, keep=False)
+
+    def _skip_expression(self) -> None:
+        depth = 0
+        consumed = False
+        while True:
+            kind, value = self._peek()
+            if kind == "eof":
+                break
+            if depth == 0 and (kind == "nl" or (kind, value) == ("punct", "}")):
+                break
+            if kind == "punct" and value in "([{":
+                depth += 1
+            elif kind == "punct" and value in ")]}":
+                depth -= 1
+                if depth < 0:
+                    raise _NotSimple("unbalanced brackets")
+            self.pos += 1
+            consumed = True
+        if depth or not consumed:
+            raise _NotSimple("incomplete expression")
+
+    def _value(self) -> Any:
+        kind, value = self._next()
+        if kind == "string":
+            # hcl2 keeps escape sequences as written.
+            return value[1:-1]
+        if kind == "number":
+            return float(value) if "." in value else int(value)
+        if kind == "ident":
+            if value in _KEYWORDS:
+                return _KEYWORDS[value]
+            return f"${{{self._type_expression(value)}}}"
+        if (kind, value) == ("punct", "["):
+            return self._list()
+        if (kind, value) == ("punct", "{"):
+            return self._object()
+        raise _NotSimple(f"unsupported value {value!r}")
+
+    def _type_expression(self, name: str) -> str:
+        if self._peek() != ("punct", "("):
+            return name
+        self.pos += 1
+        args: List[str] = []
+        while True:
+            self._skip_newlines()
+            kind, value = self._next()
+            if kind != "ident" or value in _KEYWORDS:
+                raise _NotSimple("complex type expression")
+            args.append(self._type_expression(value))
+            self._skip_newlines()
+            token = self._next()
+            if token == ("punct", ")"):
+                return f"{name}({', '.join(args)})"
+            if token != ("punct", ","):
+                raise _NotSimple("complex type expression")
+
+    def _list(self) -> List[Any]:
+        items: List[Any] = []
+        while True:
+            self._skip_newlines()
+            if self._peek() == ("punct", "]"):
+                self.pos += 1
+                return items
+            items.append(self._value())
+            self._skip_newlines()
+            token = self._peek()
+            if token == ("punct", ","):
+                self.pos += 1
+            elif token != ("punct", "]"):
+                raise _NotSimple("unexpected token in list")
+
+    def _object(self) -> Dict[str, Any]:
+        items: Dict[str, Any] = {}
+        while True:
+            self._skip_newlines()
+            kind, key = self._next()
+            if (kind, key) == ("punct", "}"):
+                return items
+            if kind == "string":
+                key = key[1:-1]
+            elif kind != "ident":
+                raise _NotSimple("unsupported object key")
+            if self._next() not in (("punct", "="), ("punct", ":")):
+                raise _NotSimple("expected '=' in object")
+            items[key] = self._value()
+            token = self._peek()
+            if token == ("punct", ","):
+                self.pos += 1
+            elif token[0] != "nl" and token != ("punct", "}"):
+                raise _NotSimple("unexpected token in object")
+
+
+def _variable_blocks(text: str) -> Optional[List[Dict[str, Dict[str, Any]]]]:
+    """The ``variable`` blocks of a file as hcl2 would return them, if simple.
+
+    None means the file needs the full parser.
+    """
+    if not _VARIABLE_BLOCK_RE.search(text):
+        return []
+    try:
+        return _VariableScanner(_tokenize(text)).scan()
+    except _NotSimple:
+        return None
+
+
+def extract_tf_variables(data: bytes, fast_path: bool = True) -> List[Dict[str, Any]]:
+    """Variables declared in one .tf file; unparseable files yield none.
+
+    Most files either declare no variables or only literal ones, so those are
+    read with a small tokenizer. Everything else goes through python-hcl2; the
+    result is the same either way.
+    """
+    try:
+        # Match text-mode reads: strict UTF-8 and universal newlines.
+        text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except UnicodeDecodeError:
+        return []
+
+    blocks = _variable_blocks(text) if fast_path else None
+    if blocks is None:
+        try:
+            blocks = hcl2.loads(text).get("variable", [])
+        except Exception:
+            return []
+
+    variables: List[Dict[str, Any]] = []
+    for block in blocks:
+        for name, attrs in block.items():
+            variables.append(
+                asdict(
+                    TerraformVariableMetadata(
+                        name=name,
+                        type=attrs.get("type"),
+                        description=attrs.get("description"),
+                        default=attrs.get("default"),
+                        required="default" not in attrs,
+                    )
+                )
+            )
+    return variables
+
+
+def parse_blob_batch(
+    batch: Sequence[Tuple[str, bytes]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse a batch of ``(blob_sha, content)`` pairs.
+
+    This is the unit of work sent to parse worker processes, so it must stay a
+    picklable module-level function.
+    """
+    return {blob_sha: extract_tf_variables(data) for blob_sha, data in batch}
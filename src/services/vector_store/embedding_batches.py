@@ -0,0 +1,89 @@
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..llm.base_llm import LLMService
+
+# OpenAI's embeddings endpoint takes up to 2048 inputs and 300k tokens per
+# request. Token counts are estimated, so batches stay well under the limit.
+EMBEDDING_BATCH_MAX_INPUTS = 2048
+EMBEDDING_BATCH_MAX_TOKENS = 200_000
+# Batches in flight at once.
+EMBEDDING_CONCURRENCY = 4
+EMBEDDING_MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Upper-bound guess at ``text``'s token count, without a tokenizer.
+
+    English averages about four bytes per token; module texts are mostly JSON,
+    which tokenizes less well, so three is assumed.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def plan_batches(
+    texts: List[str],
+    max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_inputs: int = EMBEDDING_BATCH_MAX_INPUTS,
+) -> List[range]:
+    """Split ``texts`` into consecutive batches within both request limits."""
+    batches: List[range] = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (tokens + cost > max_tokens or i - start >= max_inputs):
+            batches.append(range(start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        batches.append(range(start, len(texts)))
+    return batches
+
+
+def embed_texts(
+    llm: LLMService,
+    texts: List[str],
+    concurrency: int = EMBEDDING_CONCURRENCY,
+    max_attempts: int = EMBEDDING_MAX_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Optional[np.ndarray]:
+    """Embed ``texts`` in batched requests, a few at a time.
+
+    Returns a float32 matrix with one row per text, or None when the LLM
+    produced no embeddings (dry run). A batch failing with one of the LLM's
+    ``RETRYABLE_ERRORS`` is retried with jittered exponential backoff.
+    """
+
+    def embed(batch: range) -> Optional[List[List[float]]]:
+        for attempt in range(max_attempts):
+            try:
+                return llm.create_embeddings([texts[i] for i in batch])
+            except llm.RETRYABLE_ERRORS as exc:
+                if attempt + 1 == max_attempts:
+                    raise
+                print(
+                    f"WARNING: Embedding batch of {len(batch)} failed ({exc}), retrying",
+                    file=sys.stderr,
+                )
+                sleep(random.uniform(0, BACKOFF_BASE * 2**attempt))
+        return None
+
+    if not texts:
+        return None
+    with ThreadPoolExecutor(
+        max_workers=max(1, concurrency), thread_name_prefix="terragenai-embed"
+    ) as pool:
+        results = list(pool.map(embed, plan_batches(texts)))
+
+    if any(not embeddings for embeddings in results):
+        return None
+    return np.array(
+        [embedding for embeddings in results for embedding in embeddings],
+        dtype="float32",
+    )
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from ...paths import atomic_replace
+
+# Rows kept per model; the oldest are dropped first once the cache outgrows it.
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def embedding_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embeddings keyed by model name and a hash of the embedded text.
+
+    Each model's vectors live in one float32 ``.npy`` matrix, next to a JSON
+    list giving the text hash of every row. The matrix is memory-mapped on
+    read, so a lookup only touches the rows it returns.
+    """
+
+    def __init__(self, root: Path, model: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", model) or "default"
+        self.matrix_path = self.root / f"{name}.npy"
+        self.keys_path = self.root / f"{name}.keys.json"
+        self.max_entries = max_entries
+
+    def _load(self):
+        try:
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return [], None
+        if (
+            not isinstance(keys, list)
+            or matrix.ndim != 2
+            or matrix.dtype != np.float32
+            or len(keys) != matrix.shape[0]
+        ):
+            # Torn by a writer that died between the two files.
+            return [], None
+        return keys, matrix
+
+    def get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """The cached vector of every key that has one."""
+        stored, matrix = self._load()
+        if matrix is None:
+            return {}
+        rows = {key: row for row, key in enumerate(stored)}
+        hits = [key for key in dict.fromkeys(keys) if key in rows]
+        if not hits:
+            return {}
+        vectors = np.array(matrix[[rows[key] for key in hits]])
+        return dict(zip(hits, vectors))
+
+    def put(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Add ``vectors`` (one row per key), replacing older rows of a key."""
+        if not keys:
+            return
+        stored, matrix = self._load()
+        if matrix is not None and matrix.shape[1] != vectors.shape[1]:
+            stored, matrix = [], None
+
+        new = set(keys)
+        kept = [row for row, key in enumerate(stored) if key not in new]
+        all_keys = [stored[row] for row in kept] + list(keys)
+        parts = [np.asarray(vectors, dtype=np.float32)]
+        if matrix is not None and kept:
+            parts.insert(0, np.asarray(matrix[kept]))
+        combined = np.concatenate(parts)
+        if len(all_keys) > self.max_entries:
+            all_keys = all_keys[-self.max_entries :]
+            combined = combined[-self.max_entries :]
+        # Drop the memory map before replacing the file it maps.
+        del matrix
+
+        with atomic_replace(self.matrix_path) as tmp_path, open(tmp_path, "wb") as f:
+            np.save(f, combined)
+        with atomic_replace(self.keys_path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(all_keys, f)
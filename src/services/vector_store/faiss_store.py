@@ -1,21 +1,114 @@
+import hashlib
+import json
+import math
 import os
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import faiss
 import numpy as np
 
 from ...models.module_registry import ModuleRegistry
-from ...paths import get_config_dir
+from ...paths import atomic_replace, get_config_dir
 from ..llm.openai import OpenAIService
 from .base_store import VectorStoreService
+from .embedding_batches import embed_texts
+from .embedding_cache import EmbeddingCache, embedding_key
+
+# Bump when the index metadata layout changes; older indexes are then rebuilt.
+INDEX_META_FORMAT = 1
+
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw")
+INDEX_ENCODINGS = ("flat", "sq8", "pq")
+# "auto" searches exactly up to this many vectors, where brute force is still
+# fast, and switches to IVF above it.
+AUTO_FLAT_MAX_VECTORS = 10_000
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+# Neighbours per node in the HNSW graph.
+HNSW_M = 32
+# faiss wants at least this many training vectors per IVF list.
+IVF_MIN_POINTS_PER_LIST = 39
+# An IVF index is retrained once the catalog outgrows its training set by
+# this factor, since its lists then get too long to probe cheaply.
+IVF_RETRAIN_GROWTH = 4
+# Product quantization: one 8-bit code per 16 dimensions, e.g. 96 bytes for a
+# 1536-dimension embedding instead of 6144. Training its 256 centroids per
+# code takes this many vectors; smaller catalogs fall back to sq8.
+PQ_BITS = 8
+PQ_DIMS_PER_CODE = 16
+PQ_MIN_TRAINING = 39 * 2**PQ_BITS
+# Quantized searches fetch this many times top_k candidates and re-rank them
+# against the full-precision vectors.
+DEFAULT_RERANK_FACTOR = 4
+
+
+@dataclass(frozen=True)
+class IndexOptions:
+    # "flat" searches every vector exactly. "ivf" clusters the vectors and only
+    # searches the nprobe nearest clusters. "hnsw" walks a proximity graph but
+    # cannot drop vectors, so removing modules rebuilds it. "auto" picks flat
+    # or ivf by catalog size.
+    index_type: str = "auto"
+    # IVF clusters searched per query; higher is slower but finds more.
+    nprobe: int = DEFAULT_NPROBE
+    # HNSW candidates kept while searching; higher is slower but finds more.
+    ef_search: int = DEFAULT_EF_SEARCH
+    # How vectors are stored in the index: "flat" keeps float32, "sq8" one
+    # byte per dimension, "pq" product-quantized codes (see PQ_BITS).
+    encoding: str = "flat"
+    # Candidates per result re-ranked exactly for sq8 and pq; 0 disables it.
+    rerank_factor: int = DEFAULT_RERANK_FACTOR
+    # Map an up-to-date index read-only instead of reading it into memory, so
+    # chat processes running at once share its pages.
+    mmap: bool = True
+
+
+def pq_subquantizers(dim: int) -> int:
+    """Codes per PQ vector: the largest divisor of ``dim`` up to dim / 16."""
+    target = max(1, dim // PQ_DIMS_PER_CODE)
+    return next(m for m in range(target, 0, -1) if dim % m == 0)
+
+
+def index_factory_string(kind: str, encoding: str, dim: int, vectors: int) -> str:
+    """faiss.index_factory description of an index that takes explicit ids."""
+    codes = {
+        "flat": "Flat",
+        "sq8": "SQ8",
+        "pq": f"PQ{pq_subquantizers(dim)}x{PQ_BITS}",
+    }[encoding]
+    if kind == "ivf":
+        # IVF indexes keep their own ids.
+        return f"IVF{ivf_list_count(vectors)},{codes}"
+    if kind == "hnsw":
+        return f"IDMap2,HNSW{HNSW_M}" + ("" if encoding == "flat" else f"_{codes}")
+    return f"IDMap2,{codes}"
+
+
+def ivf_list_count(vectors: int) -> int:
+    """IVF list count for ``vectors`` vectors: about 4 * sqrt(n), as faiss
+    suggests, but never more than the training set can fill."""
+    return max(1, min(int(4 * math.sqrt(vectors)), vectors // IVF_MIN_POINTS_PER_LIST))
+
+
+def catalog_fingerprint(model: str, text_hashes: dict[str, str]) -> str:
+    """Identifies the vectors an index should hold for a catalog."""
+    payload = json.dumps([model, sorted(text_hashes.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 class FaissService(VectorStoreService):
-    def __init__(self, modules_inventory, config_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        modules_inventory,
+        config_dir: Optional[Path] = None,
+        options: Optional[IndexOptions] = None,
+    ):
 
         self.registry = ModuleRegistry()
+        self.options = options or IndexOptions()
         config_root = Path(config_dir) if config_dir else Path(get_config_dir())
         base_dir = config_root / self.registry.TF_ORG
         base_dir.mkdir(parents=True, exist_ok=True)
@@ -23,54 +116,273 @@ class FaissService(VectorStoreService):
         Path(self.vector_dir).mkdir(parents=True, exist_ok=True)
 
         self.index_path = str(Path(self.vector_dir) / "faiss.index")
+        # Which module each vector id belongs to, and the catalog it matches.
+        self.meta_path = str(Path(self.vector_dir) / "faiss.meta.json")
+        # Full-precision copies of quantized vectors, rows in id order.
+        self.vectors_path = str(Path(self.vector_dir) / "vectors.npy")
+        self.vector_ids_path = str(Path(self.vector_dir) / "vector_ids.npy")
 
         self.llm = OpenAIService()
+        # Keyed by the embedded text, so unchanged modules are never re-embedded.
+        self.embedding_cache = EmbeddingCache(
+            base_dir / "embedding-cache", self.llm.embedding_model
+        )
         self.faiss_index = None
         self.module_texts = None
         self.module_sources = None
+        self.id_to_source: dict[int, str] = {}
+        # (sorted ids, float32 rows) used to re-rank quantized results.
+        self.full_vectors: Optional[tuple[np.ndarray, np.ndarray]] = None
         self.modules_inventory = modules_inventory
         self.module_lookup: dict[str, dict] = {
             m["source"]: m for m in self.modules_inventory
         }
 
     def create_index(self, force=False):
+        """Load the saved index and bring it in line with the catalog.
 
-        if os.path.exists(self.index_path) and not force:
+        Vectors are stored under stable ids, so after a sync only modules that
+        were added, removed or whose embedding text changed are touched.
+        ``force`` rebuilds from scratch (embeddings still come from the cache),
+        as does a change of index type or encoding. Trained IVF centroids and
+        quantizers are saved with the index and reused until the catalog
+        outgrows them. An index that is already current is memory-mapped
+        (``IndexOptions.mmap``).
+        """
+        self.module_texts = [
+            self.module_to_embedding_text(m) for m in self.modules_inventory
+        ]
+        self.module_sources = [m["source"] for m in self.modules_inventory]
+        texts = dict(zip(self.module_sources, self.module_texts))
+        hashes = {source: embedding_key(text) for source, text in texts.items()}
+        fingerprint = catalog_fingerprint(self.llm.embedding_model, hashes)
 
-            print("skipping creating faiss index, already found and no --force")
+        kind = self._index_kind(len(texts))
+        encoding = self._index_encoding(len(texts))
 
-            self.faiss_index = faiss.read_index(self.index_path)
+        index, meta = (None, None) if force else self._load_index(self.options.mmap)
+        if index is not None and not self._index_fits(meta, kind, encoding, len(texts)):
+            print(
+                "faiss index no longer suits the catalog, "
+                f"rebuilding as {kind} ({encoding})"
+            )
+            index, meta = None, None
+        full = None
+        if index is not None and encoding != "flat":
+            full = self._load_full_vectors(meta["ids"])
+            if full is None:
+                print("full-precision vectors missing, rebuilding faiss index")
+                index, meta = None, None
+        if index is not None and meta["fingerprint"] == fingerprint:
+            print("skipping creating faiss index, already found and no --force")
+            self._use_index(index, meta["ids"], full)
+            return self.faiss_index
+        if index is not None and self.options.mmap:
+            # A mapped index is read-only; updating it needs a private copy.
+            index = faiss.read_index(self.index_path)
 
-            self.module_texts = []
-            self.module_sources = []
+        ids: dict[str, int] = {}
+        next_id = 0
+        trained_on = None
+        removed = []
+        if index is not None:
+            ids, next_id = meta["ids"], meta["next_id"]
+            trained_on = meta.get("trained_on")
+            removed = [s for s in ids if hashes.get(s) != meta["hashes"].get(s)]
+            if removed and kind == "hnsw":
+                # HNSW graphs cannot drop vectors; rebuild from the cache.
+                index, ids, full = None, {}, None
+            elif removed:
+                removed_ids = np.array([ids.pop(s) for s in removed], dtype="int64")
+                index.remove_ids(removed_ids)
+                if full is not None:
+                    keep = ~np.isin(full[0], removed_ids)
+                    full = (full[0][keep], np.asarray(full[1][keep]))
 
-            for m in self.modules_inventory:
-                text = self.module_to_embedding_text(m)
-                self.module_texts.append(text)
-                self.module_sources.append(m["source"])
+        added = [source for source in texts if source not in ids]
+        if added:
+            embeddings = self._embed([texts[source] for source in added])
+            if embeddings is None:
+                print("WARNING: Skipping faiss index (dry run)", file=sys.stderr)
+                return self.faiss_index
+            if index is None:
+                index = self._new_index(kind, encoding, embeddings)
+                trained_on = len(embeddings) if kind == "ivf" else None
+            new_ids = np.arange(next_id, next_id + len(added), dtype="int64")
+            index.add_with_ids(embeddings, new_ids)
+            ids.update(zip(added, new_ids.tolist()))
+            next_id += len(added)
+            if encoding != "flat":
+                # Ids only grow, so appending keeps the rows in id order.
+                full = (
+                    np.concatenate([full[0], new_ids]) if full else new_ids,
+                    np.concatenate([full[1], embeddings]) if full else embeddings,
+                )
 
+        if index is None:
             return self.faiss_index
+        if meta is not None:
+            print(
+                "catalog changed since the faiss index was built, "
+                f"{len(added)} vector(s) added and {len(removed)} removed"
+            )
+
+        self._save_index(
+            index,
+            full if encoding != "flat" else None,
+            {
+                "format": INDEX_META_FORMAT,
+                "index_type": kind,
+                "encoding": encoding,
+                "model": self.llm.embedding_model,
+                "trained_on": trained_on,
+                "fingerprint": fingerprint,
+                "ntotal": index.ntotal,
+                "next_id": next_id,
+                "ids": ids,
+                "hashes": {source: hashes[source] for source in ids},
+            },
+        )
+        if self.options.mmap:
+            index = self._read_index(kind)
+            full = self._load_full_vectors(ids) if encoding != "flat" else None
+        self._use_index(index, ids, full)
+        return self.faiss_index
 
-        # -------- RAG: rebuild embeddings --------
-        self.module_texts = []
-        self.module_sources = []
-        embeddings = []
+    def _index_kind(self, vectors: int) -> str:
+        if self.options.index_type != "auto":
+            return self.options.index_type
+        return "flat" if vectors <= AUTO_FLAT_MAX_VECTORS else "ivf"
 
-        for m in self.modules_inventory:
-            text = self.module_to_embedding_text(m)
-            emb = self.llm.create_embedding(text)
+    def _index_encoding(self, vectors: int) -> str:
+        if self.options.encoding == "pq" and vectors < PQ_MIN_TRAINING:
+            return "sq8"
+        return self.options.encoding
 
-            self.module_texts.append(text)
-            self.module_sources.append(m["source"])
-            embeddings.append(np.array(emb, dtype="float32"))
+    def _index_fits(self, meta: dict, kind: str, encoding: str, vectors: int) -> bool:
+        if meta.get("index_type", "flat") != kind:
+            return False
+        if meta.get("encoding", "flat") != encoding:
+            return False
+        if meta.get("model") != self.llm.embedding_model:
+            # Vectors from another model are not comparable with its queries.
+            return False
+        if kind == "ivf":
+            return vectors <= IVF_RETRAIN_GROWTH * (meta.get("trained_on") or 0)
+        return True
 
-        if embeddings:
-            self.faiss_index = faiss.IndexFlatL2(len(emb))
-            self.faiss_index.add(np.stack(embeddings))
+    def _new_index(self, kind: str, encoding: str, vectors: np.ndarray) -> Any:
+        """An empty index that takes explicit ids, trained on ``vectors``."""
+        dim = vectors.shape[1]
+        index = faiss.index_factory(
+            dim, index_factory_string(kind, encoding, dim, len(vectors))
+        )
+        if not index.is_trained:
+            index.train(vectors)
+        return index
 
-        faiss.write_index(self.faiss_index, self.index_path)
+    def _read_index(self, kind: str) -> Any:
+        """Map the saved index read-only; its pages are shared between processes."""
+        # IVF maps its inverted lists, the other types their flat code arrays.
+        if kind == "ivf":
+            mmap = faiss.IO_FLAG_MMAP
+        else:
+            mmap = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if mmap is None:
+            # faiss before 1.11 cannot map flat codes; read them into memory.
+            return faiss.read_index(self.index_path)
+        return faiss.read_index(self.index_path, mmap | faiss.IO_FLAG_READ_ONLY)
 
-        return self.faiss_index
+    def _load_index(self, mmap: bool = False) -> tuple[Any, Optional[dict]]:
+        if not os.path.exists(self.index_path):
+            return None, None
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            kind = meta.get("index_type", "flat") if isinstance(meta, dict) else None
+            if mmap and kind:
+                index = self._read_index(kind)
+            else:
+                index = faiss.read_index(self.index_path)
+        except (OSError, ValueError, RuntimeError):
+            meta, index = None, None
+        if (
+            not isinstance(meta, dict)
+            or meta.get("format") != INDEX_META_FORMAT
+            or meta.get("ntotal") != index.ntotal
+        ):
+            # Built by an older version, or torn between its two files.
+            print("faiss index has no usable id map, rebuilding")
+            return None, None
+        return index, meta
+
+    def _load_full_vectors(
+        self, ids: dict[str, int]
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """The saved full-precision vectors, if they match the id map."""
+        try:
+            vector_ids = np.load(self.vector_ids_path, mmap_mode="r")
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        expected = np.sort(np.fromiter(ids.values(), dtype="int64", count=len(ids)))
+        if len(vectors) != len(vector_ids) or not np.array_equal(vector_ids, expected):
+            return None
+        return vector_ids, vectors
+
+    def _save_index(
+        self,
+        index: Any,
+        full: Optional[tuple[np.ndarray, np.ndarray]],
+        meta: dict,
+    ) -> None:
+        with atomic_replace(self.index_path) as tmp_path:
+            faiss.write_index(index, tmp_path)
+        for path, array in zip((self.vector_ids_path, self.vectors_path), full or ()):
+            with atomic_replace(path) as tmp_path, open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+        if full is None:
+            for path in (self.vector_ids_path, self.vectors_path):
+                Path(path).unlink(missing_ok=True)
+
+        with atomic_replace(self.meta_path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+    def _use_index(
+        self,
+        index: Any,
+        ids: dict[str, int],
+        full: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    ) -> None:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = min(self.options.nprobe, ivf.nlist)
+        inner = index.index if isinstance(index, faiss.IndexIDMap) else index
+        hnsw = getattr(faiss.downcast_index(inner), "hnsw", None)
+        if hnsw is not None:
+            hnsw.efSearch = self.options.ef_search
+        self.faiss_index = index
+        self.full_vectors = full if self.options.rerank_factor > 0 else None
+        self.id_to_source = {vector_id: source for source, vector_id in ids.items()}
+
+    def _embed(self, texts: list[str]) -> Optional[np.ndarray]:
+        """One embedding row per text; only texts not in the cache hit the API."""
+        if not texts:
+            return None
+        keys = [embedding_key(text) for text in texts]
+        cached = self.embedding_cache.get(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+
+        if missing:
+            # Batched requests, a few in flight at once, instead of one per module.
+            fresh = embed_texts(self.llm, list(missing.values()))
+            if fresh is None:
+                return None
+            self.embedding_cache.put(list(missing), fresh)
+            cached.update(zip(missing, fresh))
+            print(f"embedded {len(missing)} of {len(texts)} modules")
+        return np.stack([cached[key] for key in keys])
 
     def retrieve_modules(self, user_prompt: str, top_k: int = 5) -> list[dict]:
         """
@@ -88,12 +400,28 @@ class FaissService(VectorStoreService):
         if not query_embedding:
             print("WARNING: Skipping similarity search (dry run)", file=sys.stderr)
             return None
-        _, indices = self.faiss_index.search(query_vector, top_k)
+        candidates = top_k
+        if self.full_vectors is not None:
+            candidates *= self.options.rerank_factor
+        _, ids = self.faiss_index.search(query_vector, candidates)
+        # -1 pads the results when the index holds fewer than asked for.
+        found = [int(vector_id) for vector_id in ids[0] if vector_id >= 0]
+        if self.full_vectors is not None:
+            found = self._rerank(query_vector[0], found)[:top_k]
 
         results = []
-        for idx in indices[0]:
-            if idx < len(self.module_sources):
-                source = self.module_sources[idx]
+        for vector_id in found:
+            source = self.id_to_source.get(vector_id)
+            if source in self.module_lookup:
                 results.append(self.module_lookup[source])
 
         return self.modules_to_string(results)
+
+    def _rerank(self, query: np.ndarray, found: list[int]) -> list[int]:
+        """Order quantized search results by their exact L2 distance."""
+        if not found:
+            return found
+        vector_ids, vectors = self.full_vectors
+        rows = np.searchsorted(vector_ids, found)
+        distances = ((np.asarray(vectors[rows]) - query) ** 2).sum(axis=1)
+        return [found[i] for i in np.argsort(distances, kind="stable")]
@@ -0,0 +1,64 @@
+from src.services.registry.catalog_files import pack_file_lists, unpack_file_lists
+
+
+def _entry(files):
+    return {"module_name": "vpc", "files": files}
+
+
+def test_pack_stores_changes_against_previous_version():
+    versions = {
+        "v1.2.0": _entry(["a.tf", "b.tf", "c.tf", "d.tf"]),
+        "v1.1.0": _entry(["a.tf", "b.tf", "c.tf"]),
+        "v1.0.0": _entry(["a.tf", "b.tf", "old.tf"]),
+    }
+
+    packed = pack_file_lists(versions)
+
+    assert packed["v1.2.0"] == versions["v1.2.0"]
+    assert packed["v1.1.0"] == {
+        "module_name": "vpc",
+        "files_delta": {"from": "v1.2.0", "added": [], "removed": ["d.tf"]},
+    }
+    assert packed["v1.0.0"]["files_delta"] == {
+        "from": "v1.1.0",
+        "added": ["old.tf"],
+        "removed": ["c.tf"],
+    }
+    assert unpack_file_lists(packed) == versions
+
+
+def test_pack_keeps_full_list_when_delta_is_not_smaller():
+    versions = {
+        "v2.0.0": _entry(["a.tf", "b.tf"]),
+        "v1.0.0": _entry(["x.tf", "y.tf"]),
+    }
+    assert pack_file_lists(versions) == versions
+
+
+def test_pack_keeps_unsorted_lists_as_is():
+    versions = {
+        "v2.0.0": _entry(["a.tf", "b.tf", "c.tf"]),
+        "v1.0.0": _entry(["b.tf", "a.tf", "c.tf"]),
+    }
+    packed = pack_file_lists(versions)
+    assert packed == versions
+    assert unpack_file_lists(packed) == versions
+
+
+def test_unpack_shares_path_strings_between_versions():
+    versions = {
+        "v2.0.0": _entry(["a.tf", "b.tf", "c.tf"]),
+        "v1.0.0": _entry(["a.tf", "b.tf"]),
+    }
+    unpacked = unpack_file_lists(pack_file_lists(versions))
+    assert all(
+        new is old
+        for new, old in zip(unpacked["v1.0.0"]["files"], unpacked["v2.0.0"]["files"])
+    )
+
+
+def test_entries_without_file_lists_pass_through():
+    versions = {"v2.0.0": {"module_name": "vpc"}, "v1.0.0": _entry(["a.tf"])}
+    assert pack_file_lists(versions) == versions
+    assert unpack_file_lists(versions) == versions
+    assert pack_file_lists(["not", "a", "mapping"]) == ["not", "a", "mapping"]
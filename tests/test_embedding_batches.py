@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.vector_store import embedding_batches
+from src.services.vector_store.embedding_batches import (
+    embed_texts,
+    estimate_tokens,
+    plan_batches,
+)
+
+
+class TransientError(Exception):
+    pass
+
+
+def _llm(fail_first=0):
+    llm = MagicMock()
+    llm.RETRYABLE_ERRORS = (TransientError,)
+    calls = []
+
+    def create_embeddings(texts):
+        calls.append(list(texts))
+        if len(calls) <= fail_first:
+            raise TransientError("rate limited")
+        return [[float(len(t)), 1.0] for t in texts]
+
+    llm.create_embeddings.side_effect = create_embeddings
+    return llm, calls
+
+
+def test_plan_batches_respects_input_and_token_limits():
+    texts = ["a" * 30] * 5
+    cost = estimate_tokens(texts[0])
+
+    assert plan_batches(texts, max_tokens=10**6, max_inputs=2) == [
+        range(0, 2),
+        range(2, 4),
+        range(4, 5),
+    ]
+    assert plan_batches(texts, max_tokens=cost * 3, max_inputs=100) == [
+        range(0, 3),
+        range(3, 5),
+    ]
+    # A text over the token limit still gets a batch of its own.
+    assert plan_batches(["a" * 300, "b"], max_tokens=10) == [range(0, 1), range(1, 2)]
+    assert plan_batches([]) == []
+
+
+def test_embed_texts_keeps_order_across_concurrent_batches(monkeypatch):
+    monkeypatch.setattr(
+        embedding_batches, "plan_batches", lambda t: plan_batches(t, max_inputs=3)
+    )
+    llm, calls = _llm()
+    texts = ["x" * n for n in range(1, 11)]
+
+    matrix = embed_texts(llm, texts, concurrency=3)
+
+    assert matrix.dtype == "float32"
+    assert matrix[:, 0].tolist() == list(range(1, 11))
+    assert sorted(len(c) for c in calls) == [1, 3, 3, 3]
+
+
+def test_embed_texts_retries_failed_batch():
+    llm, calls = _llm(fail_first=2)
+    sleeps = []
+
+    matrix = embed_texts(llm, ["a", "bb"], sleep=sleeps.append)
+
+    assert matrix.shape == (2, 2)
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_embed_texts_gives_up_after_max_attempts():
+    llm, calls = _llm(fail_first=5)
+    with pytest.raises(TransientError):
+        embed_texts(llm, ["a"], max_attempts=2, sleep=lambda _s: None)
+    assert len(calls) == 2
+
+
+def test_embed_texts_returns_none_without_embeddings():
+    llm = MagicMock()
+    llm.create_embeddings.return_value = None
+    assert embed_texts(llm, ["a"]) is None
+    assert embed_texts(llm, []) is None
@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.services.vector_store.embedding_cache import EmbeddingCache, embedding_key
+
+
+def _vectors(*values):
+    return np.array([[v, v + 0.5] for v in values], dtype="float32")
+
+
+def test_get_returns_nothing_for_empty_cache(tmp_path):
+    cache = EmbeddingCache(tmp_path, "text-embedding-3-small")
+    assert cache.get([embedding_key("a")]) == {}
+
+
+def test_put_then_get_roundtrip_and_persists(tmp_path):
+    cache = EmbeddingCache(tmp_path, "text-embedding-3-small")
+    cache.put(["k1", "k2"], _vectors(1, 2))
+    cache.put(["k3"], _vectors(3))
+
+    hits = EmbeddingCache(tmp_path, "text-embedding-3-small").get(["k3", "k1", "zz"])
+
+    assert set(hits) == {"k1", "k3"}
+    assert hits["k1"].tolist() == [1.0, 1.5]
+    assert hits["k3"].dtype == np.float32
+
+
+def test_put_replaces_existing_key(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m")
+    cache.put(["k1", "k2"], _vectors(1, 2))
+    cache.put(["k1"], _vectors(9))
+
+    hits = cache.get(["k1", "k2"])
+    assert hits["k1"].tolist() == [9.0, 9.5]
+    assert hits["k2"].tolist() == [2.0, 2.5]
+
+
+def test_models_are_cached_separately(tmp_path):
+    EmbeddingCache(tmp_path, "model/a").put(["k1"], _vectors(1))
+    assert EmbeddingCache(tmp_path, "model/b").get(["k1"]) == {}
+
+
+def test_put_drops_oldest_rows_beyond_max_entries(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m", max_entries=2)
+    cache.put(["k1", "k2"], _vectors(1, 2))
+    cache.put(["k3"], _vectors(3))
+    assert set(cache.get(["k1", "k2", "k3"])) == {"k2", "k3"}
+
+
+def test_mismatched_files_are_ignored(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m")
+    cache.put(["k1", "k2"], _vectors(1, 2))
+    cache.keys_path.write_text('["k1"]')
+
+    assert cache.get(["k1"]) == {}
+    cache.put(["k3"], _vectors(3))
+    assert set(cache.get(["k1", "k3"])) == {"k3"}
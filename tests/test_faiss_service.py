@@ -1,8 +1,14 @@
+import hashlib
 import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from src.services.vector_store.faiss_store import FaissService
+import faiss
+import numpy as np
+import pytest
+
+from src.services.vector_store import faiss_store
+from src.services.vector_store.faiss_store import FaissService, IndexOptions
 
 MOCK_EMBEDDING = [0.1] * 1536
 
@@ -33,7 +39,7 @@ class FakeRegistry:
 _SENTINEL = object()
 
 
-def _build_service(tmp_path, monkeypatch, modules=_SENTINEL):
+def _build_service(tmp_path, monkeypatch, modules=_SENTINEL, **options):
     monkeypatch.setattr(
         "src.services.vector_store.faiss_store.ModuleRegistry", lambda: FakeRegistry()
     )
@@ -46,9 +52,16 @@ def _build_service(tmp_path, monkeypatch, modules=_SENTINEL):
     with patch("src.services.vector_store.faiss_store.OpenAIService") as mock_llm_cls:
         mock_llm = MagicMock()
         mock_llm.create_embedding.return_value = MOCK_EMBEDDING
+        mock_llm.create_embeddings.side_effect = lambda texts: [
+            MOCK_EMBEDDING for _ in texts
+        ]
+        mock_llm.RETRYABLE_ERRORS = ()
+        mock_llm.embedding_model = "test-embedding-model"
         mock_llm_cls.return_value = mock_llm
 
-        service = FaissService(modules, config_dir=tmp_path)
+        service = FaissService(
+            modules, config_dir=tmp_path, options=IndexOptions(**options)
+        )
         service.llm = mock_llm
         return service
 
@@ -109,10 +122,11 @@ def test_create_index_writes_index_to_disk(tmp_path, monkeypatch):
     assert Path(service.index_path).exists()
 
 
-def test_create_index_calls_embedding_per_module(tmp_path, monkeypatch):
+def test_create_index_embeds_modules_in_one_batch(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
     service.create_index()
-    assert service.llm.create_embedding.call_count == len(SAMPLE_MODULES)
+    assert service.llm.create_embedding.call_count == 0
+    service.llm.create_embeddings.assert_called_once_with(service.module_texts)
 
 
 def test_create_index_skips_rebuild_when_index_exists(tmp_path, monkeypatch):
@@ -120,20 +134,32 @@ def test_create_index_skips_rebuild_when_index_exists(tmp_path, monkeypatch):
     service.create_index()
     service.llm.create_embedding.call_count
 
-    service.llm.create_embedding.reset_mock()
+    service.llm.create_embeddings.reset_mock()
     service.create_index()
 
-    assert service.llm.create_embedding.call_count == 0
+    assert service.llm.create_embeddings.call_count == 0
 
 
 def test_create_index_rebuilds_when_force(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
     service.create_index()
 
-    service.llm.create_embedding.reset_mock()
+    service.llm.create_embeddings.reset_mock()
     service.create_index(force=True)
 
-    assert service.llm.create_embedding.call_count == len(SAMPLE_MODULES)
+    # Every module's embedding text is unchanged, so the cache covers them all.
+    assert service.llm.create_embeddings.call_count == 0
+    assert service.faiss_index.ntotal == len(SAMPLE_MODULES)
+
+
+def test_create_index_rebuilds_when_catalog_grew(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch, modules=SAMPLE_MODULES[:1]).create_index()
+
+    service = _build_service(tmp_path, monkeypatch)
+    service.create_index()
+
+    service.llm.create_embeddings.assert_called_once_with(service.module_texts[1:])
+    assert service.faiss_index.ntotal == len(SAMPLE_MODULES)
 
 
 def test_create_index_loads_existing_index_from_disk(tmp_path, monkeypatch):
@@ -154,6 +180,335 @@ def test_create_index_no_modules_does_not_create_index(tmp_path, monkeypatch):
     assert service.faiss_index is None
 
 
+def test_create_index_reembeds_only_changed_modules(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch).create_index()
+
+    changed = [{**SAMPLE_MODULES[0], "version": "1.1.0"}, SAMPLE_MODULES[1]]
+    service = _build_service(tmp_path, monkeypatch, modules=changed)
+    service.create_index(force=True)
+
+    service.llm.create_embeddings.assert_called_once_with(service.module_texts[:1])
+    assert service.faiss_index.ntotal == len(changed)
+
+
+def _distinct_embeddings(service):
+    """Give every text its own vector, so searches tell modules apart."""
+
+    def embed(text):
+        seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).random(8).astype("float32").tolist()
+
+    service.llm.create_embeddings.side_effect = lambda texts: [embed(t) for t in texts]
+    service.llm.create_embedding.side_effect = embed
+    return embed
+
+
+def test_create_index_updates_only_affected_vectors(tmp_path, monkeypatch):
+    first = _build_service(tmp_path, monkeypatch)
+    _distinct_embeddings(first)
+    first.create_index()
+
+    new_module = {**SAMPLE_MODULES[0], "source": "app.terraform.io/my-org/s3/aws"}
+    changed = {**SAMPLE_MODULES[1], "version": "2.1.0"}
+    service = _build_service(tmp_path, monkeypatch, modules=[new_module, changed])
+    _distinct_embeddings(service)
+    service.create_index()
+
+    service.llm.create_embeddings.assert_called_once_with(service.module_texts)
+    assert service.faiss_index.ntotal == 2
+    assert sorted(service.id_to_source.values()) == sorted(
+        [new_module["source"], changed["source"]]
+    )
+
+
+def test_retrieve_modules_maps_ids_after_catalog_shrinks(tmp_path, monkeypatch):
+    first = _build_service(tmp_path, monkeypatch)
+    _distinct_embeddings(first)
+    first.create_index()
+
+    # Drop the first module: row 0 of the old index now belongs to nobody.
+    service = _build_service(tmp_path, monkeypatch, modules=SAMPLE_MODULES[1:])
+    embed = _distinct_embeddings(service)
+    service.create_index()
+    service.llm.create_embedding.side_effect = lambda _p: embed(service.module_texts[0])
+
+    result = json.loads(service.retrieve_modules("create a cluster", top_k=5))
+
+    assert service.llm.create_embeddings.call_count == 0
+    assert [m["source"] for m in result] == [SAMPLE_MODULES[1]["source"]]
+
+
+def test_create_index_rebuilds_when_embedding_model_changes(
+    tmp_path, monkeypatch, capsys
+):
+    _build_service(tmp_path, monkeypatch).create_index()
+
+    service = _build_service(tmp_path, monkeypatch)
+    service.llm.embedding_model = "other-embedding-model"
+    service.create_index()
+
+    assert "rebuilding" in capsys.readouterr().out
+    with open(service.meta_path, encoding="utf-8") as f:
+        assert json.load(f)["model"] == "other-embedding-model"
+
+
+def test_create_index_rebuilds_index_without_id_map(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.create_index()
+    Path(service.meta_path).unlink()
+
+    service = _build_service(tmp_path, monkeypatch)
+    service.create_index()
+
+    assert service.faiss_index.ntotal == len(SAMPLE_MODULES)
+    assert Path(service.meta_path).exists()
+
+
+# ------------------------------
+# index types
+# ------------------------------
+
+
+def _many_modules(count):
+    return [
+        {**SAMPLE_MODULES[0], "source": f"app.terraform.io/my-org/m{i}/aws"}
+        for i in range(count)
+    ]
+
+
+def _search_finds_each_module(service, embed):
+    for text, source in zip(service.module_texts, service.module_sources):
+        service.llm.create_embedding.side_effect = lambda _p, text=text: embed(text)
+        result = json.loads(service.retrieve_modules("q", top_k=1))
+        assert [m["source"] for m in result] == [source]
+
+
+def test_auto_index_type_follows_catalog_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(faiss_store, "AUTO_FLAT_MAX_VECTORS", 50)
+    small = _build_service(tmp_path / "small", monkeypatch, _many_modules(50))
+    _distinct_embeddings(small)
+    small.create_index()
+    assert faiss.try_extract_index_ivf(small.faiss_index) is None
+
+    large = _build_service(tmp_path / "large", monkeypatch, _many_modules(100))
+    embed = _distinct_embeddings(large)
+    large.create_index()
+    ivf = faiss.extract_index_ivf(large.faiss_index)
+    assert ivf.nlist == faiss_store.ivf_list_count(100) == 2
+    assert ivf.nprobe == 2
+    _search_finds_each_module(large, embed)
+
+
+def test_ivf_index_reloads_without_retraining(tmp_path, monkeypatch):
+    modules = _many_modules(80)
+    first = _build_service(tmp_path, monkeypatch, modules, index_type="ivf", nprobe=1)
+    _distinct_embeddings(first)
+    first.create_index()
+
+    service = _build_service(
+        tmp_path, monkeypatch, modules[:70], index_type="ivf", nprobe=1
+    )
+    _distinct_embeddings(service)
+    monkeypatch.setattr(
+        service, "_new_index", lambda *_a: pytest.fail("index was retrained")
+    )
+    service.create_index()
+
+    assert service.faiss_index.ntotal == 70
+    assert faiss.extract_index_ivf(service.faiss_index).nprobe == 1
+    service.options = IndexOptions(index_type="ivf", nprobe=2)
+    service._use_index(service.faiss_index, {})
+    assert faiss.extract_index_ivf(service.faiss_index).nprobe == 2
+
+
+def test_ivf_index_is_retrained_once_catalog_outgrows_it(tmp_path, monkeypatch):
+    first = _build_service(tmp_path, monkeypatch, _many_modules(40), index_type="ivf")
+    _distinct_embeddings(first)
+    first.create_index()
+
+    service = _build_service(
+        tmp_path, monkeypatch, _many_modules(200), index_type="ivf"
+    )
+    _distinct_embeddings(service)
+    service.create_index()
+
+    assert faiss.extract_index_ivf(service.faiss_index).nlist == 5
+    with open(service.meta_path, encoding="utf-8") as f:
+        assert json.load(f)["trained_on"] == 200
+
+
+def test_hnsw_index_rebuilds_when_modules_are_removed(tmp_path, monkeypatch):
+    first = _build_service(tmp_path, monkeypatch, _many_modules(10), index_type="hnsw")
+    _distinct_embeddings(first)
+    first.create_index()
+
+    service = _build_service(
+        tmp_path, monkeypatch, _many_modules(6), index_type="hnsw", ef_search=20
+    )
+    embed = _distinct_embeddings(service)
+    service.create_index()
+
+    assert service.faiss_index.ntotal == 6
+    assert service.llm.create_embeddings.call_count == 0
+    assert faiss.downcast_index(service.faiss_index.index).hnsw.efSearch == 20
+    _search_finds_each_module(service, embed)
+
+
+def test_changing_index_type_rebuilds(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch).create_index()
+
+    service = _build_service(tmp_path, monkeypatch, index_type="hnsw")
+    service.create_index()
+
+    assert faiss.downcast_index(service.faiss_index.index).hnsw is not None
+    assert service.faiss_index.ntotal == len(SAMPLE_MODULES)
+
+
+# ------------------------------
+# encodings and loading
+# ------------------------------
+
+
+def test_sq8_index_reranks_against_full_vectors(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch, _many_modules(20), encoding="sq8")
+    embed = _distinct_embeddings(service)
+    service.create_index()
+
+    codes = faiss.downcast_index(service.faiss_index.index)
+    assert isinstance(codes, faiss.IndexScalarQuantizer)
+    vector_ids, vectors = service.full_vectors
+    assert vectors.shape == (20, 8)
+    for source, text in zip(service.module_sources, service.module_texts):
+        vector_id = next(i for i, s in service.id_to_source.items() if s == source)
+        row = int(np.searchsorted(vector_ids, vector_id))
+        assert np.array_equal(vectors[row], np.float32(embed(text)))
+    _search_finds_each_module(service, embed)
+
+
+def test_pq_encoding_needs_enough_vectors_to_train(tmp_path, monkeypatch):
+    small = _build_service(tmp_path / "small", monkeypatch, encoding="pq")
+    small.create_index()
+    with open(small.meta_path, encoding="utf-8") as f:
+        assert json.load(f)["encoding"] == "sq8"
+
+    monkeypatch.setattr(faiss_store, "PQ_MIN_TRAINING", 256)
+    large = _build_service(
+        tmp_path / "large", monkeypatch, _many_modules(256), encoding="pq"
+    )
+    embed = _distinct_embeddings(large)
+    large.create_index()
+    assert isinstance(faiss.downcast_index(large.faiss_index.index), faiss.IndexPQ)
+    _search_finds_each_module(large, embed)
+
+
+def test_quantized_index_updates_keep_full_vectors_in_step(tmp_path, monkeypatch):
+    modules = _many_modules(20)
+    first = _build_service(tmp_path, monkeypatch, modules, encoding="sq8")
+    _distinct_embeddings(first)
+    first.create_index()
+
+    modules = modules[5:] + [
+        {**SAMPLE_MODULES[1], "source": f"app.terraform.io/my-org/n{i}/aws"}
+        for i in range(3)
+    ]
+    service = _build_service(tmp_path, monkeypatch, modules, encoding="sq8")
+    embed = _distinct_embeddings(service)
+    service.create_index()
+
+    vector_ids, vectors = service.full_vectors
+    assert list(vector_ids) == sorted(service.id_to_source)
+    assert len(vectors) == service.faiss_index.ntotal == 18
+    _search_finds_each_module(service, embed)
+
+
+def test_quantized_index_rebuilds_without_full_vectors(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch, encoding="sq8").create_index()
+
+    service = _build_service(tmp_path, monkeypatch, encoding="sq8")
+    Path(service.vectors_path).unlink()
+    service.create_index()
+
+    service.llm.create_embeddings.assert_not_called()
+    assert Path(service.vectors_path).exists()
+    assert len(service.full_vectors[1]) == len(SAMPLE_MODULES)
+
+
+def test_flat_index_drops_full_vectors(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch, encoding="sq8").create_index()
+
+    service = _build_service(tmp_path, monkeypatch)
+    service.create_index()
+
+    assert service.full_vectors is None
+    assert not Path(service.vectors_path).exists()
+
+
+@pytest.mark.parametrize(
+    "index_type, flag", [("flat", "IO_FLAG_MMAP_IFC"), ("ivf", "IO_FLAG_MMAP")]
+)
+def test_current_index_is_memory_mapped(tmp_path, monkeypatch, index_type, flag):
+    modules = _many_modules(80)
+    first = _build_service(tmp_path, monkeypatch, modules, index_type=index_type)
+    _distinct_embeddings(first)
+    first.create_index()
+
+    reads = []
+    read_index = faiss.read_index
+    monkeypatch.setattr(
+        faiss_store.faiss,
+        "read_index",
+        lambda path, flags=0: reads.append(flags) or read_index(path, flags),
+    )
+    service = _build_service(tmp_path, monkeypatch, modules, index_type=index_type)
+    embed = _distinct_embeddings(service)
+    service.create_index()
+
+    assert reads == [getattr(faiss, flag) | faiss.IO_FLAG_READ_ONLY]
+    _search_finds_each_module(service, embed)
+
+
+def test_index_is_read_into_memory_without_mmap(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch).create_index()
+
+    reads = []
+    read_index = faiss.read_index
+    monkeypatch.setattr(
+        faiss_store.faiss,
+        "read_index",
+        lambda path, flags=0: reads.append(flags) or read_index(path, flags),
+    )
+    _build_service(tmp_path, monkeypatch, mmap=False).create_index()
+
+    assert reads == [0]
+
+
+def test_index_is_read_into_memory_when_faiss_cannot_map_it(tmp_path, monkeypatch):
+    _build_service(tmp_path, monkeypatch).create_index()
+
+    # faiss before 1.11 has no IO_FLAG_MMAP_IFC.
+    monkeypatch.delattr(faiss_store.faiss, "IO_FLAG_MMAP_IFC")
+    reads = []
+    read_index = faiss.read_index
+    monkeypatch.setattr(
+        faiss_store.faiss,
+        "read_index",
+        lambda path, flags=0: reads.append(flags) or read_index(path, flags),
+    )
+    service = _build_service(tmp_path, monkeypatch)
+    service.create_index()
+
+    assert reads == [0]
+    assert service.faiss_index.ntotal == len(SAMPLE_MODULES)
+
+
+def test_create_index_dry_run_skips_index(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.llm.create_embeddings.side_effect = lambda texts: None
+    service.create_index()
+    assert service.faiss_index is None
+    assert not Path(service.index_path).exists()
+
+
 # ------------------------------
 # retrieve_modules
 # ------------------------------
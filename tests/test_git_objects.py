@@ -0,0 +1,76 @@
+import subprocess
+
+import pytest
+
+from src.services.registry.git_objects import (
+    MissingObjectsError,
+    list_tree,
+    missing_objects,
+    read_blobs,
+)
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=str(cwd),
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "modules" / "sub").mkdir(parents=True)
+    _git(repo, "init", "--quiet")
+    (repo / "variables.tf").write_text('variable "region" {}\n')
+    (repo / "modules" / "sub" / "main.tf").write_text('variable "name" {}\n')
+    (repo / "README.md").write_text("# docs\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "--quiet", "-m", "initial")
+    _git(repo, "tag", "v1.0.0")
+    (repo / "variables.tf").write_text('variable "zone" {}\n')
+    _git(repo, "commit", "--quiet", "-am", "second")
+    return repo
+
+
+def test_list_tree_lists_blobs_recursively_at_rev(repo):
+    entries = list_tree(repo, "v1.0.0")
+    assert [e.path for e in entries] == [
+        "README.md",
+        "modules/sub/main.tf",
+        "variables.tf",
+    ]
+    assert all(e.type == "blob" and len(e.sha) == 40 for e in entries)
+
+
+def test_list_tree_unknown_rev_raises(repo):
+    with pytest.raises(subprocess.CalledProcessError):
+        list_tree(repo, "v9.9.9")
+
+
+def test_read_blobs_reads_content_at_rev_without_checkout(repo):
+    old = {e.path: e.sha for e in list_tree(repo, "v1.0.0")}
+    new = {e.path: e.sha for e in list_tree(repo, "HEAD")}
+
+    blobs = read_blobs(repo, [old["variables.tf"], new["variables.tf"]])
+
+    assert blobs[old["variables.tf"]] == b'variable "region" {}\n'
+    assert blobs[new["variables.tf"]] == b'variable "zone" {}\n'
+
+
+def test_read_blobs_raises_for_missing_objects(repo):
+    sha = list_tree(repo, "v1.0.0")[0].sha
+    with pytest.raises(MissingObjectsError) as excinfo:
+        read_blobs(repo, ["0" * 40, sha])
+    assert excinfo.value.shas == ["0" * 40]
+
+
+def test_read_blobs_empty_input_runs_nothing(tmp_path):
+    assert read_blobs(tmp_path / "not-a-repo", []) == {}
+
+
+def test_missing_objects_is_empty_for_full_clone(repo):
+    assert missing_objects(repo, "v1.0.0") == set()
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.services.registry.git_process import run_git
+
+
+def test_run_git_returns_output(tmp_path):
+    result = run_git(["--version"], cwd=tmp_path, stdout=subprocess.PIPE, text=True)
+    assert result.returncode == 0
+    assert result.stdout.startswith("git version")
+
+
+def test_run_git_raises_on_failure(tmp_path):
+    with pytest.raises(subprocess.CalledProcessError):
+        run_git(["rev-parse", "HEAD"], cwd=tmp_path, stderr=subprocess.DEVNULL)
+
+    result = run_git(
+        ["rev-parse", "HEAD"], cwd=tmp_path, stderr=subprocess.DEVNULL, check=False
+    )
+    assert result.returncode != 0
+
+
+def _is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+    except FileNotFoundError:
+        return False
+    return state != "Z"
+
+
+@pytest.mark.skipif(os.name == "nt" or not os.path.isdir("/proc"), reason="needs /proc")
+def test_run_git_timeout_kills_helpers(tmp_path):
+    pid_file = tmp_path / "helper.pid"
+    # A shell alias stands in for a transport helper that git waits on.
+    alias = f"!sh -c 'sleep 30 & echo $! > {pid_file}; wait'"
+
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_git(["-c", f"alias.hang={alias}", "hang"], cwd=tmp_path, timeout=1)
+
+    assert time.monotonic() - start < 10
+    assert not _is_running(int(pid_file.read_text()))
@@ -0,0 +1,55 @@
+from src.services.registry.http_cache import CachedResponse, ResponseCache
+
+URL = "https://app.terraform.io/api/v2/organizations/my-org/registry-modules"
+
+
+def test_staged_responses_are_only_persisted_on_commit(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.stage(URL, CachedResponse(body={"data": []}, etag='"abc"'))
+
+    assert cache.get(URL) is None
+    assert cache.fingerprint() is None
+
+    cache.commit("fp-1")
+
+    reopened = ResponseCache(tmp_path)
+    assert reopened.get(URL) == CachedResponse(body={"data": []}, etag='"abc"')
+    assert reopened.fingerprint() == "fp-1"
+
+
+def test_discard_drops_staged_responses(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.stage(URL, CachedResponse(body={}, last_modified="yesterday"))
+    cache.discard()
+    cache.commit("fp")
+
+    assert cache.get(URL) is None
+    assert cache.fingerprint() == "fp"
+
+
+def test_invalidate_forgets_the_fingerprint(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.stage(URL, CachedResponse(body={}, etag='"abc"'))
+    cache.commit("fp")
+
+    cache.invalidate()
+
+    # Validators stay usable; only the fingerprint is gone.
+    reopened = ResponseCache(tmp_path)
+    assert reopened.get(URL).etag == '"abc"'
+    assert reopened.fingerprint() is None
+
+
+def test_get_ignores_unreadable_entries(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.stage(URL, CachedResponse(body={}, etag="x"))
+    cache.commit("fp")
+    cache._path(URL).write_text("{not json")
+
+    assert cache.get(URL) is None
+
+
+def test_has_validators():
+    assert CachedResponse(body={}, etag="x").has_validators
+    assert CachedResponse(body={}, last_modified="x").has_validators
+    assert not CachedResponse(body={}).has_validators
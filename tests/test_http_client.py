@@ -0,0 +1,214 @@
+import json
+
+import pytest
+import requests
+
+from src.services.registry import http_client
+from src.services.registry.http_cache import CachedResponse
+from src.services.registry.http_client import (
+    RegistryHttpClient,
+    TokenBucket,
+    sized_session,
+)
+
+URL = "https://app.terraform.io/api/v2/organizations/my-org/registry-modules"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append(url)
+        self.headers = headers
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _response(status, body=None, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = URL
+    resp._content = json.dumps(body if body is not None else {}).encode("utf-8")
+    resp.headers.update(headers or {})
+    return resp
+
+
+def _client(responses, clock=None, rate=30.0):
+    clock = clock or FakeClock()
+    session = FakeSession(responses)
+    client = RegistryHttpClient(
+        session,
+        {"Authorization": "Bearer x"},
+        rate=rate,
+        sleep=clock.sleep,
+        clock=clock,
+    )
+    return client, session, clock
+
+
+# ------------------------------
+# TokenBucket
+# ------------------------------
+
+
+def test_token_bucket_allows_a_burst_then_paces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(2.0, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_pause_blocks_until_it_expires():
+    clock = FakeClock()
+    bucket = TokenBucket(10.0, clock=clock, sleep=clock.sleep)
+
+    bucket.pause(3.0)
+    bucket.acquire()
+
+    assert clock.now >= 3.0
+
+
+# ------------------------------
+# RegistryHttpClient
+# ------------------------------
+
+
+def test_get_json_returns_body():
+    client, session, clock = _client([_response(200, {"data": [1]})])
+    assert client.get_json(URL) == {"data": [1]}
+    assert session.calls == [URL]
+    assert clock.sleeps == []
+
+
+def test_get_json_does_not_retry_client_errors():
+    client, session, _ = _client([_response(404), _response(200)])
+
+    with pytest.raises(requests.HTTPError):
+        client.get_json(URL)
+    assert len(session.calls) == 1
+
+
+def test_get_json_retries_server_errors_with_backoff(monkeypatch):
+    monkeypatch.setattr(http_client.random, "uniform", lambda _a, b: b)
+    client, session, clock = _client(
+        [_response(502), requests.ConnectionError("reset"), _response(200, {"ok": 1})]
+    )
+
+    assert client.get_json(URL) == {"ok": 1}
+    assert len(session.calls) == 3
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_get_json_gives_up_after_max_attempts():
+    client, session, _ = _client([_response(503)] * 3)
+
+    with pytest.raises(requests.HTTPError):
+        client.get_json(URL)
+    assert len(session.calls) == 3
+
+
+def test_get_json_honours_retry_after_for_every_thread():
+    client, _, clock = _client(
+        [_response(429, headers={"Retry-After": "7"}), _response(200, {"ok": 1})]
+    )
+
+    assert client.get_json(URL) == {"ok": 1}
+    assert clock.now == pytest.approx(7.0)
+    # The pause lives on the shared bucket, so other callers wait too.
+    assert client.bucket._paused_until == pytest.approx(7.0)
+
+
+def test_get_json_caps_retry_after():
+    client, _, clock = _client(
+        [_response(429, headers={"Retry-After": "3600"}), _response(200)]
+    )
+    client.get_json(URL)
+    assert clock.now == pytest.approx(http_client.RETRY_AFTER_MAX)
+
+
+def test_rate_limit_headers_adjust_the_shared_bucket():
+    headers = {
+        "X-RateLimit-Limit": "5",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "0.8",
+    }
+    client, _, clock = _client([_response(200, headers=headers), _response(200)])
+
+    client.get_json(URL)
+    assert client.bucket.rate == 5.0
+
+    client.get_json(URL)
+    assert clock.now >= 0.8
+
+
+def test_get_conditional_returns_new_validators():
+    client, _, _ = _client(
+        [_response(200, {"data": [1]}, {"ETag": '"v1"', "Last-Modified": "Mon"})]
+    )
+
+    response, modified = client.get_conditional(URL)
+
+    assert modified is True
+    assert response == CachedResponse(
+        body={"data": [1]}, etag='"v1"', last_modified="Mon"
+    )
+
+
+def test_get_conditional_revalidates_and_reuses_cached_body_on_304():
+    cached = CachedResponse(body={"data": [1]}, etag='"v1"', last_modified="Mon")
+    client, session, _ = _client([_response(304)])
+
+    response, modified = client.get_conditional(URL, cached)
+
+    assert (response, modified) == (cached, False)
+    assert session.headers["If-None-Match"] == '"v1"'
+    assert session.headers["If-Modified-Since"] == "Mon"
+
+
+def test_get_conditional_without_validators_sends_plain_request():
+    client, session, _ = _client([_response(200, {"data": []})])
+
+    _, modified = client.get_conditional(URL, CachedResponse(body={"data": [1]}))
+
+    assert modified is True
+    assert "If-None-Match" not in session.headers
+
+
+def test_get_response_returns_raw_response_with_replaced_headers():
+    archive = _response(200)
+    archive._content = b"\x1f\x8b binary"
+    client, session, _ = _client([_response(503), archive])
+
+    resp = client.get_response(URL, headers={})
+
+    assert resp.content == b"\x1f\x8b binary"
+    assert session.headers == {}
+    assert len(session.calls) == 2
+
+
+def test_sized_session_pool_fits_concurrency():
+    session = sized_session(32)
+    assert session.get_adapter("https://example.com")._pool_maxsize == 33
+    assert sized_session(1).get_adapter("https://example.com")._pool_maxsize == (
+        requests.adapters.DEFAULT_POOLSIZE
+    )
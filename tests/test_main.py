@@ -2,6 +2,8 @@ import argparse
 import builtins
 from unittest.mock import MagicMock
 
+import pytest
+
 from src import main
 
 
@@ -50,12 +52,207 @@ def test_run_sync_flag_calls_sync(monkeypatch):
     monkeypatch.setattr(
         main,
         "sync_registry_modules",
-        lambda: called.__setitem__("sync", called["sync"] + 1),
+        lambda _options: called.__setitem__("sync", called["sync"] + 1),
     )
     main.run()
     assert called["sync"] == 1
 
 
+def test_run_sync_passes_concurrency_option(monkeypatch):
+    monkeypatch.setattr(
+        main.sys, "argv", ["terragenai", "--sync", "--concurrency", "8"]
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].concurrency == 8
+    assert received[0].incremental is False
+
+
+def test_run_sync_passes_incremental_option(monkeypatch):
+    monkeypatch.setattr(main.sys, "argv", ["terragenai", "--sync", "--incremental"])
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].incremental is True
+
+
+def test_run_sync_passes_checkout_free_option(monkeypatch):
+    monkeypatch.setattr(main.sys, "argv", ["terragenai", "--sync", "--checkout-free"])
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].checkout_free is True
+
+
+def test_run_sync_passes_partial_clone_and_path_rules(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        [
+            "terragenai",
+            "--sync",
+            "--partial-clone",
+            "--exclude-path",
+            "examples",
+            "--exclude-path",
+            "test",
+        ],
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].partial_clone is True
+    assert received[0].include_paths == ()
+    assert received[0].exclude_paths == ("examples", "test")
+    assert received[0].metadata_sources == ("git",)
+
+
+def test_run_sync_passes_metadata_sources_in_order(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        [
+            "terragenai",
+            "--sync",
+            "--metadata-source",
+            "api",
+            "--metadata-source",
+            "git",
+        ],
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].metadata_sources == ("api", "git")
+
+
+def test_run_sync_passes_parse_cache_size(monkeypatch):
+    monkeypatch.setattr(
+        main.sys, "argv", ["terragenai", "--sync", "--parse-cache-mb", "0"]
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].parse_cache_max_bytes == 0
+
+
+def test_run_sync_passes_parse_worker_options(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        ["terragenai", "--sync", "--parse-processes", "0", "--parse-chunk-size", "8"],
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].parse_processes == 0
+    assert received[0].parse_chunk_size == 8
+
+
+def test_run_sync_plan_only_plans(monkeypatch):
+    monkeypatch.setattr(main.sys, "argv", ["terragenai", "--sync", "--plan"])
+    planned, synced = [], []
+    monkeypatch.setattr(main, "plan_registry_modules", planned.append)
+    monkeypatch.setattr(main, "sync_registry_modules", synced.append)
+    main.run()
+    assert len(planned) == 1
+    assert synced == []
+
+
+def test_run_sync_passes_force(monkeypatch):
+    monkeypatch.setattr(main.sys, "argv", ["terragenai", "--sync", "--force"])
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].force is True
+
+
+def test_run_sync_passes_resume(monkeypatch):
+    monkeypatch.setattr(main.sys, "argv", ["terragenai", "--sync", "--resume"])
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].resume is True
+
+
+def test_run_sync_passes_ordering_options(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        [
+            "terragenai",
+            "--sync",
+            "--order",
+            "recent",
+            "--priority",
+            "vpc",
+            "--priority",
+            "my-org/eks/*",
+            "--publish-interval",
+            "5",
+        ],
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].order == "recent"
+    assert received[0].priority_modules == ("vpc", "my-org/eks/*")
+    assert received[0].publish_interval == 5.0
+
+
+def test_run_sync_passes_module_filters(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        [
+            "terragenai",
+            "--sync",
+            "--namespace",
+            "platform",
+            "--provider",
+            "aws",
+            "--include-module",
+            "vpc*",
+            "--exclude-module",
+            "*-legacy",
+            "--max-versions",
+            "3",
+        ],
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    options = received[0]
+    assert options.namespaces == ("platform",)
+    assert options.providers == ("aws",)
+    assert options.include_modules == ("vpc*",)
+    assert options.exclude_modules == ("*-legacy",)
+    assert options.max_versions == 3
+
+
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_run_sync_rejects_max_versions_below_one(monkeypatch, capsys, value):
+    monkeypatch.setattr(
+        main.sys, "argv", ["terragenai", "--sync", "--max-versions", value]
+    )
+    monkeypatch.setattr(main, "sync_registry_modules", lambda _o: pytest.fail())
+    with pytest.raises(SystemExit):
+        main.run()
+    assert "must be at least 1" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("value,expected", [("120", 120.0), ("0", None)])
+def test_run_sync_passes_git_timeout(monkeypatch, value, expected):
+    monkeypatch.setattr(
+        main.sys, "argv", ["terragenai", "--sync", "--git-timeout", value]
+    )
+    received = []
+    monkeypatch.setattr(main, "sync_registry_modules", received.append)
+    main.run()
+    assert received[0].git_timeout == expected
+
+
 # ------------------------------
 # chat
 # ------------------------------
@@ -97,7 +294,9 @@ def test_chat_round_trip(monkeypatch):
     monkeypatch.setattr(builtins, "input", lambda _prompt="": next(prompts))
     monkeypatch.setattr(main, "SessionService", lambda: _mock_session())
     monkeypatch.setattr(main, "get_registry_service", lambda: _mock_registry())
-    monkeypatch.setattr(main, "FaissService", lambda catalog: _mock_vector_store())
+    monkeypatch.setattr(
+        main, "FaissService", lambda catalog, options=None: _mock_vector_store()
+    )
     monkeypatch.setattr(main, "send_message", lambda prompt, history, vs: "hi there")
     monkeypatch.setattr(main, "print", lambda value: output.append(str(value)))
     main.chat()
@@ -110,7 +309,9 @@ def test_chat_loop_exits_on_quit(monkeypatch):
     monkeypatch.setattr(builtins, "input", lambda _prompt="": next(prompts))
     monkeypatch.setattr(main, "SessionService", lambda: _mock_session())
     monkeypatch.setattr(main, "get_registry_service", lambda: _mock_registry())
-    monkeypatch.setattr(main, "FaissService", lambda catalog: _mock_vector_store())
+    monkeypatch.setattr(
+        main, "FaissService", lambda catalog, options=None: _mock_vector_store()
+    )
     monkeypatch.setattr(main, "send_message", lambda prompt, history, vs: "reply")
     monkeypatch.setattr(main, "print", lambda value: None)
     main.chat()  # should not raise StopIteration
@@ -122,7 +323,9 @@ def test_chat_sends_user_input_to_send_message(monkeypatch):
     monkeypatch.setattr(builtins, "input", lambda _prompt="": next(prompts))
     monkeypatch.setattr(main, "SessionService", lambda: _mock_session())
     monkeypatch.setattr(main, "get_registry_service", lambda: _mock_registry())
-    monkeypatch.setattr(main, "FaissService", lambda catalog: _mock_vector_store())
+    monkeypatch.setattr(
+        main, "FaissService", lambda catalog, options=None: _mock_vector_store()
+    )
     monkeypatch.setattr(
         main,
         "send_message",
@@ -139,7 +342,9 @@ def test_chat_clears_session_on_exit(monkeypatch):
     monkeypatch.setattr(builtins, "input", lambda _prompt="": next(prompts))
     monkeypatch.setattr(main, "SessionService", lambda: mock_session)
     monkeypatch.setattr(main, "get_registry_service", lambda: _mock_registry())
-    monkeypatch.setattr(main, "FaissService", lambda catalog: _mock_vector_store())
+    monkeypatch.setattr(
+        main, "FaissService", lambda catalog, options=None: _mock_vector_store()
+    )
     monkeypatch.setattr(main, "send_message", lambda prompt, history, vs: "reply")
     monkeypatch.setattr(main, "print", lambda value: None)
     main.chat()
@@ -152,7 +357,9 @@ def test_chat_adds_user_and_assistant_messages_to_session(monkeypatch):
     monkeypatch.setattr(builtins, "input", lambda _prompt="": next(prompts))
     monkeypatch.setattr(main, "SessionService", lambda: mock_session)
     monkeypatch.setattr(main, "get_registry_service", lambda: _mock_registry())
-    monkeypatch.setattr(main, "FaissService", lambda catalog: _mock_vector_store())
+    monkeypatch.setattr(
+        main, "FaissService", lambda catalog, options=None: _mock_vector_store()
+    )
     monkeypatch.setattr(main, "send_message", lambda prompt, history, vs: "hi there")
     monkeypatch.setattr(main, "print", lambda value: None)
     main.chat()
@@ -217,3 +424,54 @@ def test_configure_falls_back_to_existing_config(monkeypatch):
     assert saved["TF_ORG"] == "existing-org"
     assert saved["TF_API_TOKEN"] == "existing-token"
     assert saved["OPENAI_API_KEY"] == "existing-key"
+
+
+def test_run_sync_with_orgs_syncs_each_org(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        ["terragenai", "--sync", "--org", "org-a", "--org", "tfe.example.com/org-b"],
+    )
+    received, synced = [], []
+    monkeypatch.setattr(
+        main, "sync_orgs", lambda orgs, options, plan: received.append((orgs, plan))
+    )
+    monkeypatch.setattr(main, "sync_registry_modules", synced.append)
+    main.run()
+    assert received == [(["org-a", "tfe.example.com/org-b"], False)]
+    assert synced == []
+
+
+def test_run_chat_passes_index_options(monkeypatch):
+    monkeypatch.setattr(
+        main.sys, "argv", ["terragenai", "--index-type", "hnsw", "--ef-search", "128"]
+    )
+    received = []
+    monkeypatch.setattr(main, "chat", received.append)
+    main.run()
+    assert received[0].index_type == "hnsw"
+    assert received[0].ef_search == 128
+    assert received[0].nprobe == main.DEFAULT_NPROBE
+    assert received[0].encoding == "flat"
+    assert received[0].mmap is True
+
+
+def test_run_chat_passes_index_encoding_options(monkeypatch):
+    monkeypatch.setattr(
+        main.sys,
+        "argv",
+        [
+            "terragenai",
+            "--index-encoding",
+            "pq",
+            "--rerank-factor",
+            "8",
+            "--no-index-mmap",
+        ],
+    )
+    received = []
+    monkeypatch.setattr(main, "chat", received.append)
+    main.run()
+    assert received[0].encoding == "pq"
+    assert received[0].rerank_factor == 8
+    assert received[0].mmap is False
@@ -0,0 +1,108 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from src.services.registry.module_archive import (
+    ArchiveSource,
+    ModuleArchiveError,
+    archive_source,
+    read_archive,
+)
+
+DOWNLOAD_URL = (
+    "https://app.terraform.io/api/registry/v1/modules/org/vpc/aws/1.0.0/download"
+)
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (
+            "https://archivist.example.com/v1/object/abc.tar.gz?sig=1",
+            ArchiveSource(
+                "https://archivist.example.com/v1/object/abc.tar.gz?sig=1", "tar.gz"
+            ),
+        ),
+        (
+            "/objects/vpc?archive=zip",
+            ArchiveSource("https://app.terraform.io/objects/vpc", "zip"),
+        ),
+        (
+            "https://example.com/vpc.tgz//modules/vpc/",
+            ArchiveSource("https://example.com/vpc.tgz", "tgz", "modules/vpc"),
+        ),
+        ("git::https://github.com/org/vpc.git?ref=v1.0.0", None),
+        ("https://github.com/org/vpc", None),
+        ("s3::https://bucket.s3.amazonaws.com/vpc.zip", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_archive_source(header, expected):
+    assert archive_source(DOWNLOAD_URL, header) == expected
+
+
+def _tarball(files, symlink=None):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        if symlink:
+            info = tarfile.TarInfo(symlink)
+            info.type = tarfile.SYMTYPE
+            info.linkname = "main.tf"
+            tar.addfile(info)
+    return buf.getvalue()
+
+
+def _zipfile(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr("modules/", "")
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+FILES = {
+    "./main.tf": b'variable "a" {}\n',
+    "README.md": b"# vpc\n",
+    "modules/sub/variables.tf": b'variable "b" {}\n',
+    "../escape.tf": b'variable "evil" {}\n',
+}
+
+
+def _is_tf(path):
+    return path.endswith(".tf")
+
+
+@pytest.mark.parametrize(
+    "data,kind",
+    [(_tarball(FILES, symlink="link.tf"), "tar.gz"), (_zipfile(FILES), "zip")],
+)
+def test_read_archive_lists_files_and_reads_wanted_ones(data, kind):
+    files, contents = read_archive(data, ArchiveSource("u", kind), _is_tf)
+
+    assert files == ["main.tf", "README.md", "modules/sub/variables.tf"]
+    assert contents == [
+        ("main.tf", b'variable "a" {}\n'),
+        ("modules/sub/variables.tf", b'variable "b" {}\n'),
+    ]
+
+
+def test_read_archive_scopes_to_subdir():
+    files, contents = read_archive(
+        _tarball(FILES), ArchiveSource("u", "tar.gz", "modules/sub"), _is_tf
+    )
+    assert files == ["variables.tf"]
+    assert contents == [("variables.tf", b'variable "b" {}\n')]
+
+
+@pytest.mark.parametrize("kind", ["tar.gz", "zip"])
+def test_read_archive_rejects_corrupt_data(kind):
+    with pytest.raises(ModuleArchiveError):
+        read_archive(b"not an archive", ArchiveSource("u", kind), _is_tf)
@@ -27,6 +27,10 @@ def test_module_registry_loads_config_and_computed_fields(monkeypatch):
         registry.TF_REGISTRY_MODULES_URL
         == "https://tfe.example.com/api/v2/organizations/my-org/registry-modules"
     )
+    assert (
+        registry.TF_REGISTRY_API_URL
+        == "https://tfe.example.com/api/registry/v1/modules"
+    )
     assert registry.TF_HEADERS["Authorization"] == "Bearer token-123"
 
 
@@ -57,3 +61,37 @@ def test_module_registry_validate_missing_required(monkeypatch, cfg, missing_key
         module_registry.ModuleRegistry()
 
     assert missing_key in str(exc.value)
+
+
+def test_module_registry_takes_org_and_domain_overrides(monkeypatch):
+    monkeypatch.setattr(
+        module_registry,
+        "load_config",
+        lambda: {
+            "TF_ORG": "my-org",
+            "TF_API_TOKEN": "token-123",
+            "TF_API_TOKENS": {"tfe.example.com": "tfe-token"},
+        },
+    )
+
+    registry = module_registry.ModuleRegistry(org="other", domain="tfe.example.com")
+
+    assert registry.TF_ORG == "other"
+    assert registry.TF_REGISTRY_DOMAIN == "tfe.example.com"
+    assert registry.TF_API_TOKEN == "tfe-token"
+    assert "/organizations/other/" in registry.TF_REGISTRY_MODULES_URL
+
+
+def test_registries_for_parses_domain_prefixes(monkeypatch):
+    monkeypatch.setattr(
+        module_registry,
+        "load_config",
+        lambda: {"TF_REGISTRY_DOMAIN": "tfe.example.com", "TF_API_TOKEN": "t"},
+    )
+
+    registries = module_registry.registries_for(["org-a", "app.terraform.io/org-b"])
+
+    assert [(r.TF_REGISTRY_DOMAIN, r.TF_ORG) for r in registries] == [
+        ("tfe.example.com", "org-a"),
+        ("app.terraform.io", "org-b"),
+    ]
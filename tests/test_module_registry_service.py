@@ -1,12 +1,20 @@
+import io
 import json
 import subprocess
+import tarfile
+import threading
+import time
+from dataclasses import replace
 from pathlib import Path
 from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 import requests
 
-from src.services.registry import terraform_registry
+from src.services.registry import terraform_registry, tf_parser
+from src.services.registry.git_objects import list_tree, missing_objects
+from src.services.registry.sync_journal import SyncJournal
 
 
 class FakeRegistry:
@@ -18,6 +26,7 @@ class FakeRegistry:
     TF_REGISTRY_MODULES_URL = (
         "https://app.terraform.io/api/v2/organizations/my-org/registry-modules"
     )
+    TF_REGISTRY_API_URL = "https://app.terraform.io/api/registry/v1/modules"
 
 
 def _build_service(tmp_path, monkeypatch):
@@ -107,6 +116,7 @@ def test_http_get_returns_json_on_success(tmp_path, monkeypatch):
 
 def test_http_get_retries_and_raises_on_failure(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
+    service.http.sleep = lambda _s: None
 
     service.session.get = MagicMock(side_effect=requests.RequestException("timeout"))
 
@@ -118,6 +128,7 @@ def test_http_get_retries_and_raises_on_failure(tmp_path, monkeypatch):
 
 def test_http_get_succeeds_after_retry(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
+    service.http.sleep = lambda _s: None
 
     mock_resp = MagicMock()
     mock_resp.json.return_value = {"data": ["ok"]}
@@ -141,8 +152,8 @@ def test_list_registry_modules_single_page(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
     monkeypatch.setattr(
         service,
-        "_http_get",
-        lambda _url: {"data": [{"id": "a"}, {"id": "b"}], "links": {}},
+        "_get_listing_page",
+        lambda _url: ({"data": [{"id": "a"}, {"id": "b"}], "links": {}}, True),
     )
     modules = service._list_registry_modules()
     assert modules == [{"id": "a"}, {"id": "b"}]
@@ -152,13 +163,109 @@ def test_list_registry_modules_empty_response(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
     monkeypatch.setattr(
         service,
-        "_http_get",
-        lambda _url: {"data": [], "links": {}},
+        "_get_listing_page",
+        lambda _url: ({"data": [], "links": {}}, True),
     )
     modules = service._list_registry_modules()
     assert modules == []
 
 
+def _paged_listing(pages, page_size=2):
+    """Fake _get_listing_page serving TFE-style pages of module ids."""
+    base = FakeRegistry.TF_REGISTRY_MODULES_URL
+    requested = []
+
+    def get_page(url):
+        requested.append(url)
+        query = parse_qs(urlsplit(url).query)
+        number = int(query.get("page[number]", ["1"])[0])
+        page = {
+            "data": [{"id": m} for m in pages[number - 1]],
+            "links": {
+                "next": (
+                    f"{base}?page%5Bnumber%5D={number + 1}&page%5Bsize%5D={page_size}"
+                    if number < len(pages)
+                    else None
+                )
+            },
+            "meta": {
+                "pagination": {
+                    "current-page": number,
+                    "page-size": page_size,
+                    "total-pages": len(pages),
+                }
+            },
+        }
+        return page, True
+
+    return get_page, requested
+
+
+def test_list_registry_modules_fetches_remaining_pages_in_order(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    get_page, requested = _paged_listing([["a", "b"], ["c", "d"], ["e"]])
+    monkeypatch.setattr(service, "_get_listing_page", get_page)
+
+    modules = service._list_registry_modules()
+
+    assert [m["id"] for m in modules] == ["a", "b", "c", "d", "e"]
+    assert requested[0] == FakeRegistry.TF_REGISTRY_MODULES_URL
+    assert sorted(requested[1:]) == [
+        f"{FakeRegistry.TF_REGISTRY_MODULES_URL}?page%5Bnumber%5D=2&page%5Bsize%5D=2",
+        f"{FakeRegistry.TF_REGISTRY_MODULES_URL}?page%5Bnumber%5D=3&page%5Bsize%5D=2",
+    ]
+
+
+def test_list_registry_modules_skips_modules_repeated_across_pages(
+    tmp_path, monkeypatch
+):
+    service = _build_service(tmp_path, monkeypatch)
+    get_page, _ = _paged_listing([["a", "b"], ["b", "c"]])
+    monkeypatch.setattr(service, "_get_listing_page", get_page)
+
+    assert [m["id"] for m in service._list_registry_modules()] == ["a", "b", "c"]
+
+
+def test_list_registry_modules_follows_next_links_without_pagination_meta(
+    tmp_path, monkeypatch
+):
+    service = _build_service(tmp_path, monkeypatch)
+    pages = {
+        FakeRegistry.TF_REGISTRY_MODULES_URL: {
+            "data": [{"id": "a"}],
+            "links": {"next": "https://example.com/page-2"},
+        },
+        "https://example.com/page-2": {"data": [{"id": "b"}], "links": {}},
+    }
+    monkeypatch.setattr(service, "_get_listing_page", lambda url: (pages[url], True))
+
+    assert [m["id"] for m in service._list_registry_modules()] == ["a", "b"]
+
+
+def test_build_catalog_starts_cloning_before_listing_finishes(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    first_module_cloned = threading.Event()
+    get_page, _ = _paged_listing([["vpc"], ["last"]], page_size=1)
+
+    def slow_get_page(url):
+        if "page%5Bnumber%5D=2" in url:
+            # The last page only arrives once the first module is cloning.
+            assert first_module_cloned.wait(timeout=5)
+        return get_page(url)
+
+    def clone_stage(job, _parse_pool, _slots, _registry_results):
+        first_module_cloned.set()
+        return []
+
+    monkeypatch.setattr(service, "_get_listing_page", slow_get_page)
+    monkeypatch.setattr(service, "_module_job", lambda mod, _prev: _stub_job(mod))
+    monkeypatch.setattr(service, "_clone_stage", clone_stage)
+
+    service.build_catalog()
+
+    assert first_module_cloned.is_set()
+
+
 # ------------------------------
 # _build_catalog_entry
 # ------------------------------
@@ -229,27 +336,24 @@ def test_validate_catalog_returns_false_when_missing(tmp_path, monkeypatch):
 # ------------------------------
 
 
-def test_list_repo_files_excludes_git_dir(tmp_path, monkeypatch):
+def test_list_repo_files_reads_the_checked_out_tree(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
+    repo = _tagged_repo(tmp_path / "repo")
+    (repo / "untracked.tf").write_text("resource {}")
 
-    repo = tmp_path / "repo"
-    (repo / ".git" / "objects").mkdir(parents=True)
-    (repo / ".git" / "objects" / "pack").write_text("binary")
-    (repo / "main.tf").write_text("resource {}")
-    (repo / "subdir").mkdir()
-    (repo / "subdir" / "outputs.tf").write_text("output {}")
-
-    files = service._list_repo_files(repo)
-    assert "main.tf" in files
-    assert "subdir/outputs.tf" in files or "subdir\\outputs.tf" in files
-    assert not any(".git" in f for f in files)
+    assert service._list_repo_files(repo) == [
+        "README.md",
+        "modules/extra.tf",
+        "variables.tf",
+    ]
+    assert service._list_repo_files(repo, "v1.0.0") == ["README.md", "variables.tf"]
 
 
-def test_list_repo_files_empty_repo(tmp_path, monkeypatch):
+def test_list_repo_files_unknown_rev_raises(tmp_path, monkeypatch):
     service = _build_service(tmp_path, monkeypatch)
-    repo = tmp_path / "empty_repo"
-    repo.mkdir()
-    assert service._list_repo_files(repo) == []
+    repo = _tagged_repo(tmp_path / "repo")
+    with pytest.raises(subprocess.CalledProcessError):
+        service._list_repo_files(repo, "v9.9.9")
 
 
 # ------------------------------
@@ -336,13 +440,161 @@ def test_parse_tf_variables_ignores_non_tf_files(tmp_path, monkeypatch):
 # ------------------------------
 
 
+def _listing_response(status, body=None, etag='"v1"'):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = FakeRegistry.TF_REGISTRY_MODULES_URL
+    resp._content = json.dumps(body or {}).encode("utf-8")
+    resp.headers["ETag"] = etag
+    return resp
+
+
+def _conditional_service(tmp_path, monkeypatch, responses, **options):
+    service = _service_with_options(tmp_path, monkeypatch, **options)
+    service.http.session = MagicMock()
+    service.http.session.get.side_effect = responses
+    monkeypatch.setattr(service, "_module_job", lambda mod, _prev: _stub_job(mod))
+    cloned = []
+
+    def clone_stage(job, _parse_pool, _slots, _registry_results):
+        cloned.append(job.name)
+        return []
+
+    monkeypatch.setattr(service, "_clone_stage", clone_stage)
+    return service, cloned
+
+
+def test_build_catalog_stops_when_listing_is_not_modified(
+    tmp_path, monkeypatch, capsys
+):
+    listing = {"data": [{"id": "vpc"}], "links": {}}
+    service, cloned = _conditional_service(
+        tmp_path,
+        monkeypatch,
+        [_listing_response(200, listing), _listing_response(304)],
+    )
+
+    service.build_catalog()
+    service.build_catalog()
+
+    assert cloned == ["vpc"]
+    assert service.http.session.get.call_count == 2
+    second_headers = service.http.session.get.call_args_list[1].kwargs["headers"]
+    assert second_headers["If-None-Match"] == '"v1"'
+    assert "nothing to do" in capsys.readouterr().out
+
+
+def test_build_catalog_resyncs_unchanged_listing_when_options_change(
+    tmp_path, monkeypatch
+):
+    listing = {"data": [{"id": "vpc"}], "links": {}}
+    service, cloned = _conditional_service(
+        tmp_path,
+        monkeypatch,
+        [_listing_response(200, listing), _listing_response(304)],
+    )
+    service.build_catalog()
+
+    service.options = terraform_registry.SyncOptions(exclude_paths=("examples",))
+    service.build_catalog()
+
+    assert cloned == ["vpc", "vpc"]
+
+
+def test_build_catalog_force_ignores_cached_listing(tmp_path, monkeypatch):
+    listing = {"data": [{"id": "vpc"}], "links": {}}
+    service, cloned = _conditional_service(
+        tmp_path,
+        monkeypatch,
+        [_listing_response(200, listing), _listing_response(200, listing)],
+    )
+    service.build_catalog()
+
+    service.options = terraform_registry.SyncOptions(force=True)
+    service.build_catalog()
+
+    second_headers = service.http.session.get.call_args_list[1].kwargs["headers"]
+    assert "If-None-Match" not in second_headers
+    assert cloned == ["vpc", "vpc"]
+
+
+def test_build_catalog_keeps_old_validators_after_failed_clone(tmp_path, monkeypatch):
+    listing = {"data": [{"id": "vpc"}], "links": {}}
+    service, cloned = _conditional_service(
+        tmp_path,
+        monkeypatch,
+        [_listing_response(200, listing), _listing_response(200, listing)],
+    )
+
+    def failing_clone_stage(job, _parse_pool, _slots, _registry_results):
+        cloned.append(job.name)
+        service._sync_incomplete.set()
+        return []
+
+    monkeypatch.setattr(service, "_clone_stage", failing_clone_stage)
+    service.build_catalog()
+    service.build_catalog()
+
+    assert service.listing_cache.get(FakeRegistry.TF_REGISTRY_MODULES_URL) is None
+    assert cloned == ["vpc", "vpc"]
+
+
+def test_build_catalog_retries_after_incomplete_forced_sync(tmp_path, monkeypatch):
+    listing = {"data": [{"id": "vpc"}], "links": {}}
+    service, cloned = _conditional_service(
+        tmp_path,
+        monkeypatch,
+        [
+            _listing_response(200, listing),
+            _listing_response(200, listing),
+            _listing_response(304),
+        ],
+    )
+    service.build_catalog()
+
+    clone_stage = service._clone_stage
+
+    def failing_clone_stage(job, *args):
+        service._sync_incomplete.set()
+        return clone_stage(job, *args)
+
+    monkeypatch.setattr(service, "_clone_stage", failing_clone_stage)
+    service.options = terraform_registry.SyncOptions(force=True)
+    service.build_catalog()
+
+    monkeypatch.setattr(service, "_clone_stage", clone_stage)
+    service.options = terraform_registry.SyncOptions()
+    service.build_catalog()
+
+    assert service.listing_cache.fingerprint() == service._sync_fingerprint()
+    assert cloned == ["vpc", "vpc", "vpc"]
+
+
+def _stub_job(mod):
+    return terraform_registry.ModuleJob(
+        name=mod["id"],
+        namespace="my-org",
+        provider="aws",
+        repo_url=f"https://github.com/x/{mod['id']}.git",
+        versions=[],
+        previous={},
+    )
+
+
 def _mock_build_catalog_service(tmp_path, monkeypatch, modules):
     service = _build_service(tmp_path, monkeypatch)
-    monkeypatch.setattr(service, "_list_registry_modules", lambda: modules)
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
     monkeypatch.setattr(service, "_git_clone_repo", lambda _r, _d: None)
-    monkeypatch.setattr(service, "_git_checkout_tag", lambda _d, _t: None)
+    monkeypatch.setattr(
+        service, "_git_resolve_tag", lambda _d, t, repo_url=None: f"sha-{t}"
+    )
+    monkeypatch.setattr(
+        service, "_git_checkout_tag", lambda _d, _t, repo_url=None: None
+    )
     monkeypatch.setattr(service, "_parse_tf_variables", lambda _d: [])
-    monkeypatch.setattr(service, "_list_repo_files", lambda _d: [])
+    monkeypatch.setattr(service, "_list_repo_files", lambda _d, repo_url=None: [])
     monkeypatch.setattr(
         terraform_registry.shutil, "rmtree", lambda _p, ignore_errors=False: None
     )
@@ -437,12 +689,19 @@ def test_build_catalog_skips_version_when_tag_not_found(tmp_path, monkeypatch):
         }
     ]
     service = _build_service(tmp_path, monkeypatch)
-    monkeypatch.setattr(service, "_list_registry_modules", lambda: modules)
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
     monkeypatch.setattr(service, "_git_clone_repo", lambda _r, _d: None)
+    monkeypatch.setattr(
+        service, "_git_resolve_tag", lambda _d, t, repo_url=None: f"sha-{t}"
+    )
     monkeypatch.setattr(
         service,
         "_git_checkout_tag",
-        lambda _d, _t: (_ for _ in ()).throw(subprocess.CalledProcessError(1, "git")),
+        lambda _d, _t, repo_url=None: (_ for _ in ()).throw(
+            subprocess.CalledProcessError(1, "git")
+        ),
     )
     monkeypatch.setattr(
         terraform_registry.shutil, "rmtree", lambda _p, ignore_errors=False: None
@@ -477,16 +736,23 @@ def test_build_catalog_continues_after_clone_failure(tmp_path, monkeypatch):
     ]
 
     service = _build_service(tmp_path, monkeypatch)
-    monkeypatch.setattr(service, "_list_registry_modules", lambda: modules)
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
 
     def selective_clone(repo_url, clone_dir):
         if "bad" in repo_url:
             raise subprocess.CalledProcessError(128, "git")
 
     monkeypatch.setattr(service, "_git_clone_repo", selective_clone)
-    monkeypatch.setattr(service, "_git_checkout_tag", lambda _d, _t: None)
+    monkeypatch.setattr(
+        service, "_git_resolve_tag", lambda _d, t, repo_url=None: f"sha-{t}"
+    )
+    monkeypatch.setattr(
+        service, "_git_checkout_tag", lambda _d, _t, repo_url=None: None
+    )
     monkeypatch.setattr(service, "_parse_tf_variables", lambda _d: [])
-    monkeypatch.setattr(service, "_list_repo_files", lambda _d: [])
+    monkeypatch.setattr(service, "_list_repo_files", lambda _d, repo_url=None: [])
     monkeypatch.setattr(
         terraform_registry.shutil, "rmtree", lambda _p, ignore_errors=False: None
     )
@@ -502,6 +768,368 @@ def test_build_catalog_continues_after_clone_failure(tmp_path, monkeypatch):
     assert "v2.0.0" in data.get("https://github.com/x/good.git", {})
 
 
+def _bad_and_good_modules():
+    return [
+        {
+            "attributes": {
+                "name": name,
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": f"https://github.com/x/{name}.git"},
+                "version-statuses": [{"version": "1.0.0"}],
+            }
+        }
+        for name in ("bad", "good")
+    ]
+
+
+def test_build_catalog_reports_timed_out_modules(tmp_path, monkeypatch, capsys):
+    service = _mock_build_catalog_service(
+        tmp_path, monkeypatch, _bad_and_good_modules()
+    )
+
+    def hanging_clone(repo_url, _clone_dir):
+        if "bad" in repo_url:
+            raise subprocess.TimeoutExpired(["git", "fetch"], 600)
+
+    monkeypatch.setattr(service, "_git_clone_repo", hanging_clone)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["https://github.com/x/bad.git"] == {}
+    assert "v1.0.0" in data["https://github.com/x/good.git"]
+    err = capsys.readouterr().err
+    assert "git timed out for 1 module(s)" in err
+    assert "  my-org/bad/aws" in err
+    assert service._sync_incomplete.is_set()
+
+
+def test_build_catalog_skips_tag_whose_checkout_times_out(
+    tmp_path, monkeypatch, capsys
+):
+    service = _mock_build_catalog_service(
+        tmp_path, monkeypatch, _bad_and_good_modules()
+    )
+
+    def checkout(repo_dir, tag, repo_url=None):
+        raise subprocess.TimeoutExpired(["git", "checkout", tag], 600)
+
+    monkeypatch.setattr(service, "_git_checkout_tag", checkout)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data == {
+        "https://github.com/x/bad.git": {},
+        "https://github.com/x/good.git": {},
+    }
+    assert "git timed out for 2 module(s)" in capsys.readouterr().err
+
+
+def test_with_git_timeout_retries_once_with_longer_timeout(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(git_timeout=10)
+    timeouts = []
+
+    def fetch(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            raise subprocess.TimeoutExpired("git", timeout)
+        return "fetched"
+
+    assert service._with_git_timeout("https://github.com/x/big.git", fetch) == (
+        "fetched"
+    )
+    assert timeouts == [10, 40]
+    # Known large from now on; other repos keep the normal timeout.
+    assert service._git_timeout("https://github.com/x/big.git") == 40
+    assert service._git_timeout("https://github.com/x/small.git") == 10
+
+
+def test_with_git_timeout_gives_up_after_the_longer_timeout(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(git_timeout=10)
+    timeouts = []
+
+    def fetch(timeout):
+        timeouts.append(timeout)
+        raise subprocess.TimeoutExpired("git", timeout)
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        service._with_git_timeout("https://github.com/x/big.git", fetch)
+    with pytest.raises(subprocess.TimeoutExpired):
+        service._with_git_timeout("https://github.com/x/big.git", fetch)
+    assert timeouts == [10, 40, 40]
+
+
+def test_large_repo_gets_longer_timeout_for_every_git_command(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(git_timeout=10)
+    service._large_repos.add("https://github.com/x/big.git")
+    timeouts = []
+
+    def fake_run_git(args, timeout=None, **_kwargs):
+        timeouts.append((args[0], timeout))
+        return subprocess.CompletedProcess(args, 0, "sha-v1.0.0\n", "")
+
+    def fake_list_tree(_repo_dir, _rev, timeout=None):
+        timeouts.append(("ls-tree", timeout))
+        return []
+
+    monkeypatch.setattr(terraform_registry, "run_git", fake_run_git)
+    monkeypatch.setattr(terraform_registry, "list_tree", fake_list_tree)
+    monkeypatch.setattr(service, "_parse_tf_variables", lambda _d: [])
+    job = _stub_job({"id": "big"})
+
+    service._index_version(job, tmp_path, {"version": "1.0.0"})
+
+    assert timeouts == [("rev-parse", 40), ("checkout", 40), ("ls-tree", 40)]
+
+
+def test_git_timeout_none_disables_limit(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(git_timeout=None)
+    assert service._git_timeout("https://github.com/x/big.git") is None
+
+
+def _dated_modules():
+    return [
+        {
+            "attributes": {
+                "name": name,
+                "namespace": "my-org",
+                "provider": "aws",
+                "updated-at": updated_at,
+                "vcs-repo": {"repository-http-url": f"https://github.com/x/{name}.git"},
+                "version-statuses": [{"version": "1.0.0"}],
+            }
+        }
+        for name, updated_at in (
+            ("old", "2023-01-01T00:00:00.000Z"),
+            ("new", "2024-06-01T12:00:00.000Z"),
+            ("undated", None),
+            ("mid", "2023-09-01T00:00:00+00:00"),
+        )
+    ]
+
+
+def _synced_repos(service):
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        return [url.rsplit("/", 1)[-1] for url in json.load(f)]
+
+
+def test_build_catalog_recent_order_syncs_latest_first(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _dated_modules())
+    service.options = terraform_registry.SyncOptions(order="recent")
+    service.build_catalog()
+
+    assert _synced_repos(service) == ["new.git", "mid.git", "old.git", "undated.git"]
+
+
+def test_build_catalog_priority_modules_go_first(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _dated_modules())
+    service.options = terraform_registry.SyncOptions(
+        priority_modules=("mid", "my-org/un*/aws")
+    )
+    service.build_catalog()
+
+    assert _synced_repos(service) == ["mid.git", "undated.git", "old.git", "new.git"]
+
+
+def test_build_catalog_publishes_partial_catalog(tmp_path, monkeypatch):
+    modules = _bad_and_good_modules()
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, modules[::-1])
+    service.options = terraform_registry.SyncOptions(publish_interval=0.01)
+
+    def slow_clone(repo_url, _clone_dir):
+        if "bad" in repo_url:
+            time.sleep(0.3)
+
+    monkeypatch.setattr(service, "_git_clone_repo", slow_clone)
+    written = []
+    write = service._write_catalog_stream
+
+    def record(repos, fingerprint=None):
+        repos = list(repos)
+        written.append([url for url, _ in repos])
+        write(repos, fingerprint)
+
+    monkeypatch.setattr(service, "_write_catalog_stream", record)
+    service.build_catalog()
+
+    assert written[0] == ["https://github.com/x/good.git"]
+    assert written[-1] == [
+        "https://github.com/x/good.git",
+        "https://github.com/x/bad.git",
+    ]
+
+
+def test_partial_catalog_keeps_previous_entries_of_unsynced_repos(
+    tmp_path, monkeypatch
+):
+    service = _build_service(tmp_path, monkeypatch)
+    jobs = [_stub_job({"id": "a"}), _stub_job({"id": "b"})]
+    jobs = [replace(job, versions=[{"version": "1.0.0"}]) for job in jobs]
+    journal = SyncJournal(tmp_path / "journal", "fp")
+    journal.append(
+        "https://github.com/x/a.git",
+        "app.terraform.io/my-org/a/aws",
+        "v1.0.0",
+        {"new": True},
+    )
+    fallback = {
+        "https://github.com/x/a.git": {"v0.9.0": {"old": True}},
+        "https://github.com/x/b.git": {"v0.9.0": {"old": True}},
+        "https://github.com/x/gone.git": {"v0.1.0": {"old": True}},
+        "https://github.com/x/empty.git": {},
+    }
+
+    partial = dict(service._partial_catalog(jobs, journal, fallback))
+    journal.close()
+
+    assert partial == {
+        "https://github.com/x/a.git": {"v1.0.0": {"new": True}},
+        "https://github.com/x/b.git": {"v0.9.0": {"old": True}},
+        "https://github.com/x/gone.git": {"v0.1.0": {"old": True}},
+    }
+
+
+def test_normalize_catalog_skips_repos_without_versions(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    entry = {
+        "module_name": "vpc",
+        "namespace": "my-org",
+        "provider": "aws",
+        "source": "app.terraform.io/my-org/vpc/aws",
+    }
+    inventory = service._normalize_catalog(
+        {
+            "https://github.com/x/bad.git": {},
+            "https://github.com/x/vpc.git": {"v1.0.0": entry},
+        }
+    )
+    assert [m["repo"] for m in inventory] == ["https://github.com/x/vpc.git"]
+
+
+def _filter_modules():
+    return [
+        {
+            "id": f"{namespace}/{name}/{provider}",
+            "attributes": {
+                "name": name,
+                "namespace": namespace,
+                "provider": provider,
+                "vcs-repo": {
+                    "repository-http-url": f"https://github.com/x/{name}-{provider}.git"
+                },
+                "version-statuses": [{"version": "1.0.0"}],
+            },
+        }
+        for namespace, name, provider in (
+            ("my-org", "vpc", "aws"),
+            ("my-org", "vpc", "azurerm"),
+            ("other", "eks", "aws"),
+            ("my-org", "vpc-legacy", "aws"),
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "options,expected",
+    [
+        ({}, ["vpc-aws", "vpc-azurerm", "eks-aws", "vpc-legacy-aws"]),
+        ({"providers": ("aws",)}, ["vpc-aws", "eks-aws", "vpc-legacy-aws"]),
+        ({"namespaces": ("other",)}, ["eks-aws"]),
+        ({"include_modules": ("vpc*",)}, ["vpc-aws", "vpc-azurerm", "vpc-legacy-aws"]),
+        ({"include_modules": ("*/vpc/aws",)}, ["vpc-aws"]),
+        (
+            {"providers": ("aws",), "exclude_modules": ("*-legacy",)},
+            ["vpc-aws", "eks-aws"],
+        ),
+    ],
+)
+def test_build_catalog_applies_module_filters(tmp_path, monkeypatch, options, expected):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _filter_modules())
+    service.options = terraform_registry.SyncOptions(**options)
+    cloned = []
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+    service.build_catalog()
+
+    # Clones run in parallel; only the catalog has a fixed order.
+    assert sorted(url.rsplit("/", 1)[-1][: -len(".git")] for url in cloned) == sorted(
+        expected
+    )
+    assert [r[: -len(".git")] for r in _synced_repos(service)] == expected
+
+
+def test_listing_url_filters_single_provider(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    assert service._listing_url() == FakeRegistry.TF_REGISTRY_MODULES_URL
+
+    service.options = terraform_registry.SyncOptions(providers=("aws",))
+    assert parse_qs(urlsplit(service._listing_url()).query) == {
+        "filter[provider]": ["aws"]
+    }
+
+    service.options = terraform_registry.SyncOptions(providers=("aws", "google"))
+    assert service._listing_url() == FakeRegistry.TF_REGISTRY_MODULES_URL
+
+
+def test_latest_versions_keeps_newest_in_listing_order(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(max_versions=3)
+    versions = [
+        {"version": v}
+        for v in (
+            "1.10.0",
+            "1.9.0",
+            "2.0.0-rc.1",
+            "2.0.0",
+            "not-semver",
+            "1.2.0",
+            "2.0.0-beta.2",
+        )
+    ]
+
+    kept = service._latest_versions(versions)
+
+    assert [v["version"] for v in kept] == ["2.0.0-rc.1", "2.0.0", "2.0.0-beta.2"]
+
+
+def test_version_key_follows_semver_precedence(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    ordered = [
+        "garbage",
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha.beta",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "v1.0.0+build.5",
+        "1.0.1",
+        "1.10.0",
+    ]
+    assert sorted(ordered[::-1], key=service._version_key) == ordered
+
+
+def test_build_catalog_max_versions_limits_synced_tags(tmp_path, monkeypatch):
+    modules = _filter_modules()[:1]
+    modules[0]["attributes"]["version-statuses"] = [
+        {"version": v} for v in ("0.9.0", "1.1.0", "1.0.0")
+    ]
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, modules)
+    service.options = terraform_registry.SyncOptions(max_versions=2)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert list(data["https://github.com/x/vpc-aws.git"]) == ["v1.1.0", "v1.0.0"]
+
+
 def test_build_catalog_multiple_versions_same_repo(tmp_path, monkeypatch):
     modules = [
         {
@@ -526,3 +1154,1190 @@ def test_build_catalog_multiple_versions_same_repo(tmp_path, monkeypatch):
 
     repo_data = data["https://github.com/x/vpc.git"]
     assert set(repo_data.keys()) == {"v1.0.0", "v2.0.0", "v3.0.0"}
+
+
+def test_build_catalog_is_deterministic_under_concurrency(tmp_path, monkeypatch):
+    modules = [
+        {
+            "attributes": {
+                "name": f"mod{i}",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": f"https://github.com/x/m{i}.git"},
+                "version-statuses": [{"version": "2.0.0"}, {"version": "1.0.0"}],
+            }
+        }
+        for i in range(8)
+    ]
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, modules)
+    service.options = terraform_registry.SyncOptions(concurrency=4)
+
+    def slow_first_clone(repo_url, _clone_dir):
+        if repo_url.endswith("m0.git"):
+            time.sleep(0.05)
+
+    monkeypatch.setattr(service, "_git_clone_repo", slow_first_clone)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    assert list(data) == [f"https://github.com/x/m{i}.git" for i in range(8)]
+    for versions in data.values():
+        assert list(versions) == ["v2.0.0", "v1.0.0"]
+
+
+def _shared_repo_modules():
+    return [
+        {
+            "attributes": {
+                "name": name,
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": "https://github.com/x/vpc.git"},
+                "version-statuses": [{"version": "2.0.0"}, {"version": "1.0.0"}],
+            }
+        }
+        for name in ("first", "second")
+    ]
+
+
+def test_build_catalog_later_module_wins_shared_repo(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _shared_repo_modules())
+    service.options = terraform_registry.SyncOptions(concurrency=4)
+    index_version = service._index_version
+
+    def slow_first_module(job, *args):
+        if job.name == "first":
+            # Finish after the later-listed module.
+            time.sleep(0.05)
+        return index_version(job, *args)
+
+    monkeypatch.setattr(service, "_index_version", slow_first_module)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    versions = data["https://github.com/x/vpc.git"]
+    assert list(versions) == ["v2.0.0", "v1.0.0"]
+    assert {v["module_name"] for v in versions.values()} == {"second"}
+
+
+def test_build_catalog_resume_keeps_modules_of_shared_repo_apart(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _shared_repo_modules())
+    journal = SyncJournal(service.journal_path, service._sync_fingerprint())
+    journal.append(
+        "https://github.com/x/vpc.git",
+        "app.terraform.io/my-org/first/aws",
+        "v2.0.0",
+        {"module_name": "first"},
+    )
+    journal.close()
+    checked_out = []
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, tag, repo_url=None: checked_out.append(tag),
+    )
+
+    service.options = terraform_registry.SyncOptions(resume=True)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    versions = data["https://github.com/x/vpc.git"]
+    assert sorted(checked_out) == ["v1.0.0", "v1.0.0", "v2.0.0"]
+    assert {v["module_name"] for v in versions.values()} == {"second"}
+
+
+def _resume_modules():
+    return [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": "https://github.com/x/vpc.git"},
+                "version-statuses": [{"version": "2.0.0"}, {"version": "1.0.0"}],
+            }
+        }
+    ]
+
+
+def _journal_with_v2(service):
+    journal = SyncJournal(service.journal_path, service._sync_fingerprint())
+    journal.append(
+        "https://github.com/x/vpc.git",
+        "app.terraform.io/my-org/vpc/aws",
+        "v2.0.0",
+        {"commit_sha": "old"},
+    )
+    journal.close()
+
+
+def test_build_catalog_resume_skips_journaled_versions(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _resume_modules())
+    _journal_with_v2(service)
+    checked_out = []
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, tag, repo_url=None: checked_out.append(tag),
+    )
+
+    service.options = terraform_registry.SyncOptions(resume=True)
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    versions = data["https://github.com/x/vpc.git"]
+    assert checked_out == ["v1.0.0"]
+    assert list(versions) == ["v2.0.0", "v1.0.0"]
+    assert versions["v2.0.0"] == {"commit_sha": "old"}
+    assert not service.journal_path.exists()
+
+
+def test_build_catalog_without_resume_starts_over(tmp_path, monkeypatch):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _resume_modules())
+    _journal_with_v2(service)
+    checked_out = []
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, tag, repo_url=None: checked_out.append(tag),
+    )
+
+    service.build_catalog()
+
+    assert sorted(checked_out) == ["v1.0.0", "v2.0.0"]
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["https://github.com/x/vpc.git"]["v2.0.0"]["commit_sha"] == "sha-v2.0.0"
+
+
+def test_write_catalog_matches_json_dump(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    catalog = {
+        "https://github.com/x/a.git": {
+            "v1.0.0": {"variables": [{"name": "ü", "default": None}], "files": []},
+            "v0.9.0": {},
+        },
+        "https://github.com/x/empty.git": {},
+    }
+
+    service._write_catalog(catalog)
+
+    assert Path(service.catalog_path).read_text(encoding="utf-8") == json.dumps(
+        catalog, indent=2
+    )
+    service._write_catalog({})
+    assert Path(service.catalog_path).read_text(encoding="utf-8") == "{}"
+
+
+def test_build_catalog_cleans_up_clone_dirs(tmp_path, monkeypatch):
+    modules = [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": "https://github.com/x/vpc.git"},
+                "version-statuses": [{"version": "1.0.0"}],
+            }
+        }
+    ]
+    service = _build_service(tmp_path, monkeypatch)
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
+    monkeypatch.setattr(service, "_git_clone_repo", lambda _r, _d: None)
+    monkeypatch.setattr(
+        service, "_git_resolve_tag", lambda _d, t, repo_url=None: f"sha-{t}"
+    )
+    monkeypatch.setattr(
+        service, "_git_checkout_tag", lambda _d, _t, repo_url=None: None
+    )
+    monkeypatch.setattr(service, "_parse_tf_variables", lambda _d: [])
+    monkeypatch.setattr(service, "_list_repo_files", lambda _d, repo_url=None: [])
+
+    service.build_catalog()
+
+    assert list(Path(service.repo_dir).iterdir()) == []
+
+
+# ------------------------------
+# incremental sync
+# ------------------------------
+
+
+def _incremental_service(tmp_path, monkeypatch, parsed_dirs):
+    modules = [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": "https://github.com/x/vpc.git"},
+                "version-statuses": [{"version": "1.0.0"}, {"version": "1.1.0"}],
+            }
+        }
+    ]
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, modules)
+    service.options = terraform_registry.SyncOptions(incremental=True)
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, tag, repo_url=None: parsed_dirs.append(tag),
+    )
+    monkeypatch.setattr(service, "_parse_tf_variables", lambda _d: [{"name": "fresh"}])
+    monkeypatch.setattr(
+        service.repo_cache,
+        "remote_tags",
+        lambda _url, timeout=None: {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"},
+    )
+    return service
+
+
+def _previous_catalog(service, shas):
+    service._write_catalog(
+        {
+            "https://github.com/x/vpc.git": {
+                tag: service._build_catalog_entry(
+                    module_name="vpc",
+                    namespace="my-org",
+                    provider="aws",
+                    repo_url="https://github.com/x/vpc.git",
+                    tag=tag,
+                    variables=[{"name": "cached"}],
+                    files=["main.tf"],
+                    commit_sha=sha,
+                )
+                for tag, sha in shas.items()
+            }
+        },
+        service._sync_fingerprint(),
+    )
+
+
+def test_build_catalog_records_commit_sha(tmp_path, monkeypatch):
+    service = _incremental_service(tmp_path, monkeypatch, [])
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["https://github.com/x/vpc.git"]["v1.0.0"]["commit_sha"] == "sha-v1.0.0"
+
+
+def test_incremental_sync_reuses_unchanged_tags(tmp_path, monkeypatch):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0"})
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert checked_out == ["v1.1.0"]
+    assert data["v1.0.0"]["variables"] == [{"name": "cached"}]
+    assert data["v1.0.0"]["files"] == ["main.tf"]
+    assert data["v1.1.0"]["variables"] == [{"name": "fresh"}]
+
+
+def test_incremental_sync_reparses_moved_tags(tmp_path, monkeypatch):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+    _previous_catalog(service, {"v1.0.0": "old-sha", "v1.1.0": "sha-v1.1.0"})
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert checked_out == ["v1.0.0"]
+    assert data["v1.0.0"]["variables"] == [{"name": "fresh"}]
+    assert data["v1.0.0"]["commit_sha"] == "sha-v1.0.0"
+
+
+def test_incremental_sync_reparses_when_settings_changed(tmp_path, monkeypatch, capsys):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"})
+    service.options = terraform_registry.SyncOptions(
+        incremental=True, exclude_paths=["examples"]
+    )
+
+    service.build_catalog()
+
+    assert checked_out == ["v1.0.0", "v1.1.0"]
+    assert "Sync settings changed" in capsys.readouterr().out
+    assert service._catalog_fingerprint() == service._sync_fingerprint()
+
+
+def test_incremental_sync_reparses_catalog_without_settings_record(
+    tmp_path, monkeypatch
+):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"})
+    service.catalog_meta_path.unlink()
+
+    service.build_catalog()
+
+    assert checked_out == ["v1.0.0", "v1.1.0"]
+
+
+def test_full_sync_ignores_previous_catalog(tmp_path, monkeypatch):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+    service.options = terraform_registry.SyncOptions(incremental=False)
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"})
+
+    service.build_catalog()
+
+    assert checked_out == ["v1.0.0", "v1.1.0"]
+
+
+def test_incremental_sync_skips_clone_when_remote_tags_are_unchanged(
+    tmp_path, monkeypatch
+):
+    cloned = []
+    service = _incremental_service(tmp_path, monkeypatch, [])
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"})
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert cloned == []
+    assert list(data) == ["v1.0.0", "v1.1.0"]
+    assert data["v1.1.0"]["variables"] == [{"name": "cached"}]
+
+
+def test_incremental_sync_clones_everything_when_ls_remote_fails(
+    tmp_path, monkeypatch, capsys
+):
+    checked_out = []
+    service = _incremental_service(tmp_path, monkeypatch, checked_out)
+
+    def failing_remote_tags(_url, timeout=None):
+        raise subprocess.CalledProcessError(128, ["git", "ls-remote"])
+
+    monkeypatch.setattr(service.repo_cache, "remote_tags", failing_remote_tags)
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "sha-v1.1.0"})
+
+    service.build_catalog()
+
+    # The clone-time commit check still reuses both tags.
+    assert checked_out == []
+    assert "Could not list tags" in capsys.readouterr().err
+
+
+def test_plan_sync_lists_only_changed_repos_and_tags(tmp_path, monkeypatch, capsys):
+    service = _incremental_service(tmp_path, monkeypatch, [])
+    cloned = []
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+    _previous_catalog(service, {"v1.0.0": "sha-v1.0.0", "v1.1.0": "old-sha"})
+
+    plans = service.plan_sync()
+
+    assert cloned == []
+    assert [(p.job.name, p.changed_tags) for p in plans] == [("vpc", ["v1.1.0"])]
+    out = capsys.readouterr().out
+    assert "my-org/vpc/aws: v1.1.0" in out
+    assert "1 of 1 repo(s) would be synced." in out
+    assert "Reused" not in out
+
+
+def test_load_previous_catalog_ignores_corrupt_file(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    Path(service.catalog_dir).mkdir(parents=True, exist_ok=True)
+    Path(service.catalog_path).write_text("{not json", encoding="utf-8")
+    assert service._load_previous_catalog() == {}
+
+
+def test_load_previous_catalog_ignores_non_object_catalog(
+    tmp_path, monkeypatch, capsys
+):
+    service = _build_service(tmp_path, monkeypatch)
+    Path(service.catalog_dir).mkdir(parents=True, exist_ok=True)
+    Path(service.catalog_path).write_text("[1, 2]", encoding="utf-8")
+    assert service._load_previous_catalog() == {}
+    assert "not a JSON object" in capsys.readouterr().err
+
+
+def test_git_resolve_tag_returns_commit_sha(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    def git(*args):
+        return subprocess.run(
+            ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+            cwd=repo,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "--quiet")
+    git("commit", "--quiet", "--allow-empty", "-m", "initial")
+    git("tag", "-a", "v1.0.0", "-m", "release")
+    head = git("rev-parse", "HEAD")
+
+    assert service._git_resolve_tag(repo, "v1.0.0") == head
+    with pytest.raises(subprocess.CalledProcessError):
+        service._git_resolve_tag(repo, "v9.9.9")
+
+
+# ------------------------------
+# checkout-free parsing
+# ------------------------------
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=str(cwd),
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+
+
+def _tagged_repo(path):
+    path.mkdir()
+    _git(path, "init", "--quiet")
+    (path / "variables.tf").write_text(
+        'variable "region" {\n  type = string\n}\n'
+        'variable "env" {\n  type = string\n  default = "dev"\n}\n'
+    )
+    (path / "README.md").write_text('variable "fake" {}')
+    _git(path, "add", ".")
+    _git(path, "commit", "--quiet", "-m", "initial")
+    _git(path, "tag", "v1.0.0")
+    (path / "modules").mkdir()
+    (path / "modules" / "extra.tf").write_text('variable "zone" {}\n')
+    _git(path, "add", ".")
+    _git(path, "commit", "--quiet", "-m", "second")
+    _git(path, "tag", "v1.1.0")
+    return path
+
+
+def test_parse_tag_objects_matches_checkout_parsing(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    repo = _tagged_repo(tmp_path / "upstream")
+    # Declare "region" and "env" again; both paths must keep the same ones.
+    (repo / "examples").mkdir()
+    (repo / "examples" / "main.tf").write_text(
+        'variable "region" {\n  default = "us-east-1"\n}\n'
+    )
+    (repo / "a.tf").write_text('variable "env" {\n  description = "from a.tf"\n}\n')
+    _git(repo, "add", ".")
+    _git(repo, "commit", "--quiet", "-m", "collisions")
+    _git(repo, "tag", "v1.2.0")
+
+    for tag in ("v1.0.0", "v1.1.0", "v1.2.0"):
+        variables, files = service._parse_tag_objects(repo, tag)
+        _git(repo, "checkout", "--quiet", tag)
+        expected = service._parse_tf_variables(repo)
+        assert sorted(variables, key=lambda v: v["name"]) == sorted(
+            expected, key=lambda v: v["name"]
+        )
+        assert sorted(files) == sorted(service._list_repo_files(repo))
+
+
+def test_parse_tag_objects_unknown_tag_raises(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    repo = _tagged_repo(tmp_path / "upstream")
+    with pytest.raises(subprocess.CalledProcessError):
+        service._parse_tag_objects(repo, "v9.9.9")
+
+
+def test_build_catalog_checkout_free_end_to_end(tmp_path, monkeypatch):
+    repo = _tagged_repo(tmp_path / "upstream")
+    repo_url = repo.as_uri()
+    modules = [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": repo_url},
+                "version-statuses": [
+                    {"version": "1.1.0"},
+                    {"version": "1.0.0"},
+                    {"version": "9.9.9"},
+                ],
+            }
+        }
+    ]
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(checkout_free=True)
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, _t, repo_url=None: pytest.fail(
+            "checkout-free sync must not check out tags"
+        ),
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)[repo_url]
+    assert list(data) == ["v1.1.0", "v1.0.0"]
+    assert {v["name"] for v in data["v1.0.0"]["variables"]} == {"region", "env"}
+    assert {v["name"] for v in data["v1.1.0"]["variables"]} == {
+        "region",
+        "env",
+        "zone",
+    }
+    assert "modules/extra.tf" in data["v1.1.0"]["files"]
+    assert data["v1.0.0"]["files_delta"] == {
+        "from": "v1.1.0",
+        "added": [],
+        "removed": ["modules/extra.tf"],
+    }
+    assert service._load_previous_catalog()[repo_url]["v1.0.0"]["files"] == [
+        "README.md",
+        "variables.tf",
+    ]
+    assert [p.name for p in Path(service.repo_dir).iterdir() if p.is_dir()] == [
+        service.repo_cache.mirror_path(repo_url).name
+    ]
+
+
+# ------------------------------
+# path rules / partial clone
+# ------------------------------
+
+
+def _layout_repo(repo):
+    (repo / "examples" / "basic").mkdir(parents=True)
+    (repo / "test").mkdir()
+    (repo / "modules" / "sub").mkdir(parents=True)
+    (repo / "variables.tf").write_text('variable "region" {}\n')
+    (repo / "examples" / "basic" / "main.tf").write_text('variable "example" {}\n')
+    (repo / "test" / "fixture.tf").write_text('variable "fixture" {}\n')
+    (repo / "modules" / "sub" / "variables.tf").write_text('variable "sub" {}\n')
+
+
+def test_parse_tf_variables_applies_exclude_rules(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(
+        exclude_paths=("examples", "test/")
+    )
+    repo = tmp_path / "repo"
+    _layout_repo(repo)
+
+    names = {v["name"] for v in service._parse_tf_variables(repo)}
+    assert names == {"region", "sub"}
+
+
+def test_parse_tf_variables_applies_include_rules(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(include_paths=("modules/*",))
+    repo = tmp_path / "repo"
+    _layout_repo(repo)
+
+    names = {v["name"] for v in service._parse_tf_variables(repo)}
+    assert names == {"sub"}
+
+
+def test_is_tf_path_selected_matches_nested_directory_rules(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    service.options = terraform_registry.SyncOptions(
+        exclude_paths=("modules/*/examples",)
+    )
+    assert service._is_tf_path_selected("modules/a/main.tf")
+    assert not service._is_tf_path_selected("modules/a/examples/main.tf")
+    assert not service._is_tf_path_selected("README.md")
+
+
+def test_build_catalog_partial_clone_only_fetches_selected_tf(tmp_path, monkeypatch):
+    upstream = tmp_path / "upstream"
+    upstream.mkdir()
+    _git(upstream, "init", "--quiet")
+    _git(upstream, "config", "uploadpack.allowfilter", "true")
+    _git(upstream, "config", "uploadpack.allowanysha1inwant", "true")
+    _layout_repo(upstream)
+    (upstream / "docs.png").write_bytes(b"\x89PNG" * 1000)
+    _git(upstream, "add", ".")
+    _git(upstream, "commit", "--quiet", "-m", "initial")
+    _git(upstream, "tag", "v1.0.0")
+    repo_url = upstream.as_uri()
+
+    monkeypatch.setattr(terraform_registry, "ModuleRegistry", lambda: FakeRegistry())
+    monkeypatch.setattr(terraform_registry, "get_config_dir", lambda: tmp_path)
+    service = terraform_registry.ModuleRegistryService(
+        options=terraform_registry.SyncOptions(
+            partial_clone=True, exclude_paths=("examples", "test")
+        )
+    )
+    modules = [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": repo_url},
+                "version-statuses": [{"version": "1.0.0"}],
+            }
+        }
+    ]
+    monkeypatch.setattr(
+        service, "_iter_listing_pages", lambda _pool: iter([({"data": modules}, True)])
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        entry = json.load(f)[repo_url]["v1.0.0"]
+    assert {v["name"] for v in entry["variables"]} == {"region", "sub"}
+    assert "docs.png" in entry["files"]
+
+    mirror = service.repo_cache.mirror_path(repo_url)
+    tree = {e.path: e.sha for e in list_tree(mirror, "v1.0.0")}
+    missing = missing_objects(mirror, "v1.0.0")
+    assert tree["docs.png"] in missing
+    assert tree["examples/basic/main.tf"] in missing
+    assert tree["variables.tf"] not in missing
+    # Only the mirror remains; no temporary checkouts were created.
+    assert [p.name for p in Path(service.repo_dir).iterdir()] == [mirror.name]
+
+
+# ------------------------------
+# registry API metadata source
+# ------------------------------
+
+
+def test_registry_input_to_variable_matches_hcl2_shape(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+
+    required = service._registry_input_to_variable(
+        {
+            "name": "region",
+            "type": "string",
+            "description": "AWS region",
+            "default": "",
+            "required": True,
+        }
+    )
+    optional = service._registry_input_to_variable(
+        {
+            "name": "tags",
+            "type": "map(string)",
+            "description": "",
+            "default": '{"env": "dev"}',
+            "required": False,
+        }
+    )
+
+    assert required == terraform_registry.TerraformVariableMetadata(
+        name="region",
+        type="${string}",
+        description="AWS region",
+        default=None,
+        required=True,
+    )
+    assert optional.type == "${map(string)}"
+    assert optional.default == {"env": "dev"}
+    assert optional.required is False
+
+
+def _api_modules():
+    return [
+        {
+            "attributes": {
+                "name": "vpc",
+                "namespace": "my-org",
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": "https://github.com/x/vpc.git"},
+                "version-statuses": [
+                    {"version": "2.0.0"},
+                    {"version": "1.1.0"},
+                    {"version": "1.0.0"},
+                ],
+            }
+        }
+    ]
+
+
+def _api_service(tmp_path, monkeypatch, sources, known_versions, cloned):
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _api_modules())
+    service.options = terraform_registry.SyncOptions(metadata_sources=sources)
+    requested = []
+
+    def fake_http_get(url):
+        requested.append(url)
+        version = url.rsplit("/", 1)[-1]
+        if version not in known_versions:
+            raise requests.HTTPError("404 Not Found")
+        return {
+            "root": {
+                "inputs": [
+                    {
+                        "name": "region",
+                        "type": "string",
+                        "default": "",
+                        "required": True,
+                    }
+                ]
+            }
+        }
+
+    monkeypatch.setattr(service, "_http_get", fake_http_get)
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+    monkeypatch.setattr(
+        service, "_parse_tf_variables", lambda _d: [{"name": "from-git"}]
+    )
+    return service, requested
+
+
+def test_build_catalog_registry_api_skips_git_entirely(tmp_path, monkeypatch):
+    cloned = []
+    service, requested = _api_service(
+        tmp_path, monkeypatch, ("api", "git"), {"2.0.0", "1.1.0", "1.0.0"}, cloned
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert cloned == []
+    assert sorted(requested) == [
+        "https://app.terraform.io/api/registry/v1/modules/my-org/vpc/aws/1.0.0",
+        "https://app.terraform.io/api/registry/v1/modules/my-org/vpc/aws/1.1.0",
+        "https://app.terraform.io/api/registry/v1/modules/my-org/vpc/aws/2.0.0",
+    ]
+    assert list(data) == ["v2.0.0", "v1.1.0", "v1.0.0"]
+    assert data["v1.0.0"]["variables"][0]["name"] == "region"
+    assert data["v1.0.0"]["files"] == []
+
+
+def test_build_catalog_registry_api_falls_back_to_git(tmp_path, monkeypatch):
+    cloned = []
+    service, _ = _api_service(
+        tmp_path, monkeypatch, ("api", "git"), {"2.0.0", "1.0.0"}, cloned
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert cloned == ["https://github.com/x/vpc.git"]
+    assert list(data) == ["v2.0.0", "v1.1.0", "v1.0.0"]
+    assert data["v1.1.0"]["variables"] == [{"name": "from-git"}]
+    assert data["v2.0.0"]["variables"][0]["name"] == "region"
+
+
+def test_build_catalog_registry_api_only_skips_missing_versions(
+    tmp_path, monkeypatch, capsys
+):
+    cloned = []
+    service, _ = _api_service(tmp_path, monkeypatch, ("api",), {"2.0.0"}, cloned)
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert cloned == []
+    assert list(data) == ["v2.0.0"]
+    assert "No registry metadata for vpc 1.1.0" in capsys.readouterr().err
+
+
+def _tarball(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def _archive_session(archives):
+    """Registry download endpoint plus an archive host, keyed by version."""
+    seen = []
+
+    def get(url, headers=None, timeout=None):
+        seen.append((url, dict(headers or {})))
+        resp = requests.Response()
+        resp.url = url
+        if url.endswith("/download"):
+            version = url.rsplit("/", 2)[-2]
+            resp.status_code = 204
+            if version in archives:
+                location = f"https://archivist.example.com/vpc-{version}.tar.gz"
+            else:
+                location = "git::https://github.com/x/vpc.git"
+            resp.headers["X-Terraform-Get"] = location
+            resp._content = b""
+        else:
+            version = url.rsplit("-", 1)[-1][: -len(".tar.gz")]
+            resp.status_code = 200
+            resp._content = archives[version]
+        return resp
+
+    session = MagicMock()
+    session.get.side_effect = get
+    return session, seen
+
+
+def test_build_catalog_archive_source_parses_in_memory(tmp_path, monkeypatch):
+    cloned = []
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _api_modules())
+    service.options = terraform_registry.SyncOptions(
+        metadata_sources=("archive", "git"), exclude_paths=("examples",)
+    )
+    archive = _tarball(
+        {
+            "main.tf": b'variable "region" {\n  type = string\n}\n',
+            "examples/basic/main.tf": b'variable "example" {}\n',
+            "README.md": b"# vpc\n",
+        }
+    )
+    service.http.session, seen = _archive_session({"2.0.0": archive, "1.1.0": archive})
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+    monkeypatch.setattr(
+        service, "_parse_tf_variables", lambda _d: [{"name": "from-git"}]
+    )
+    checked_out = []
+    monkeypatch.setattr(
+        service,
+        "_git_checkout_tag",
+        lambda _d, tag, repo_url=None: checked_out.append(tag),
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        data = json.load(f)["https://github.com/x/vpc.git"]
+    assert list(data) == ["v2.0.0", "v1.1.0", "v1.0.0"]
+    assert data["v2.0.0"]["variables"] == [
+        {
+            "name": "region",
+            "type": "${string}",
+            "description": None,
+            "default": None,
+            "required": True,
+        }
+    ]
+    assert data["v2.0.0"]["files"] == ["main.tf", "examples/basic/main.tf", "README.md"]
+    assert data["v1.0.0"]["variables"] == [{"name": "from-git"}]
+    assert cloned == ["https://github.com/x/vpc.git"]
+    assert checked_out == ["v1.0.0"]
+    archive_requests = [h for url, h in seen if "archivist" in url]
+    assert len(archive_requests) == 2
+    assert all("Authorization" not in h for h in archive_requests)
+    download_requests = [h for url, h in seen if url.endswith("/download")]
+    assert all(h["Authorization"] == "Bearer token-123" for h in download_requests)
+
+
+def _vcsless_modules():
+    modules = _api_modules()
+    modules[0]["attributes"]["vcs-repo"] = None
+    return modules
+
+
+def test_build_catalog_archive_source_syncs_modules_without_vcs(
+    tmp_path, monkeypatch, capsys
+):
+    cloned = []
+    service = _mock_build_catalog_service(tmp_path, monkeypatch, _vcsless_modules())
+    service.options = terraform_registry.SyncOptions(
+        metadata_sources=("archive", "git")
+    )
+    archive = _tarball({"main.tf": b'variable "region" {}\n'})
+    service.http.session, _ = _archive_session({"2.0.0": archive, "1.1.0": archive})
+    monkeypatch.setattr(
+        service, "_git_clone_repo", lambda repo_url, _d: cloned.append(repo_url)
+    )
+
+    service.build_catalog()
+
+    with open(service.catalog_path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    assert list(catalog) == ["app.terraform.io/my-org/vpc/aws"]
+    data = catalog["app.terraform.io/my-org/vpc/aws"]
+    assert list(data) == ["v2.0.0", "v1.1.0"]
+    assert data["v2.0.0"]["vcs_available"] is False
+    assert data["v2.0.0"]["vcs_link"] == (
+        "https://app.terraform.io/app/my-org/registry/modules/private/"
+        "my-org/vpc/aws/2.0.0"
+    )
+    assert data["v2.0.0"]["variables"][0]["name"] == "region"
+    assert cloned == []
+    assert "No registry metadata for vpc 1.0.0" in capsys.readouterr().err
+
+
+def test_module_job_skips_modules_without_vcs_for_git_only_syncs(
+    tmp_path, monkeypatch, capsys
+):
+    service = _build_service(tmp_path, monkeypatch)
+
+    assert service._module_job(_vcsless_modules()[0], {}) is None
+    assert "Skipping vpc: no VCS repo" in capsys.readouterr().err
+
+    service.options = terraform_registry.SyncOptions(metadata_sources=("api",))
+    job = service._module_job(_vcsless_modules()[0], {})
+    assert job.repo_url == "app.terraform.io/my-org/vpc/aws"
+    assert job.vcs_available is False
+
+
+# ------------------------------
+# parse cache
+# ------------------------------
+
+
+def _count_parses(monkeypatch):
+    calls = []
+    real_extract = tf_parser.extract_tf_variables
+
+    def counting_extract(data, *args, **kwargs):
+        calls.append(data)
+        return real_extract(data, *args, **kwargs)
+
+    monkeypatch.setattr(tf_parser, "extract_tf_variables", counting_extract)
+    return calls
+
+
+def test_parse_tf_variables_parses_identical_content_once(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    calls = _count_parses(monkeypatch)
+    content = 'variable "region" {\n  type = string\n}\n'
+
+    results = []
+    for i in range(40):
+        repo = tmp_path / f"checkout-{i}"
+        repo.mkdir()
+        (repo / "variables.tf").write_text(content)
+        results.append(service._parse_tf_variables(repo))
+
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert results[0][0]["name"] == "region"
+
+
+def test_parse_cache_is_shared_between_checkout_and_object_paths(tmp_path, monkeypatch):
+    service = _build_service(tmp_path, monkeypatch)
+    repo = _tagged_repo(tmp_path / "upstream")
+    _git(repo, "checkout", "--quiet", "v1.1.0")
+    expected = service._parse_tf_variables(repo)
+
+    calls = _count_parses(monkeypatch)
+    variables, _ = service._parse_tag_objects(repo, "v1.1.0")
+
+    assert calls == []
+    assert sorted(variables, key=lambda v: v["name"]) == sorted(
+        expected, key=lambda v: v["name"]
+    )
+
+
+def test_parse_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(terraform_registry, "ModuleRegistry", lambda: FakeRegistry())
+    monkeypatch.setattr(terraform_registry, "get_config_dir", lambda: tmp_path)
+    service = terraform_registry.ModuleRegistryService(
+        options=terraform_registry.SyncOptions(parse_cache_max_bytes=0)
+    )
+    calls = _count_parses(monkeypatch)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "variables.tf").write_text('variable "region" {}\n')
+
+    service._parse_tf_variables(repo)
+    service._parse_tf_variables(repo)
+
+    assert service.parse_cache is None
+    assert len(calls) == 2
+
+
+# ------------------------------
+# parse worker processes
+# ------------------------------
+
+
+def _service_with_options(tmp_path, monkeypatch, **options):
+    monkeypatch.setattr(terraform_registry, "ModuleRegistry", lambda: FakeRegistry())
+    monkeypatch.setattr(terraform_registry, "get_config_dir", lambda: tmp_path)
+    return terraform_registry.ModuleRegistryService(
+        options=terraform_registry.SyncOptions(**options)
+    )
+
+
+def test_parse_blobs_in_worker_processes_matches_serial(tmp_path, monkeypatch):
+    blobs = {
+        f"sha{i}": f'variable "v{i}" {{\n  default = {i}\n}}\n'.encode()
+        for i in range(10)
+    }
+    serial = _service_with_options(
+        tmp_path / "serial", monkeypatch, parse_processes=0, parse_cache_max_bytes=0
+    )
+    pooled = _service_with_options(
+        tmp_path / "pooled",
+        monkeypatch,
+        parse_processes=2,
+        parse_chunk_size=3,
+        parse_cache_max_bytes=0,
+    )
+
+    with pooled._parse_worker_pool():
+        assert pooled._parse_executor is not None
+        parsed = pooled._parse_blobs(blobs)
+    assert pooled._parse_executor is None
+
+    assert parsed == serial._parse_blobs(blobs)
+    assert list(parsed) == list(blobs)
+
+
+def test_parse_worker_pool_zero_processes_parses_serially(tmp_path, monkeypatch):
+    service = _service_with_options(tmp_path, monkeypatch, parse_processes=0)
+    calls = _count_parses(monkeypatch)
+
+    with service._parse_worker_pool():
+        assert service._parse_executor is None
+        parsed = service._parse_blobs({"abc": b'variable "region" {}\n'})
+
+    assert len(calls) == 1
+    assert parsed["abc"][0]["name"] == "region"
+
+
+def test_parse_blobs_falls_back_to_serial_when_pool_breaks(
+    tmp_path, monkeypatch, capsys
+):
+    service = _service_with_options(tmp_path, monkeypatch, parse_cache_max_bytes=0)
+
+    class BrokenExecutor:
+        def submit(self, fn, *args):
+            future = terraform_registry.Future()
+            future.set_exception(terraform_registry.BrokenProcessPool("died"))
+            return future
+
+    service._parse_executor = BrokenExecutor()
+    parsed = service._parse_blobs({"abc": b'variable "region" {}\n'})
+
+    assert parsed["abc"][0]["name"] == "region"
+    assert service._parse_executor is None
+    assert "parsing serially" in capsys.readouterr().err
+
+
+# ------------------------------
+# several orgs in one sync
+# ------------------------------
+
+
+def _org_registry(org, domain="app.terraform.io", token="token-123"):
+    registry = FakeRegistry()
+    registry.TF_ORG = org
+    registry.TF_REGISTRY_DOMAIN = domain
+    registry.TF_API_TOKEN = token
+    registry.TF_HEADERS = {"Authorization": f"Bearer {token}"}
+    registry.TF_REGISTRY_MODULES_URL = (
+        f"https://{domain}/api/v2/organizations/{org}/registry-modules"
+    )
+    return registry
+
+
+def test_org_services_share_session_caches_and_mirrors(tmp_path):
+    registries = [
+        _org_registry("org-a"),
+        _org_registry("org-b"),
+        _org_registry("org-c", domain="tfe.example.com", token="other"),
+    ]
+    services = terraform_registry.org_services(
+        registries, terraform_registry.SyncOptions(), config_dir=tmp_path
+    )
+
+    a, b, c = services
+    assert a.session is b.session is c.session
+    assert a.http is b.http
+    assert c.http is not a.http
+    assert a.repo_cache is b.repo_cache is c.repo_cache
+    assert a.repo_cache.root == tmp_path / "registry-repos"
+    assert a.parse_cache is b.parse_cache is c.parse_cache
+    assert [Path(s.catalog_path) for s in services] == [
+        tmp_path / org / "catalog" / "modules.json"
+        for org in ("org-a", "org-b", "org-c")
+    ]
+    assert a.options.parse_processes >= 1
+
+
+def test_org_services_rejects_orgs_with_the_same_name(tmp_path):
+    registries = [_org_registry("org-a"), _org_registry("org-a", "tfe.example.com")]
+    with pytest.raises(ValueError, match="org-a"):
+        terraform_registry.org_services(registries, config_dir=tmp_path)
+
+
+def test_build_catalogs_syncs_orgs_concurrently_from_one_mirror(tmp_path, monkeypatch):
+    repo = _tagged_repo(tmp_path / "upstream")
+    repo_url = repo.as_uri()
+    services = terraform_registry.org_services(
+        [_org_registry("org-a"), _org_registry("org-b")],
+        terraform_registry.SyncOptions(
+            checkout_free=True, parse_processes=0, publish_interval=0
+        ),
+        config_dir=tmp_path / "config",
+    )
+    both_listing = threading.Barrier(2, timeout=10)
+
+    def listing(org):
+        def pages(_pool):
+            # Neither org finishes listing before the other has started.
+            both_listing.wait()
+            module = {
+                "name": "vpc",
+                "namespace": org,
+                "provider": "aws",
+                "vcs-repo": {"repository-http-url": repo_url},
+                "version-statuses": [{"version": "1.0.0"}],
+            }
+            return iter([({"data": [{"attributes": module}]}, True)])
+
+        return pages
+
+    for service in services:
+        monkeypatch.setattr(
+            service, "_iter_listing_pages", listing(service.registry.TF_ORG)
+        )
+
+    terraform_registry.build_catalogs(services)
+
+    for service in services:
+        with open(service.catalog_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)[repo_url]["v1.0.0"]
+        assert entry["namespace"] == service.registry.TF_ORG
+        assert {v["name"] for v in entry["variables"]} == {"region", "env"}
+    mirrors = [p for p in (tmp_path / "config" / "registry-repos").iterdir()]
+    assert [p.name for p in mirrors if p.is_dir()] == [
+        services[0].repo_cache.mirror_path(repo_url).name
+    ]
+
+
+def test_build_catalogs_finishes_other_orgs_before_raising(tmp_path, capsys):
+    services = terraform_registry.org_services(
+        [_org_registry("org-a"), _org_registry("org-b")], config_dir=tmp_path
+    )
+    built = []
+
+    def fail():
+        raise RuntimeError("listing failed")
+
+    services[0].build_catalog = fail
+    services[1].build_catalog = lambda: built.append("org-b")
+
+    with pytest.raises(RuntimeError, match="listing failed"):
+        terraform_registry.build_catalogs(services)
+
+    assert built == ["org-b"]
+    assert "ERROR: Sync failed for org org-a: listing failed" in capsys.readouterr().err
@@ -97,6 +97,28 @@ def test_create_embedding_returns_list_of_floats(monkeypatch):
     assert all(isinstance(v, float) for v in result)
 
 
+def test_create_embeddings_sends_one_request_and_keeps_input_order(monkeypatch):
+    service = _build_service(monkeypatch, dry_run="false")
+    service.client.embeddings.create.return_value = MagicMock(
+        data=[
+            MagicMock(index=1, embedding=[0.2]),
+            MagicMock(index=0, embedding=[0.1]),
+        ]
+    )
+
+    result = service.create_embeddings(["first", "second"])
+
+    assert result == [[0.1], [0.2]]
+    service.client.embeddings.create.assert_called_once_with(
+        model="text-embedding-3-small", input=["first", "second"]
+    )
+
+
+def test_create_embeddings_returns_none_when_dry_run(monkeypatch):
+    service = _build_service(monkeypatch, dry_run="true")
+    assert service.create_embeddings(["some text"]) is None
+
+
 # ------------------------------
 # generate
 # ------------------------------
@@ -0,0 +1,74 @@
+import os
+import subprocess
+
+from src.services.registry import parse_cache
+from src.services.registry.parse_cache import ParseCache, git_blob_sha
+
+VARIABLES = [
+    {
+        "name": "region",
+        "type": "${string}",
+        "description": None,
+        "default": None,
+        "required": True,
+    }
+]
+
+
+def test_git_blob_sha_matches_git_hash_object(tmp_path):
+    path = tmp_path / "variables.tf"
+    path.write_bytes(b'variable "region" {}\n')
+    expected = subprocess.run(
+        ["git", "hash-object", str(path)], check=True, stdout=subprocess.PIPE, text=True
+    ).stdout.strip()
+    assert git_blob_sha(path.read_bytes()) == expected
+
+
+def test_get_returns_none_on_miss(tmp_path):
+    cache = ParseCache(tmp_path)
+    assert cache.get("a" * 40) is None
+
+
+def test_put_then_get_roundtrip_and_persists(tmp_path):
+    cache = ParseCache(tmp_path)
+    cache.put("a" * 40, VARIABLES)
+    cache.put("b" * 40, [])
+
+    reopened = ParseCache(tmp_path)
+    assert reopened.get("a" * 40) == VARIABLES
+    assert reopened.get("b" * 40) == []
+
+
+def test_entries_are_namespaced_by_parser_version(tmp_path, monkeypatch):
+    ParseCache(tmp_path).put("a" * 40, VARIABLES)
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_FORMAT", 999)
+    assert ParseCache(tmp_path).get("a" * 40) is None
+
+
+def test_eviction_keeps_cache_under_bound_and_drops_least_recent(tmp_path):
+    entry_size = len(parse_cache.json.dumps(VARIABLES))
+    cache = ParseCache(tmp_path, max_bytes=entry_size * 3)
+    shas = [c * 40 for c in "abcd"]
+    for i, sha in enumerate(shas[:3]):
+        cache.put(sha, VARIABLES)
+        os.utime(cache._path(sha), (1000 + i, 1000 + i))
+    cache.get(shas[0])  # most recently used now
+
+    cache.put(shas[3], VARIABLES)
+
+    assert cache._size <= entry_size * 3
+    assert cache.get(shas[1]) is None
+    assert cache.get(shas[0]) == VARIABLES
+    assert cache.get(shas[3]) == VARIABLES
+
+
+def test_size_is_measured_on_first_put(tmp_path):
+    ParseCache(tmp_path).put("a" * 40, VARIABLES)
+
+    cache = ParseCache(tmp_path)
+    assert cache._size is None
+    cache.get("a" * 40)
+    assert cache._size is None
+
+    cache.put("b" * 40, VARIABLES)
+    assert cache._size == 2 * len(parse_cache.json.dumps(VARIABLES))
@@ -1,6 +1,8 @@
 from pathlib import Path
 from types import SimpleNamespace
 
+import pytest
+
 from src import paths
 
 
@@ -85,3 +87,27 @@ def test_ensure_dir_creates_directory(tmp_path):
 
     assert new_dir.exists()
     assert returned == new_dir
+
+
+def test_atomic_replace_swaps_in_the_written_file(tmp_path):
+    target = tmp_path / "data.json"
+    target.write_text("old")
+
+    with paths.atomic_replace(target) as tmp_name:
+        Path(tmp_name).write_text("new")
+        assert target.read_text() == "old"
+
+    assert target.read_text() == "new"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_atomic_replace_keeps_the_old_file_when_writing_fails(tmp_path):
+    target = tmp_path / "data.json"
+    target.write_text("old")
+
+    with pytest.raises(OSError), paths.atomic_replace(target) as tmp_name:
+        Path(tmp_name).write_text("partial")
+        raise OSError("disk full")
+
+    assert target.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [target]
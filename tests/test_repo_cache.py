@@ -0,0 +1,308 @@
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.services.registry import repo_cache
+from src.services.registry.git_objects import missing_objects
+from src.services.registry.repo_cache import (
+    GitVersionError,
+    RepoCache,
+    RepoCacheLockTimeout,
+)
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=str(cwd), check=True, stdout=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git(repo, "init", "--quiet")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    (repo / "variables.tf").write_text('variable "region" {}\n')
+    _git(repo, "add", ".")
+    _git(repo, "commit", "--quiet", "-m", "initial")
+    _git(repo, "tag", "v1.0.0")
+    return repo
+
+
+def _tags(git_dir):
+    out = subprocess.run(
+        ["git", "--git-dir", str(git_dir), "tag"],
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout
+    return out.split()
+
+
+def _cache(tmp_path):
+    return RepoCache(tmp_path / "registry-repos", lambda url: url)
+
+
+# ------------------------------
+# mirror_path
+# ------------------------------
+
+
+def test_mirror_path_is_stable_and_unique_per_url(tmp_path):
+    cache = _cache(tmp_path)
+    a = cache.mirror_path("https://github.com/x/vpc.git")
+    assert a == cache.mirror_path("https://github.com/x/vpc.git")
+    assert a != cache.mirror_path("https://github.com/y/vpc.git")
+    assert a.name.startswith("vpc-") and a.name.endswith(".git")
+
+
+# ------------------------------
+# git version
+# ------------------------------
+
+
+def test_parse_git_version_reads_vendor_builds():
+    assert repo_cache.parse_git_version("git version 2.39.5\n") == (2, 39)
+    assert repo_cache.parse_git_version("git version 2.45.1.windows.1") == (2, 45)
+    apple = "git version 2.31.0 (Apple Git-130)"
+    assert repo_cache.parse_git_version(apple) == (2, 31)
+
+
+def test_repo_cache_rejects_git_older_than_2_31(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_cache, "git_version", lambda: (2, 30))
+
+    with pytest.raises(GitVersionError, match="git 2.31 or newer, found git 2.30"):
+        _cache(tmp_path)
+
+
+# ------------------------------
+# checkout / update
+# ------------------------------
+
+
+def test_checkout_creates_mirror_and_working_clone(tmp_path, upstream):
+    cache = _cache(tmp_path)
+    url = upstream.as_uri()
+
+    cache.checkout(url, tmp_path / "work")
+
+    assert _tags(cache.mirror_path(url)) == ["v1.0.0"]
+    _git(tmp_path / "work", "checkout", "--quiet", "v1.0.0")
+    assert (tmp_path / "work" / "variables.tf").exists()
+
+
+def test_checkout_fetches_new_tags_into_existing_mirror(tmp_path, upstream):
+    cache = _cache(tmp_path)
+    url = upstream.as_uri()
+    cache.checkout(url, tmp_path / "work1")
+    marker = cache.mirror_path(url) / "objects" / "marker"
+    marker.write_text("kept")
+
+    (upstream / "main.tf").write_text("# new\n")
+    _git(upstream, "add", ".")
+    _git(upstream, "commit", "--quiet", "-m", "second")
+    _git(upstream, "tag", "v1.1.0")
+
+    cache.checkout(url, tmp_path / "work2")
+
+    assert marker.exists()  # mirror was updated in place, not re-cloned
+    assert _tags(cache.mirror_path(url)) == ["v1.0.0", "v1.1.0"]
+    assert _tags(tmp_path / "work2" / ".git") == ["v1.0.0", "v1.1.0"]
+
+
+def test_mirror_config_does_not_store_credentials(tmp_path, upstream):
+    url = upstream.as_uri()
+    cache = RepoCache(tmp_path / "registry-repos", lambda u: u)
+    cache.checkout(url, tmp_path / "work")
+
+    config = (cache.mirror_path(url) / "config").read_text()
+    assert f"url = {url}" in config
+    assert '[remote "origin"]' not in config
+
+
+def test_git_env_points_origin_at_clone_url(tmp_path):
+    cache = RepoCache(tmp_path / "registry-repos", lambda u: u + "?token")
+    env = cache.git_env("https://github.com/x/vpc.git")
+    index = int(env["GIT_CONFIG_COUNT"]) - 1
+    assert env[f"GIT_CONFIG_KEY_{index}"] == "remote.origin.url"
+    assert env[f"GIT_CONFIG_VALUE_{index}"] == "https://github.com/x/vpc.git?token"
+
+
+def _partial_upstream(upstream):
+    _git(upstream, "config", "uploadpack.allowfilter", "true")
+    _git(upstream, "config", "uploadpack.allowanysha1inwant", "true")
+    return upstream.as_uri()
+
+
+def test_partial_mirror_fetches_blobs_on_demand(tmp_path, upstream):
+    url = _partial_upstream(upstream)
+    cache = RepoCache(tmp_path / "registry-repos", lambda u: u, partial=True)
+
+    mirror = cache.update(url)
+    sha = subprocess.run(
+        ["git", "--git-dir", str(mirror), "rev-parse", "v1.0.0:variables.tf"],
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+    assert sha in missing_objects(mirror, "v1.0.0")
+
+    cache.prefetch_blobs(url, mirror, [sha])
+
+    assert missing_objects(mirror, "v1.0.0") == set()
+
+
+def test_switching_from_partial_to_full_mirrors_checks_out_files(tmp_path, upstream):
+    url = _partial_upstream(upstream)
+    root = tmp_path / "registry-repos"
+    partial = RepoCache(root, lambda u: u, partial=True)
+    partial.update(url)
+
+    full = RepoCache(root, lambda u: u)
+    clone_dir = tmp_path / "work"
+    full.checkout(url, clone_dir)
+    _git(clone_dir, "checkout", "--quiet", "v1.0.0")
+
+    assert full.mirror_path(url) != partial.mirror_path(url)
+    assert (clone_dir / "variables.tf").read_text() == 'variable "region" {}\n'
+
+
+def test_full_cache_recreates_blobless_mirror_at_its_path(tmp_path, upstream, capsys):
+    url = _partial_upstream(upstream)
+    root = tmp_path / "registry-repos"
+    full = RepoCache(root, lambda u: u)
+    # A blobless mirror written where full mirrors now live.
+    partial = RepoCache(root, lambda u: u, partial=True)
+    partial.mirror_path = full.mirror_path
+    partial.update(url)
+
+    mirror = full.update(url)
+
+    assert missing_objects(mirror, "v1.0.0") == set()
+    assert "is blobless, re-cloning" in capsys.readouterr().err
+
+
+def test_update_recovers_from_corrupt_mirror(tmp_path, upstream):
+    cache = _cache(tmp_path)
+    url = upstream.as_uri()
+    mirror = cache.mirror_path(url)
+    mirror.mkdir(parents=True)
+    (mirror / "garbage").write_text("half-written")
+
+    cache.update(url)
+
+    assert _tags(mirror) == ["v1.0.0"]
+    assert not (mirror / "garbage").exists()
+
+
+def test_update_clears_leftover_git_lock_files(tmp_path, upstream):
+    cache = _cache(tmp_path)
+    url = upstream.as_uri()
+    mirror = cache.update(url)
+    _git(upstream, "tag", "v1.1.0")
+    # Simulate a fetch that was killed while updating the new tag's ref.
+    (mirror / "refs" / "tags" / "v1.1.0.lock").write_text("")
+
+    cache.update(url)
+
+    assert not (mirror / "refs" / "tags" / "v1.1.0.lock").exists()
+    assert _tags(mirror) == ["v1.0.0", "v1.1.0"]
+
+
+def test_update_keeps_intact_mirror_when_remote_fails(tmp_path, upstream):
+    url = upstream.as_uri()
+    cache = _cache(tmp_path)
+    mirror = cache.update(url)
+
+    broken = RepoCache(tmp_path / "registry-repos", lambda _u: "/nonexistent/repo")
+    with pytest.raises(subprocess.CalledProcessError):
+        broken.update(url)
+
+    assert _tags(mirror) == ["v1.0.0"]
+
+
+def test_failed_initial_fetch_leaves_no_mirror(tmp_path):
+    cache = RepoCache(tmp_path / "registry-repos", lambda _u: "/nonexistent/repo")
+    url = "https://github.com/x/missing.git"
+
+    with pytest.raises(subprocess.CalledProcessError):
+        cache.update(url)
+
+    assert list((tmp_path / "registry-repos").iterdir()) == []
+
+
+# ------------------------------
+# lock
+# ------------------------------
+
+
+def test_lock_removes_stale_lock_from_dead_process(tmp_path):
+    cache = _cache(tmp_path)
+    url = "https://github.com/x/vpc.git"
+    lock_path = cache.mirror_path(url).with_suffix(".lock")
+    lock_path.write_text("999999999")
+
+    with cache.lock(url):
+        assert lock_path.read_text() == str(os.getpid())
+    assert not lock_path.exists()
+
+
+def test_lock_times_out_when_held_by_live_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(repo_cache, "LOCK_POLL_INTERVAL", 0.01)
+    cache = _cache(tmp_path)
+    url = "https://github.com/x/vpc.git"
+    lock_path = cache.mirror_path(url).with_suffix(".lock")
+    lock_path.write_text(str(os.getppid()))
+
+    with pytest.raises(RepoCacheLockTimeout):
+        with cache.lock(url, timeout=0.05):
+            pass
+
+
+def test_lock_serializes_threads(tmp_path):
+    cache = _cache(tmp_path)
+    url = "https://github.com/x/vpc.git"
+    active = []
+    overlaps = []
+
+    def worker():
+        with cache.lock(url):
+            if active:
+                overlaps.append(True)
+            active.append(True)
+            time.sleep(0.01)
+            active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == []
+    assert not Path(cache.mirror_path(url).with_suffix(".lock")).exists()
+
+
+# ------------------------------
+# remote_tags
+# ------------------------------
+
+
+def test_remote_tags_maps_tags_to_commits(tmp_path, upstream):
+    _git(upstream, "tag", "-a", "v1.1.0", "-m", "annotated")
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=str(upstream),
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+
+    tags = _cache(tmp_path).remote_tags(str(upstream))
+
+    # Annotated tags resolve to their commit, like rev-parse tag^{commit}.
+    assert tags == {"v1.0.0": head, "v1.1.0": head}
@@ -0,0 +1,87 @@
+import json
+
+from src.services.registry.sync_journal import SyncJournal
+
+REPO = "https://github.com/x/vpc.git"
+MODULE = "app.terraform.io/my-org/vpc/aws"
+
+
+def test_read_returns_latest_entry_for_tag(tmp_path):
+    journal = SyncJournal(tmp_path / "j", "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.append(REPO, MODULE, "v2.0.0", {"n": 2})
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 3})
+
+    assert journal.tags(REPO, MODULE) == {"v1.0.0", "v2.0.0"}
+    assert journal.read(REPO, MODULE, "v1.0.0") == {"n": 3}
+    assert journal.read(REPO, MODULE, "v2.0.0") == {"n": 2}
+    assert journal.tags("https://github.com/x/other.git", MODULE) == set()
+    journal.close()
+
+
+def test_modules_sharing_a_repo_are_kept_apart(tmp_path):
+    other = "app.terraform.io/my-org/other/aws"
+    journal = SyncJournal(tmp_path / "j", "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.append(REPO, other, "v1.0.0", {"n": 2})
+
+    assert journal.read(REPO, MODULE, "v1.0.0") == {"n": 1}
+    assert journal.read(REPO, other, "v1.0.0") == {"n": 2}
+    assert journal.tags(REPO, "app.terraform.io/my-org/new/aws") == set()
+    journal.close()
+
+
+def test_resume_replays_entries(tmp_path):
+    journal = SyncJournal(tmp_path / "j", "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.close()
+
+    resumed = SyncJournal(tmp_path / "j", "fp", resume=True)
+    resumed.append(REPO, MODULE, "v2.0.0", {"n": 2})
+
+    assert resumed.resumed
+    assert resumed.read(REPO, MODULE, "v1.0.0") == {"n": 1}
+    assert resumed.read(REPO, MODULE, "v2.0.0") == {"n": 2}
+    resumed.close()
+
+
+def test_resume_drops_torn_tail(tmp_path):
+    path = tmp_path / "j"
+    journal = SyncJournal(path, "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b'{"repo": "' + REPO.encode() + b'", "tag": "v2')
+
+    resumed = SyncJournal(path, "fp", resume=True)
+    resumed.append(REPO, MODULE, "v3.0.0", {"n": 3})
+    resumed.close()
+
+    assert resumed.tags(REPO, MODULE) == {"v1.0.0", "v3.0.0"}
+    lines = path.read_bytes().splitlines()
+    assert [json.loads(line).get("tag") for line in lines[1:]] == ["v1.0.0", "v3.0.0"]
+
+
+def test_resume_ignores_journal_from_other_settings(tmp_path):
+    journal = SyncJournal(tmp_path / "j", "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.close()
+
+    other = SyncJournal(tmp_path / "j", "other", resume=True)
+
+    assert not other.resumed
+    assert other.tags(REPO, MODULE) == set()
+    other.close()
+
+
+def test_without_resume_starts_empty(tmp_path):
+    journal = SyncJournal(tmp_path / "j", "fp")
+    journal.append(REPO, MODULE, "v1.0.0", {"n": 1})
+    journal.close()
+
+    fresh = SyncJournal(tmp_path / "j", "fp")
+
+    assert not fresh.resumed
+    assert fresh.tags(REPO, MODULE) == set()
+    fresh.remove()
+    assert not (tmp_path / "j").exists()
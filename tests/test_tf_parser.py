@@ -0,0 +1,244 @@
+import random
+
+import pytest
+
+from src.services.registry import tf_parser
+from src.services.registry.tf_parser import extract_tf_variables, parse_blob_batch
+
+# Differential corpus: every file must yield the same variables with and
+# without the fast path. Entries marked "fallback" must be left to hcl2.
+CORPUS = [
+    ("empty", "", "fast"),
+    ("no_variables", 'output "id" {\n  value = aws_vpc.this.id\n}\n', "fast"),
+    ("bare", 'variable "region" {}\n', "fast"),
+    ("unquoted_label", "variable region {\n  default = null\n}\n", "fast"),
+    (
+        "typical",
+        'variable "cidr" {\n'
+        "  type        = string\n"
+        '  description = "CIDR block for the VPC"\n'
+        '  default     = "10.0.0.0/16"\n'
+        "}\n",
+        "fast",
+    ),
+    (
+        "escapes_kept_raw",
+        'variable "a" {\n  description = "say \\"hi\\"\\n\\\\ \\u00e9"\n}\n',
+        "fast",
+    ),
+    (
+        "numbers",
+        'variable "a" {\n  default = 10\n}\n'
+        'variable "b" {\n  default = 10.50\n}\n'
+        'variable "c" {\n  default = 007\n}\n',
+        "fast",
+    ),
+    (
+        "keywords",
+        'variable "a" {\n  default = [true, false, null]\n  type = list(any)\n}\n',
+        "fast",
+    ),
+    (
+        "nested_collections",
+        'variable "tags" {\n'
+        "  type = map(list(set(string)))\n"
+        "  default = {\n"
+        '    "a.b" = ["x", "y",]\n'
+        "    c-d   = { e = 1, f: 2.5 }\n"
+        "    true  = {}\n"
+        "  }\n"
+        "}\n",
+        "fast",
+    ),
+    (
+        "multiline_list",
+        'variable "azs" {\n  default = [\n    "a",\n    "b",\n  ]\n}\n',
+        "fast",
+    ),
+    (
+        "type_names_in_values",
+        'variable "a" {\n  default = [string, list(number)]\n}\n'
+        'variable "b" {\n  default = { a = string, b = map(number) }\n}\n',
+        "fast",
+    ),
+    (
+        "multiline_type_call",
+        'variable "a" {\n  type = list(\n    string\n  )\n}\n',
+        "fast",
+    ),
+    (
+        "comments",
+        "# leading\n"
+        'variable "a" {\n'
+        '  default = "a" // trailing\n'
+        "  /* inline */ type = bool\n"
+        "}\n",
+        "fast",
+    ),
+    (
+        "validation_and_flags",
+        'variable "name" {\n'
+        "  type      = string\n"
+        "  sensitive = true\n"
+        "  nullable  = false\n"
+        "  validation {\n"
+        '    condition     = length(var.name) > 1 && can(regex("^a", var.name))\n'
+        '    error_message = "Name is too short."\n'
+        "  }\n"
+        "}\n",
+        "fast",
+    ),
+    (
+        "mixed_blocks",
+        "locals {\n  a = 1\n}\n"
+        'resource "aws_vpc" "this" {\n'
+        "  cidr_block = var.cidr\n"
+        "  tags = merge(var.tags, { Name = var.name })\n"
+        "  lifecycle { create_before_destroy = true }\n"
+        "}\n"
+        'variable "a" {}\n'
+        'variable "a" {\n  default = 2\n}\n',
+        "fast",
+    ),
+    (
+        "single_line_blocks",
+        'variable "a" { default = 1 }\nvariable "b" { type = string }\n',
+        "fast",
+    ),
+    (
+        "duplicate_object_keys",
+        'variable "a" {\n  default = {a = 1, a = 2}\n}\n',
+        "fast",
+    ),
+    ("crlf", 'variable "a" {\r\n  default = "x"\r\n}\r\n', "fast"),
+    (
+        "object_type",
+        'variable "a" {\n  type = object({ a = string, b = optional(number, 1) })\n}\n',
+        "fallback",
+    ),
+    (
+        "templates",
+        'variable "a" {\n  default = "${var.x}"\n  description = "%{if true}x%{endif}"\n}\n',
+        "fallback",
+    ),
+    ("negative_number", 'variable "a" {\n  default = -1.5\n}\n', "fallback"),
+    ("exponent", 'variable "a" {\n  default = 1e3\n}\n', "fallback"),
+    (
+        "heredoc",
+        'variable "a" {\n  description = <<EOT\nvariable "b" {}\nEOT\n}\n',
+        "fallback",
+    ),
+    ("function_default", 'variable "a" {\n  default = foo(1, "b")\n}\n', "fallback"),
+    ("two_labels", 'variable "a" "b" {\n  default = 1\n}\n', "fallback"),
+    (
+        "duplicate_attribute",
+        'variable "a" {\n  default = 1\n  default = 2\n}\n',
+        "fallback",
+    ),
+    ("missing_brace", 'variable "a" {\n  default = 1\n', "fallback"),
+    ("stray_brace", 'variable "a" {\n}\n}\n', "fallback"),
+    ("missing_comma", 'variable "a" {\n  default = [1 2]\n}\n', "fallback"),
+    (
+        "trailing_comma_in_call",
+        'variable "a" {\n  type = list(string,)\n}\n',
+        "fallback",
+    ),
+    (
+        "multiline_comment",
+        '/*\nvariable "hidden" {}\n*/\nvariable "a" {}\n',
+        "fallback",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "source,path", [(c[1], c[2]) for c in CORPUS], ids=[c[0] for c in CORPUS]
+)
+def test_fast_path_matches_hcl2(source, path):
+    data = source.encode("utf-8")
+    assert extract_tf_variables(data) == extract_tf_variables(data, fast_path=False)
+
+    text = source.replace("\r\n", "\n")
+    assert (tf_parser._variable_blocks(text) is not None) == (path == "fast")
+
+
+def _random_value(rng, depth=0):
+    choices = ["string", "int", "float", "keyword", "type"]
+    if depth < 2:
+        choices += ["list", "object"]
+    kind = rng.choice(choices)
+    if kind == "string":
+        return '"' + rng.choice(["", "a", "a b", 'q\\"', "x/y", "{}"]) + '"'
+    if kind == "int":
+        return str(rng.randint(0, 10**6))
+    if kind == "float":
+        return f"{rng.randint(0, 99)}.{rng.randint(0, 99)}"
+    if kind == "keyword":
+        return rng.choice(["true", "false", "null"])
+    if kind == "type":
+        return rng.choice(["string", "number", "list(string)", "map(set(any))"])
+    sep = rng.choice([", ", ",\n", ",\n  "])
+    items = [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    if kind == "list":
+        trailing = rng.choice(["", ","]) if items else ""
+        return "[" + sep.join(items) + trailing + "]"
+    keys = [rng.choice(["a", "b-c", '"d.e"', "true"]) for _ in items]
+    pairs = [f"{k} {rng.choice(['=', ':'])} {v}" for k, v in zip(keys, items)]
+    return "{" + sep.join(pairs) + "}"
+
+
+def _random_file(rng):
+    blocks = []
+    for i in range(rng.randint(0, 4)):
+        lines = []
+        for attr in rng.sample(["type", "description", "default", "sensitive"], 3):
+            lines.append(f"  {attr} = {_random_value(rng)}")
+        if rng.random() < 0.1:
+            # Something only hcl2 can read.
+            lines.append(f"  default = {rng.choice(['-1', 'var.x', '1 + 2'])}")
+        blocks.append(f'variable "v{i}" {{\n' + "\n".join(lines) + "\n}\n")
+    if rng.random() < 0.3:
+        blocks.append('resource "null_resource" "x" {\n  triggers = { a = 1 }\n}\n')
+    rng.shuffle(blocks)
+    return "\n".join(blocks)
+
+
+def test_fast_path_matches_hcl2_on_generated_files():
+    rng = random.Random(1234)
+    for _ in range(300):
+        data = _random_file(rng).encode("utf-8")
+        assert extract_tf_variables(data) == extract_tf_variables(
+            data, fast_path=False
+        ), data.decode()
+
+
+def test_fast_path_skips_hcl2_for_simple_files(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tf_parser.hcl2, "loads", calls.append)
+
+    variables = extract_tf_variables(
+        b'variable "region" {\n  type = string\n  default = "eu-west-1"\n}\n'
+    )
+    assert extract_tf_variables(b'output "id" {\n  value = "x"\n}\n') == []
+
+    assert calls == []
+    assert variables == [
+        {
+            "name": "region",
+            "type": "${string}",
+            "description": None,
+            "default": "eu-west-1",
+            "required": False,
+        }
+    ]
+
+
+def test_invalid_utf8_yields_no_variables():
+    assert extract_tf_variables(b'variable "\xff" {}\n') == []
+
+
+def test_parse_blob_batch_keys_results_by_sha():
+    parsed = parse_blob_batch([("a", b'variable "x" {}\n'), ("b", b"")])
+    assert list(parsed) == ["a", "b"]
+    assert parsed["a"][0]["name"] == "x"
+    assert parsed["b"] == []